@@ -109,7 +109,10 @@ class ArtineoClient:
                 # passe en mode timeout court pour ne pas bloquer indéfiniment
                 self.ws.settimeout(0.01)            
                 msg = self.ws.recv()             
-                if msg:
+                if msg == "ping":
+                    # heartbeat applicatif du serveur
+                    self.ws.send("pong")
+                elif msg:
                     log("[ArtineoClient] reçu :", msg)
             except OSError:
                 # pas de frame dispo → on rend la main
@@ -88,7 +88,7 @@ def main():
     frame_size = width * height * 3  # bgr24
 
     # 1) Initialisation du client WS
-    client = ArtineoClient(module_id=1)
+    client = ArtineoClient(module_id=1, acks="none")
 
     # 2) Démarrage du handler WS dans un thread dédié
     def run_ws():
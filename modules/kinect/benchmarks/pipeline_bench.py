@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# modules/kinect/benchmarks/pipeline_bench.py
+"""
+Banc du pipeline Kinect : rejoue un enregistrement de profondeur dans
+`MainController.run` (sans Kinect ni serveur) et mesure le débit.
+
+Usage : python benchmarks/pipeline_bench.py sequence.npz
+        [--tool 1|2|3|4] [--speed max | 1 | 2] [--no-timing] [--out pipeline.json]
+        python benchmarks/pipeline_bench.py --synthetic 300 [...]
+
+Enregistrer une séance réelle (Windows, Kinect branchée) :
+        python frame_source.py sequence.npz --frames 900
+ou      python main.py --record sequence.npz
+
+Avec `--speed max` (défaut), chaque frame de l'enregistrement passe dans
+le pipeline, dans l'ordre : deux exécutions sur le même fichier
+traitent exactement les mêmes frames. `--speed 1` rejoue à 30 fps comme
+le capteur ; les frames arrivées pendant un traitement trop long sont
+sautées et comptées.
+
+`--synthetic N` génère N frames (plan de sable bruité où un creux se
+déplace) pour les machines sans enregistrement.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+KINECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(KINECT_DIR))
+from channel_selector import ChannelSelector  # noqa: E402
+from config import Config  # noqa: E402
+from frame_source import DEPTH_SHAPE, DepthWriter, RecordedDepthSource  # noqa: E402
+from main import MainController, parse_speed  # noqa: E402
+
+
+class FixedChannelSelector(ChannelSelector):
+    """Sélectionne `tool` au premier tour, puis ne change plus."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self._sent = False
+
+    async def get_next_channel(self) -> Optional[str]:
+        if self._sent:
+            return None
+        self._sent = True
+        return self.tool
+
+
+def write_synthetic(path: str, n_frames: int, seed: int = 0):
+    """Plan à ~1 m avec bruit de capteur et un creux qui traverse l'image."""
+    rng = np.random.default_rng(seed)
+    h, w = DEPTH_SHAPE
+    yy, xx = np.mgrid[0:h, 0:w]
+    writer = DepthWriter(path)
+    for i in range(n_frames):
+        frame = 1000.0 + rng.normal(0.0, 1.5, DEPTH_SHAPE)
+        cx = 150 + (i * 3) % 250
+        cy = 200
+        frame += 20.0 * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * 12.0 ** 2))
+        writer.append(frame.astype(np.uint16))
+    writer.close()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=KINECT_DIR,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, path: str) -> dict:
+    # templates/ et images/ sont relatifs au dossier du module
+    os.chdir(KINECT_DIR)
+    raw_config = {
+        "bypass_ws": True,
+        "debug_mode": False,
+        # aucune fenêtre : le banc tourne aussi sans affichage
+        "headless": True,
+        # temps par étape sur toute la séquence, rapport seulement à la fin
+        "stage_timing": not args.no_timing,
+        "timing_window": 100000,
+        "timing_interval": 0,
+    }
+    source = RecordedDepthSource(Config(**raw_config), path, speed=args.speed)
+    controller = MainController(
+        raw_config=raw_config,
+        channel_selector=FixedChannelSelector(args.tool),
+        source=source,
+    )
+
+    start = time.perf_counter()
+    asyncio.run(controller.run())
+    elapsed = time.perf_counter() - start
+
+    frames = source.frames_read
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "recording": str(path),
+        "frames": frames,
+        # sautées par le rejeu (capteur simulé) puis par la boucle
+        "skipped": source.frames_skipped + controller.grabber.skipped,
+        "acquisition": controller.grabber.stats(),
+        "duration_s": round(elapsed, 3),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else None,
+        "ms_per_frame": round(1000 * elapsed / frames, 3) if frames else None,
+        "timing": controller.timer.report() if controller.timer.enabled else None,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("recording", nargs="?", help="enregistrement .npy ou .npz")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="générer N frames synthétiques au lieu d'un enregistrement")
+    parser.add_argument("--tool", choices=("1", "2", "3", "4"), default="1",
+                        help="outil actif pendant tout le rejeu")
+    parser.add_argument("--speed", type=parse_speed, default=None,
+                        help="vitesse du rejeu (1 = 30 fps) ; défaut : max")
+    parser.add_argument("--no-timing", action="store_true",
+                        help="sans chronométrage par étape (mesure de son surcoût)")
+    parser.add_argument("--out", default="pipeline.json", help="fichier de résultats JSON")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if not args.recording and not args.synthetic:
+        build_parser().error("un enregistrement ou --synthetic N est requis")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    out = os.path.abspath(args.out)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.abspath(args.recording) if args.recording else None
+        if path is None:
+            path = os.path.join(tmp, "synthetic.npy")
+            write_synthetic(path, args.synthetic)
+        report = run(args, path)
+
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"{report['frames']} frames en {report['duration_s']} s : "
+          f"{report['fps']} fps, {report['ms_per_frame']} ms/frame, "
+          f"{report['skipped']} sautées")
+    if report["timing"]:
+        print(f"{'étape':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+        for name, p in [("total", report["timing"]["total_ms"]),
+                        *report["timing"]["stages_ms"].items()]:
+            print(f"{name:<16}{p['p50']:>9}{p['p95']:>9}{p['p99']:>9}{p['max']:>9}")
+    print(f"Résultats : {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# modules/kinect/benchmarks/preprocess_bench.py
+"""
+Compare l'ancien prétraitement d'une frame Kinect et le chemin actuel
+(crop d'abord, sans copie) : temps par frame et allocations.
+
+Usage : python benchmarks/preprocess_bench.py [-n 2000] [--ksize 5]
+
+Ancien chemin : copie du buffer du runtime (`get_last_depth_frame`),
+`.astype(np.uint16)`, flou médian sur les 512×424 pixels, crop, flip
+dans un nouveau tableau. Chemin actuel (`DepthSource.preprocess`) :
+flou de la ROI et de sa marge lu directement dans le buffer, dans un
+tampon préalloué, puis flip écrit dans le tampon de sortie.
+
+La mémoire allouée par frame (pic, temporaires compris) est mesurée
+avec tracemalloc : numpy et les sorties OpenCV passent par l'allocateur
+suivi. Le temps est le meilleur de 5 séries, sans tracemalloc.
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from config import Config  # noqa: E402
+from frame_source import DEPTH_SHAPE, DepthSource  # noqa: E402
+
+
+def legacy_preprocess(runtime_buffer: np.ndarray, config: Config, ksize: int) -> np.ndarray:
+    """Chemin d'avant : KinectInterface._get_raw_depth + get_depth_frame."""
+    raw = np.copy(runtime_buffer).reshape(DEPTH_SHAPE)   # get_last_depth_frame
+    blurred = cv2.medianBlur(raw.astype(np.uint16), ksize)
+    y0, x0 = config.roi_y0, config.roi_x0
+    h, w = config.roi_height, config.roi_width
+    return cv2.flip(blurred[y0 : y0 + h, x0 : x0 + w], 1)
+
+
+class BufferSource(DepthSource):
+    """Source minimale : seul `preprocess()` sert, sur le buffer du banc."""
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def has_new_depth_frame(self) -> bool:
+        return True
+
+    def _get_raw_depth(self) -> np.ndarray:
+        raise NotImplementedError
+
+
+def peak_allocated(fn) -> int:
+    """Octets alloués au pic pendant un appel (temporaires compris)."""
+    fn()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=2000, help="frames par mesure")
+    parser.add_argument("--ksize", type=int, default=5, choices=(3, 5),
+                        help="noyau du flou médian (3 ou 5 en uint16)")
+    args = parser.parse_args()
+
+    config = Config()
+    rng = np.random.default_rng(0)
+    # buffer plat du runtime (c_ushort × 512·424), rempli comme une frame
+    runtime_buffer = (1000 + rng.normal(0, 5, DEPTH_SHAPE[0] * DEPTH_SHAPE[1])).astype(np.uint16)
+    view = runtime_buffer.reshape(DEPTH_SHAPE)
+
+    source = BufferSource(config, blur_ksize=args.ksize)
+    out = np.empty((config.roi_height, config.roi_width), dtype=np.uint16)
+
+    def legacy():
+        return legacy_preprocess(runtime_buffer, config, args.ksize)
+
+    def current():
+        return source.preprocess(view, out)
+
+    if not np.array_equal(legacy(), current()):
+        raise SystemExit("Résultats différents entre les deux chemins")
+
+    print(f"ROI {config.roi_width}×{config.roi_height} dans {DEPTH_SHAPE[1]}×{DEPTH_SHAPE[0]}, "
+          f"flou médian {args.ksize}×{args.ksize}, {args.number} frames")
+    print(f"{'chemin':<10}{'µs/frame':>10}{'pic alloc (Ko)':>16}")
+    results = {}
+    for name, fn in (("ancien", legacy), ("actuel", current)):
+        t = min(timeit.repeat(fn, number=args.number, repeat=5)) / args.number
+        peak = peak_allocated(fn)
+        results[name] = (t, peak)
+        print(f"{name:<10}{t * 1e6:>10.1f}{peak / 1024:>16.1f}")
+    (t0, p0), (t1, p1) = results["ancien"], results["actuel"]
+    print(f"actuel/ancien : temps x{t1 / t0:.2f}, mémoire allouée x{p1 / max(p0, 1):.3f}")
+
+
+if __name__ == "__main__":
+    main()
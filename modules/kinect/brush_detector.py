@@ -3,6 +3,7 @@ import numpy as np
 from typing import List, Dict
 
 from config import Config
+from visualizer import NullVisualizer
 
 
 class BrushStrokeDetector:
@@ -16,7 +17,7 @@ class BrushStrokeDetector:
     """
 
     def __init__(self, brush: np.ndarray, config: Config,
-                 stroke_area_thresh: float = 100.0):
+                 stroke_area_thresh: float = 100.0, visualizer=None):
         # brush: image grayscale float [0,1]
         self.brush = brush.astype(np.float32) / 255.0
         self.tool_channel = {'1': 0, '2': 1, '3': 2}
@@ -24,6 +25,8 @@ class BrushStrokeDetector:
         self.brush_scale = config.brush_scale
         self.stroke_area_thresh = stroke_area_thresh
         self.kern = np.ones((3, 3), np.uint8)
+        # fenêtres de debug "mask" et "skel"
+        self.visualizer = visualizer or NullVisualizer()
 
         # position du curseur dans la fenêtre dist (en pixels de carte)
         self.mouse_x = 0
@@ -57,13 +60,9 @@ class BrushStrokeDetector:
 
         skel = cv2.ximgproc.thinning(mask)
 
-        if self.config.debug_mode:
-            for name, img in (("mask", mask), ("skel", skel)):
-                big = cv2.resize(img,
-                                 (img.shape[1], img.shape[0]),
-                                 interpolation=cv2.INTER_NEAREST)
-                cv2.imshow(name, big)
-            cv2.waitKey(1)
+        # images recalculées à chaque appel : pas de copie
+        self.visualizer.show("mask", mask, copy=False)
+        self.visualizer.show("skel", skel, copy=False)
 
         ys, xs = np.where(skel > 0)
         for y, x in zip(ys, xs):
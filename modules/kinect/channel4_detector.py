@@ -5,6 +5,7 @@ from depth_processor import DepthProcessor
 from shape_classifier import ShapeClassifier
 from cluster_tracker import ClusterTracker
 from object_detector import ObjectDetector
+from visualizer import NullVisualizer
 
 class Channel4Detector:
     def __init__(
@@ -14,7 +15,7 @@ class Channel4Detector:
         cluster_tracker: ClusterTracker,
         object_detector: ObjectDetector,
         small_area_threshold: float,
-        display: bool = True
+        visualizer=None
     ):
         """
         :param depth_processor: instance de DepthProcessor pour extraire mapped + contours
@@ -22,14 +23,14 @@ class Channel4Detector:
         :param cluster_tracker: instance de ClusterTracker
         :param object_detector: instance d’ObjectDetector
         :param small_area_threshold: aire min d’un contour pour tenter classification
-        :param display: si True, on ouvre des fenêtres OpenCV pour visualiser le processus
+        :param visualizer: reçoit la vue de debug « Channel4 View » (rien si None)
         """
         self.depth_processor      = depth_processor
         self.shape_classifier     = shape_classifier
         self.cluster_tracker      = cluster_tracker
         self.object_detector      = object_detector
         self.small_area_threshold = small_area_threshold
-        self.display              = display
+        self.visualizer           = visualizer or NullVisualizer()
 
         # Si on veut, on peut définir des couleurs pour chaque type de template
         # Exemple : landscapes en bleu, mediums en vert, small en jaune
@@ -54,7 +55,7 @@ class Channel4Detector:
         2) Pour chaque contour > small_area_threshold, on appelle classify_3d(cnt, raw_frame, baseline_for_bg)
         3) On collecte dets_brut = [(shape, cx, cy, area, 0.0, w, h), …]
         4) On update le ClusterTracker, puis appel à ObjectDetector.detect()
-        5) Si display=True, on affiche en direct :
+        5) Si le visualizer prend une image à ce moment, on lui envoie :
            - La depth map 8 bits (mapped) avec contours et annotations
            - Pour chaque contour classifié : patch_rel et tmpl_resized correspondants
         """
@@ -66,8 +67,10 @@ class Channel4Detector:
 
         dets_brut: List[tuple] = []
 
-        # Copie de mapped pour dessiner les contours en superposition
-        if self.display:
+        # Copie de mapped pour dessiner les contours en superposition,
+        # seulement si l'image sera affichée (fréquence plafonnée, pas en headless)
+        display = self.visualizer.wants("Channel4 View")
+        if display:
             display_img = cv2.cvtColor(mapped, cv2.COLOR_GRAY2BGR)  # passer en BGR pour couleur
         else:
             display_img = None
@@ -86,7 +89,7 @@ class Channel4Detector:
             )
             if shape is None:
                 # Si aucun template ne matche, on peut dessiner le contour en rouge (optionnel)
-                if self.display:
+                if display:
                     cv2.drawContours(display_img, [cnt], -1, (0, 0, 255), 2)
                 continue
 
@@ -101,7 +104,7 @@ class Channel4Detector:
             dets_brut.append((shape, cx, cy, area, 0.0, float(w), float(h)))
 
             # Si display activé, dessiner le contour et annoter le nom du template
-            if self.display:
+            if display:
                 # Choisir la couleur selon le préfixe du nom
                 if shape.startswith(self.prefix_landscape):
                     color = self.color_landscape
@@ -143,12 +146,9 @@ class Channel4Detector:
         candidate_backgrounds = [ev for ev in events_all if ev["type"] == "background"]
         candidate_objects     = [ev for ev in events_all if ev["type"] != "background"]
 
-        # 6) Afficher le résultat global si display=True
-        if self.display:
+        # 6) Envoyer le résultat global au visualizer (affiché par son thread)
+        if display:
             # Fenêtre principale « Vue 3D » ou « Vue Depth + contours »
-            cv2.imshow("Channel4 View", display_img)
-
-            # Attendre 1 ms pour la rafraîchir (ou 10 ms si trop rapide)
-            cv2.waitKey(1)
+            self.visualizer.show("Channel4 View", display_img, copy=False)
 
         return candidate_backgrounds, candidate_objects, cnts_raw
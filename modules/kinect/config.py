@@ -86,7 +86,13 @@ class Config(BaseModel):
 
     # ─── Mode debug / bypass WS ───
     debug_mode: bool = Field(
-        True, description="Enable debug windows and verbose logging"
+        False, description="Enable debug windows and verbose logging"
+    )
+    headless: bool = Field(
+        False, description="No OpenCV window at all (overrides debug_mode's windows)"
+    )
+    display_fps: float = Field(
+        15.0, gt=0, description="Max refresh rate of each debug window (Hz)"
     )
     bypass_ws: bool = Field(
         False, description="If true, do not open WebSocket (for offline debug)"
@@ -97,6 +103,20 @@ class Config(BaseModel):
         2, gt=0, description="Scale factor for on-screen debug windows"
     )
 
+    # ─── Per-stage timing of the main loop ───
+    stage_timing: bool = Field(
+        False, description="Time each stage of the main loop (rolling percentiles)"
+    )
+    timing_window: int = Field(
+        300, gt=0, description="Number of frames kept for the rolling percentiles"
+    )
+    timing_interval: float = Field(
+        5.0, ge=0, description="Seconds between timing reports in the log (0: only at shutdown)"
+    )
+    timing_telemetry: bool = Field(
+        False, description="Also send each timing report to the server (action 'telemetry')"
+    )
+
     @model_validator(mode="before")
     def _compute_roi_dimensions(cls, values: dict) -> dict:
         """
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import List
 
 from config import Config
+from visualizer import NullVisualizer
 
 
 @dataclass(frozen=True)
@@ -21,13 +22,16 @@ class DepthProcessor:
     and extract object contours.
     """
 
-    def __init__(self, config: Config, mask_threshold: int = 80, morph_kernel: int = 3):
+    def __init__(self, config: Config, mask_threshold: int = 80, morph_kernel: int = 3,
+                 visualizer=None):
         """
         Args:
             config: Config object with mapping scale.
             mask_threshold: intensity threshold for binary mask (0-255).
             morph_kernel: size of square kernel for morphological filtering.
+            visualizer: receives the binary mask ("Depth Mask" window).
         """
+        self._visualizer = visualizer or NullVisualizer()
         self._scale = config.scale
         self._mask_threshold = mask_threshold
         # kernel for opening/closing
@@ -59,8 +63,7 @@ class DepthProcessor:
         mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
         mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._kernel)
         
-        cv2.imshow("Depth Mask", mask)
-        cv2.waitKey(1)
+        self._visualizer.show("Depth Mask", mask, copy=False)
 
         # find external contours
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from frame_source import DepthSource
+from stage_timer import percentiles
+
+
+class DepthFrame(NamedTuple):
+    data: np.ndarray      # preprocessed (roi_height, roi_width) uint16
+    seq: int              # 1, 2, 3… in capture order
+    timestamp: float      # time.perf_counter() when the frame was available
+
+
+class LatestFrameSlot:
+    """
+    Hands the latest frame from the capture thread to the processing loop
+    without copying it.
+
+    Front/back double buffer plus the buffer held by the consumer:
+    - the writer fills `back`, then `publish()` swaps it with `front`;
+    - `take()` swaps `front` with the buffer the consumer held until now.
+    Only indices are swapped under the lock, and the writer never writes
+    into the buffer being processed, so a taken frame stays valid until
+    the next `take()`. An unread front frame is simply replaced by the
+    next one (`lossless=False`), or the writer waits for it to be taken.
+    """
+
+    def __init__(self, shape: Tuple[int, int], dtype=np.uint16, lossless: bool = False):
+        self._buffers = [np.zeros(shape, dtype=dtype) for _ in range(3)]
+        self._back, self._front, self._held = 0, 1, 2
+        self.lossless = lossless
+        self.seq = 0            # seq of the front frame (0: none yet)
+        self.taken = 0          # seq of the last frame taken
+        self.timestamp = 0.0
+        self.closed = False
+        self._cond = threading.Condition()
+        # wakes the waiting asyncio loop (call_soon_threadsafe)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+    @property
+    def back(self) -> np.ndarray:
+        """Buffer the writer fills next (writer thread only)."""
+        return self._buffers[self._back]
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def _wake(self) -> None:
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._event.set)
+            except RuntimeError:
+                # loop already closed
+                pass
+
+    def publish(self, timestamp: float) -> None:
+        with self._cond:
+            while self.lossless and self.taken < self.seq and not self.closed:
+                self._cond.wait(0.1)
+            self._back, self._front = self._front, self._back
+            self.seq += 1
+            self.timestamp = timestamp
+        self._wake()
+
+    def take(self) -> Optional[DepthFrame]:
+        """Newest frame not taken yet, or None."""
+        with self._cond:
+            if self.taken >= self.seq:
+                return None
+            self._held, self._front = self._front, self._held
+            self.taken = self.seq
+            self._cond.notify_all()
+            return DepthFrame(self._buffers[self._held], self.seq, self.timestamp)
+
+    async def wait(self, timeout: float) -> Optional[DepthFrame]:
+        """Waits (without polling) for a frame newer than the last taken one."""
+        frame = self.take()
+        if frame is not None or self.closed:
+            return frame
+        self._event.clear()
+        # published between take() and clear(): the event was cleared
+        frame = self.take()
+        if frame is not None:
+            return frame
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.take()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._wake()
+
+
+class FrameGrabber:
+    """
+    Capture thread: waits for the source, preprocesses each frame (blur,
+    crop, flip) straight into the slot's back buffer and publishes it.
+
+    The processing loop awaits `next_frame()`; frames it was too slow to
+    take are counted in `skipped` (sequence gaps), and `age_ms` keeps how
+    old each frame was when processing started.
+
+    Non-realtime sources (replay at max speed) are read losslessly: the
+    thread waits for each frame to be taken, so runs stay deterministic.
+    """
+
+    def __init__(self, source: DepthSource, window: int = 300, logger=None):
+        self.source = source
+        self.logger = logger or logging.getLogger(__name__)
+        config = source.config
+        self.slot = LatestFrameSlot(
+            (config.roi_height, config.roi_width), lossless=not source.realtime
+        )
+        self.captured = 0
+        self.delivered = 0
+        self.skipped = 0
+        self.errors = 0
+        self.age_ms = deque(maxlen=window)
+        self._last_seq = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def finished(self) -> bool:
+        """Source exhausted and its last frame taken."""
+        return self.slot.closed and self.slot.taken >= self.slot.seq
+
+    def start(self) -> None:
+        """Starts the thread (on an open source, from the asyncio loop)."""
+        self.slot.attach(asyncio.get_running_loop())
+        self._thread = threading.Thread(target=self._run, name="kinect-capture", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if not self.source.wait_new_depth_frame(0.1):
+                    if self.source.finished:
+                        break
+                    continue
+                timestamp = time.perf_counter()
+                try:
+                    self.source.get_depth_frame(out=self.slot.back)
+                except Exception as e:
+                    self.errors += 1
+                    self.logger.warning("Depth frame capture failed: %s", e)
+                    time.sleep(0.01)
+                    continue
+                self.captured += 1
+                self.slot.publish(timestamp)
+        finally:
+            self.slot.close()
+
+    async def next_frame(self, timeout: float = 0.1) -> Optional[DepthFrame]:
+        frame = await self.slot.wait(timeout)
+        if frame is None:
+            return None
+        self.delivered += 1
+        self.skipped += frame.seq - self._last_seq - 1
+        self._last_seq = frame.seq
+        self.age_ms.append((time.perf_counter() - frame.timestamp) * 1000)
+        return frame
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.slot.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "captured": self.captured,
+            "delivered": self.delivered,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "age_ms": percentiles(self.age_ms),
+        }
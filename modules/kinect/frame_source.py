@@ -0,0 +1,426 @@
+import abc
+import logging
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from config import Config
+
+# Kinect v2 depth stream
+DEPTH_SHAPE = (424, 512)
+DEPTH_FPS = 30.0
+
+
+class DepthSource(abc.ABC):
+    """
+    Common surface of every depth frame source used by the pipeline
+    (live Kinect, recorded sequence, recorder wrapper).
+
+    Subclasses implement `open`, `close`, `has_new_depth_frame` and
+    `_get_raw_depth` (full 424×512 uint16 frame); `get_depth_frame`
+    applies the same preprocessing to all of them:
+    - median blur
+    - crop to ROI
+    - horizontal flip
+
+    Preprocessing is crop-first: only the ROI plus the blur kernel margin
+    is blurred, into a preallocated buffer, and the flip writes the result
+    straight into `out`. For ROI pixels the result is the same as blurring
+    the whole frame (the margin holds every neighbour the kernel reads).
+
+    `realtime` sources produce frames on their own clock (a consumer that
+    is too slow misses some); the others wait to be read.
+    """
+
+    realtime = True
+    poll_interval = 0.002
+
+    def __init__(self, config: Config, blur_ksize: int = 5, logger=None):
+        self.config = config
+        self.blur_ksize = blur_ksize
+        self.logger = logger or logging.getLogger(__name__)
+        self._window = None           # (window slices, ROI slices inside it)
+        self._blur_buf: Optional[np.ndarray] = None
+
+    @abc.abstractmethod
+    def open(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def has_new_depth_frame(self) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def _get_raw_depth(self) -> np.ndarray:
+        ...
+
+    @property
+    def finished(self) -> bool:
+        """True once a finite source has delivered its last frame."""
+        return False
+
+    def wait_new_depth_frame(self, timeout: float) -> bool:
+        """
+        Block (at most `timeout` s) until a new frame is available.
+        The Kinect runtime has no blocking API: poll every few ms.
+        """
+        deadline = time.perf_counter() + timeout
+        while not self.has_new_depth_frame():
+            if self.finished or time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def _roi_window(self, shape):
+        """
+        Slices of the ROI grown by the kernel margin (clamped to the frame:
+        at the frame border, the blur replicates edge pixels either way),
+        and of the ROI inside that window.
+        """
+        if self._window is None or self._window[0] != shape:
+            m = self.blur_ksize // 2
+            y0, x0 = self.config.roi_y0, self.config.roi_x0
+            h, w = self.config.roi_height, self.config.roi_width
+            wy0, wx0 = max(0, y0 - m), max(0, x0 - m)
+            wy1, wx1 = min(shape[0], y0 + h + m), min(shape[1], x0 + w + m)
+            window = (slice(wy0, wy1), slice(wx0, wx1))
+            roi = (slice(y0 - wy0, y0 - wy0 + h), slice(x0 - wx0, x0 - wx0 + w))
+            self._window = (shape, window, roi)
+            self._blur_buf = np.empty((wy1 - wy0, wx1 - wx0), dtype=np.uint16)
+        return self._window[1], self._window[2]
+
+    def preprocess(self, raw: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Args:
+            raw: full depth frame (any view: memmap, runtime buffer…).
+            out: optional (roi_height, roi_width) uint16 array to write into.
+        Returns:
+            np.ndarray of shape (roi_height, roi_width) with dtype uint16
+        """
+        window, roi = self._roi_window(raw.shape)
+        # a view: OpenCV reads it in place (rows only need a constant stride)
+        src = raw[window]
+        if src.dtype != np.uint16:
+            src = src.astype(np.uint16)
+        blurred = cv2.medianBlur(src, self.blur_ksize, dst=self._blur_buf)
+
+        # Crop to ROI (view) and flip horizontally for mirror view, into `out`
+        return cv2.flip(blurred[roi], 1, dst=out)
+
+    def get_depth_frame(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get the latest raw frame, preprocessed (see class docstring).
+        """
+        return self.preprocess(self._get_raw_depth(), out)
+
+
+# ─── Recording ───
+
+class DepthWriter:
+    """
+    Appends raw depth frames to a `.npy` or a chunked `.npz` file.
+
+    - `.npy`: frames are streamed to disk behind a header whose frame
+      count is rewritten on `close()`; the file can then be memory-mapped.
+    - `.npz`: frames are buffered and written every `chunk_frames` frames
+      as a compressed `chunk_NNNNN` member (N, 424, 512) of the archive.
+    """
+
+    def __init__(self, path, chunk_frames: int = 300):
+        self.path = Path(path)
+        if self.path.suffix not in (".npy", ".npz"):
+            raise ValueError(f"Unsupported recording format: {self.path.suffix}")
+        self.chunk_frames = max(1, chunk_frames)
+        self.count = 0
+        self._file = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._chunk: List[np.ndarray] = []
+        self._n_chunks = 0
+        self._header_len = 0
+
+    def append(self, raw: np.ndarray) -> None:
+        frame = np.ascontiguousarray(raw, dtype=np.uint16).reshape(DEPTH_SHAPE)
+        if self.path.suffix == ".npy":
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "wb")
+                self._write_npy_header(0)
+                self._header_len = self._file.tell()
+            self._file.write(frame.tobytes())
+        else:
+            self._chunk.append(frame.copy())
+            if len(self._chunk) >= self.chunk_frames:
+                self._flush_chunk()
+        self.count += 1
+
+    def _write_npy_header(self, n: int) -> None:
+        # numpy pads the header so the first axis can grow in place
+        np.lib.format.write_array_header_1_0(self._file, {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(np.uint16)),
+            "fortran_order": False,
+            "shape": (n, *DEPTH_SHAPE),
+        })
+
+    def _flush_chunk(self) -> None:
+        if not self._chunk:
+            return
+        if self._zip is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._zip = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        with self._zip.open(f"chunk_{self._n_chunks:05d}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.stack(self._chunk))
+        self._n_chunks += 1
+        self._chunk = []
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.seek(0)
+            self._write_npy_header(self.count)
+            if self._file.tell() != self._header_len:
+                raise RuntimeError("npy header size changed, recording is corrupt")
+            self._file.close()
+            self._file = None
+        self._flush_chunk()
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+
+class DepthRecorder(DepthSource):
+    """
+    Wraps another source and records every raw frame it delivers, so a
+    live session can be replayed later with `RecordedDepthSource`.
+    """
+
+    def __init__(self, source: DepthSource, path, chunk_frames: int = 300):
+        super().__init__(source.config, source.blur_ksize, source.logger)
+        self.source = source
+        self.writer = DepthWriter(path, chunk_frames=chunk_frames)
+
+    def open(self) -> None:
+        self.source.open()
+        self.logger.info("Recording depth frames to %s", self.writer.path)
+
+    def close(self) -> None:
+        try:
+            self.source.close()
+        finally:
+            self.writer.close()
+            self.logger.info("Recorded %d depth frames to %s",
+                             self.writer.count, self.writer.path)
+
+    @property
+    def realtime(self) -> bool:
+        return self.source.realtime
+
+    def has_new_depth_frame(self) -> bool:
+        return self.source.has_new_depth_frame()
+
+    def wait_new_depth_frame(self, timeout: float) -> bool:
+        return self.source.wait_new_depth_frame(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.source.finished
+
+    def _get_raw_depth(self) -> np.ndarray:
+        raw = self.source._get_raw_depth()
+        self.writer.append(raw)
+        return raw
+
+
+# ─── Playback ───
+
+def _iter_npz_chunks(path: Path) -> Iterator[np.ndarray]:
+    """Loads the chunks of a recording one at a time, in order."""
+    with np.load(path) as archive:
+        for name in sorted(archive.files):
+            if name.startswith("chunk_"):
+                yield archive[name]
+
+
+class RecordedDepthSource(DepthSource):
+    """
+    Plays back a recorded depth sequence with the `KinectInterface` surface.
+
+    Args:
+        path: `.npy` (memory-mapped) or chunked `.npz` recording.
+        speed: playback speed relative to `fps` (1.0 = real time, 2.0 =
+            twice as fast), or None to deliver every frame as fast as the
+            consumer reads them.
+        fps: native frame rate of the recording (Kinect v2: 30).
+        loop: restart from the first frame at the end instead of finishing.
+
+    When paced, the source behaves like the sensor: frames that became due
+    while the consumer was busy are skipped (counted in `frames_skipped`)
+    and only the latest one is delivered. With `speed=None` no frame is
+    skipped, so two runs on the same recording see the same frames.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        path,
+        speed: Optional[float] = 1.0,
+        fps: float = DEPTH_FPS,
+        loop: bool = False,
+        blur_ksize: int = 5,
+        logger=None,
+    ):
+        super().__init__(config, blur_ksize, logger)
+        if path is None or Path(path).suffix not in (".npy", ".npz"):
+            raise ValueError(f"Unsupported recording: {path}")
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be > 0 (or None for max speed)")
+        self.path = Path(path)
+        self.speed = speed
+        self.fps = fps
+        self.loop = loop
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self._frames = None           # npy memmap (N, 424, 512)
+        self._chunks = None           # npz chunk iterator
+        self._chunk = None
+        self._chunk_start = 0         # index of self._chunk[0] in the sequence
+        self._length: Optional[int] = None
+        self._next = 0                # index of the next frame to deliver
+        self._start = 0.0
+        self._finished = False
+
+    def open(self) -> None:
+        if self.path.suffix == ".npy":
+            self._frames = np.load(self.path, mmap_mode="r")
+            if self._frames.ndim != 3 or self._frames.shape[1:] != DEPTH_SHAPE:
+                raise ValueError(f"{self.path}: expected (N, 424, 512), got {self._frames.shape}")
+            self._length = len(self._frames)
+        else:
+            self._rewind_chunks()
+        self._next = 0
+        self._finished = False
+        self._start = time.perf_counter()
+        self.logger.info(
+            "Replaying %s at %s.", self.path,
+            "max speed" if self.speed is None else f"x{self.speed:g} ({self.fps:g} fps)"
+        )
+
+    def close(self) -> None:
+        self._frames = None
+        self._chunks = None
+        self._chunk = None
+        self.logger.info("Replay closed after %d frames (%d skipped).",
+                         self.frames_read, self.frames_skipped)
+
+    def _rewind_chunks(self) -> None:
+        self._chunks = _iter_npz_chunks(self.path)
+        self._chunk = None
+        self._chunk_start = 0
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    @property
+    def realtime(self) -> bool:
+        return self.speed is not None
+
+    def wait_new_depth_frame(self, timeout: float) -> bool:
+        # paced: sleep until the next frame is due rather than polling
+        if self.speed is not None and not self._finished:
+            due_at = self._start + self._next / (self.fps * self.speed)
+            time.sleep(max(0.0, min(timeout, due_at - time.perf_counter())))
+        return self.has_new_depth_frame()
+
+    def _due_index(self) -> int:
+        """Index of the frame the sensor would be showing right now."""
+        if self.speed is None:
+            return self._next
+        elapsed = time.perf_counter() - self._start
+        return int(elapsed * self.fps * self.speed)
+
+    def has_new_depth_frame(self) -> bool:
+        if self._finished or self._due_index() < self._next:
+            return False
+        if self._frame_at(self._next) is None and not (self.loop and self._length):
+            self._finished = True
+            return False
+        return True
+
+    def _frame_at(self, index: int) -> Optional[np.ndarray]:
+        """Frame `index` of the sequence, or None past the end."""
+        if self._frames is not None:
+            return self._frames[index] if index < self._length else None
+        # chunks only move forward
+        while self._chunk is None or index >= self._chunk_start + len(self._chunk):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                # keep the last chunk: its last frame may still be asked for
+                self._length = self._chunk_start + (len(self._chunk) if self._chunk is not None else 0)
+                return None
+            if self._chunk is not None:
+                self._chunk_start += len(self._chunk)
+            self._chunk = chunk
+        return self._chunk[index - self._chunk_start]
+
+    def _get_raw_depth(self) -> np.ndarray:
+        if not self.has_new_depth_frame():
+            raise RuntimeError("No new depth frame available.")
+        index = max(self._next, self._due_index())
+        frame = self._frame_at(index)
+        if frame is None and self._next >= self._length:
+            # loop: restart the clock so the first frame is due now
+            if self._chunks is not None:
+                self._rewind_chunks()
+            self._next = 0
+            self._start = time.perf_counter()
+            index = 0
+            frame = self._frame_at(0)
+        elif frame is None:
+            # the sensor clock ran past the end: deliver the last frame
+            index = self._length - 1
+            frame = self._frame_at(index)
+        self.frames_skipped += index - self._next
+        self.frames_read += 1
+        self._next = index + 1
+        return frame
+
+
+def main():
+    """
+    Records a live Kinect session:
+        python frame_source.py sequence.npz [--frames 900]
+    """
+    import argparse
+    from kinect_interface import KinectInterface
+
+    parser = argparse.ArgumentParser(description="Record raw Kinect depth frames.")
+    parser.add_argument("path", help="output file (.npy or .npz)")
+    parser.add_argument("--frames", type=int, default=900,
+                        help="number of frames to record (default: 30 s)")
+    parser.add_argument("--chunk", type=int, default=300, help="frames per .npz chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    recorder = DepthRecorder(KinectInterface(Config()), args.path, chunk_frames=args.chunk)
+    recorder.open()
+    try:
+        while recorder.writer.count < args.frames:
+            if not recorder.has_new_depth_frame():
+                time.sleep(0.005)
+                continue
+            recorder._get_raw_depth()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
-import cv2
 from typing import Optional
 from channel_selector import ChannelSelector
+from visualizer import NullVisualizer
 
 
 class KeyboardChannelSelector(ChannelSelector):
     """
     Sélectionne le canal via les touches '1','2','3','4' du pavé numérique.
+    Les touches sont lues par le thread du visualizer (fenêtres OpenCV) :
+    en mode headless, aucune touche n'arrive.
     """
 
+    def __init__(self, visualizer=None):
+        self.visualizer = visualizer or NullVisualizer()
+
     VALID_KEYS = {
         ord('1'): '1',
         ord('2'): '2',
@@ -16,5 +21,10 @@ class KeyboardChannelSelector(ChannelSelector):
     }
 
     async def get_next_channel(self) -> Optional[str]:
-        key = cv2.waitKey(1) & 0xFF
-        return self.VALID_KEYS.get(key)
\ No newline at end of file
+        key = self.visualizer.poll_key()
+        while key != -1:
+            tool = self.VALID_KEYS.get(key)
+            if tool is not None:
+                return tool
+            key = self.visualizer.poll_key()
+        return None
\ No newline at end of file
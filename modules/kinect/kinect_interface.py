@@ -1,11 +1,12 @@
-import cv2
+import time
+from typing import Optional
+
 import numpy as np
-from dependencies.pykinect2 import PyKinectRuntime, PyKinectV2
 from config import Config
-import logging
+from frame_source import DEPTH_SHAPE, DepthSource
 
 
-class KinectInterface:
+class KinectInterface(DepthSource):
     """
     Interface to the Kinect sensor for depth frame acquisition.
 
@@ -13,13 +14,19 @@ class KinectInterface:
     - Initialize and close the Kinect runtime.
     - Fetch raw depth frames and apply preprocessing (median blur).
     - Crop to configured ROI and flip horizontally.
+
+    PyKinect2 (Windows only) is imported on `open()`, so the rest of the
+    pipeline can run elsewhere on a `RecordedDepthSource`.
+
+    `get_depth_frame` reads the runtime's frame buffer in place (through
+    a numpy view, under the runtime's lock) instead of the copy made by
+    `PyKinectRuntime.get_last_depth_frame`.
     """
 
     def __init__(self, config: Config, blur_ksize: int = 5, logger=None):
-        self.config = config
-        self.blur_ksize = blur_ksize
+        super().__init__(config, blur_ksize, logger)
         self._kinect = None
-        self.logger = logger or logging.getLogger(__name__)
+        self._depth_view: Optional[np.ndarray] = None
 
     def open(self) -> None:
         """
@@ -27,9 +34,15 @@ class KinectInterface:
         Raises an exception on failure.
         """
         try:
+            from dependencies.pykinect2 import PyKinectRuntime, PyKinectV2
             self._kinect = PyKinectRuntime.PyKinectRuntime(
                 PyKinectV2.FrameSourceTypes_Depth
             )
+            # (424, 512) view of the buffer the runtime copies each frame into
+            self._depth_view = np.ctypeslib.as_array(
+                self._kinect._depth_frame_data,
+                shape=(self._kinect._depth_frame_data_capacity.value,),
+            ).reshape(DEPTH_SHAPE)
             self.logger.info("Kinect sensor initialized.")
         except Exception as e:
             self.logger.error("Failed to initialize Kinect: %s", e)
@@ -47,6 +60,7 @@ class KinectInterface:
                 self.logger.warning("Error closing Kinect: %s", e)
             finally:
                 self._kinect = None
+                self._depth_view = None
 
     def _get_raw_depth(self) -> np.ndarray:
         """
@@ -59,7 +73,7 @@ class KinectInterface:
             raise RuntimeError("No new depth frame available.")
         frame = self._kinect.get_last_depth_frame()
         # Kinect depth frames come as a flat array of uint16
-        depth = frame.reshape((424, 512))
+        depth = frame.reshape(DEPTH_SHAPE)
         return depth
 
     def has_new_depth_frame(self) -> bool:
@@ -70,24 +84,16 @@ class KinectInterface:
         """
         return self._kinect.has_new_depth_frame()
 
-    def get_depth_frame(self) -> np.ndarray:
+    def get_depth_frame(self, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
-        Get a preprocessed depth frame:
-        - median blur
-        - crop to ROI
-        - horizontal flip
-
-        Returns:
-            np.ndarray of shape (roi_height, roi_width) with dtype uint16
+        Preprocess the latest frame straight from the runtime buffer.
+        The lock keeps the runtime from writing the next frame meanwhile;
+        it is held for the ROI blur and flip only.
         """
-        raw = self._get_raw_depth().astype(np.uint16)
-        blurred = cv2.medianBlur(raw, self.blur_ksize)
-
-        # Crop to ROI
-        y0, x0 = self.config.roi_y0, self.config.roi_x0
-        h, w = self.config.roi_height, self.config.roi_width
-        cropped = blurred[y0 : y0 + h, x0 : x0 + w]
-
-        # Flip horizontally for mirror view
-        flipped = cv2.flip(cropped, 1)
-        return flipped
+        if not self._kinect:
+            raise RuntimeError("No Kinect connected.")
+        with self._kinect._depth_frame_lock:
+            frame = self.preprocess(self._depth_view, out)
+            # what get_last_depth_frame does: marks the frame as read
+            self._kinect._last_depth_frame_access = time.perf_counter()
+        return frame
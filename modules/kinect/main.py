@@ -1,6 +1,7 @@
+import argparse
 import asyncio
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 import uuid
 import cv2
 import numpy as np
@@ -27,16 +28,20 @@ from channel4_detector import Channel4Detector
 from cluster_tracker import ClusterTracker
 from config import Config
 from depth_processor import DepthProcessor
+from frame_grabber import FrameGrabber
+from frame_source import DepthRecorder, DepthSource, RecordedDepthSource
 from keyboard_selector import KeyboardChannelSelector
 from kinect_interface import KinectInterface
 from object_detector import ObjectDetector
 from payload_sender import PayloadSender
 from roi_calibrator import RoiCalibrator
 from shape_classifier import ShapeClassifier
+from stage_timer import NullStageTimer, StageTimer
 from stroke_confirm_tracker import StrokeConfirmTracker
 from stroke_lifetimer import StrokeLifeTimer
 from stroke_tracker import StrokeTracker
 from template_manager import TemplateManager
+from visualizer import NullVisualizer, Visualizer
 
 logger = logging.getLogger(__name__)
 
@@ -70,8 +75,9 @@ class MainController:
     def __init__(
         self,
         raw_config: dict,
-        channel_selector: ChannelSelector = KeyboardChannelSelector(),
+        channel_selector: Optional[ChannelSelector] = None,
         client: ArtineoClient = None,
+        source: Optional[DepthSource] = None,
     ):
         logger.info("Initializing MainController...")
 
@@ -81,8 +87,17 @@ class MainController:
         # 2. ArtineoClient (pour envoyer les events au serveur)
         self.client = client
 
-        # 3. Initialisation Kinect et BaselineCalculator (phase dessin)
-        self.kinect = KinectInterface(self.config, logger=logger)
+        # Fenêtres OpenCV : rendues par le thread du visualizer, à fréquence
+        # plafonnée ; aucune en headless. Les vues de debug (outils, canal 4)
+        # seulement avec debug_mode.
+        self.visualizer = (
+            NullVisualizer() if self.config.headless
+            else Visualizer(max_fps=self.config.display_fps, logger=logger)
+        )
+        self.debug_visualizer = self.visualizer if self.config.debug_mode else NullVisualizer()
+
+        # 3. Source des frames (Kinect, ou enregistrement rejoué) et BaselineCalculator (phase dessin)
+        self.kinect = source if source is not None else KinectInterface(self.config, logger=logger)
         self.baseline_calc = BaselineCalculator(self.config, logger=logger)
 
         # 4. Charger les templates relatifs via TemplateManager
@@ -117,12 +132,14 @@ class MainController:
         self.depth_processor = DepthProcessor(
             self.config,
             mask_threshold=2,
-            morph_kernel=3
+            morph_kernel=3,
+            visualizer=self.visualizer
         )
         self.depth_processor_4 = DepthProcessor(
             self.config,
             mask_threshold=1,
-            morph_kernel=3
+            morph_kernel=3,
+            visualizer=self.visualizer
         )
 
         # 8. Channel4Detector (ne fait que détecter)
@@ -132,14 +149,18 @@ class MainController:
             cluster_tracker=self.cluster_tracker,
             object_detector=self.object_detector,
             small_area_threshold=self.config.small_area_threshold,
-            display=self.config.debug_mode
+            visualizer=self.debug_visualizer
         )
         self.bg_tracker = BackgroundTracker()
 
         # 9. Gestion des outils 1–3 (brush, strokes, etc.)
         self.current_tool: str = '1'
         self.tool_channel = {'1': 0, '2': 1, '3': 2, '4': 3}
-        self.channel_selector: ChannelSelector = channel_selector
+        self.channel_selector: ChannelSelector = (
+            channel_selector or KeyboardChannelSelector(self.visualizer)
+        )
+        if self.config.headless and isinstance(self.channel_selector, KeyboardChannelSelector):
+            logger.warning("Headless: pas de fenêtre, donc pas de touches 1–4 ; l'outil reste '1'.")
 
         self.stroke_tracker = StrokeTracker(proximity_threshold=5.0)
         self.stroke_lifetimers = {
@@ -163,6 +184,7 @@ class MainController:
         self.brush_detector = BrushStrokeDetector(
             brush=brush_img,
             config=self.config,
+            visualizer=self.debug_visualizer,
         )
 
         # 10. WS payload sender
@@ -176,8 +198,13 @@ class MainController:
             for t in self.tool_channel
         }
 
-        # 12. ROI calibrator
-        self.roi_calibrator = RoiCalibrator(self.kinect, scale=1)
+        # 12. ROI calibrator (ouvre sa fenêtre : créé seulement si demandé)
+        if self.config.calibrate_roi and self.config.headless:
+            logger.warning("calibrate_roi ignoré en mode headless.")
+        self.roi_calibrator = (
+            RoiCalibrator(self.kinect, scale=1)
+            if self.config.calibrate_roi and not self.config.headless else None
+        )
 
         # 13. BaselineManager (initialisée avec une baseline factice)
         dummy_baseline = np.zeros(
@@ -218,11 +245,30 @@ class MainController:
         self.OBJ_FRAMES_TO_ADD   = 10
         self.OBJ_FRAMES_TO_REMOVE= 10
 
+        # 14. Chronométrage par étape de la boucle (no-op si désactivé)
+        self.timer = (
+            StageTimer(window=self.config.timing_window, interval=self.config.timing_interval)
+            if self.config.stage_timing else NullStageTimer()
+        )
+
+        # 15. Thread d'acquisition : dernière frame prétraitée, sans copie
+        self.grabber = FrameGrabber(self.kinect, window=self.config.timing_window, logger=logger)
+
         logger.info("MainController initialized.")
 
     async def run(self) -> None:
+        timer = self.timer
+
         # --- 1) Démarrage Kinect & WebSocket ---
         self.kinect.open()
+
+        # Calibration ROI si demandé (lit la Kinect elle-même : avant le thread)
+        if self.roi_calibrator is not None:
+            rx, ry = self.roi_calibrator.run()
+            logger.info(f"ROI calibrated → x={rx}, y={ry}")
+
+        self.grabber.start()
+        self.visualizer.start()
         if not self.config.bypass_ws:
             self.payload_sender.start()
 
@@ -278,24 +324,28 @@ class MainController:
                             remove_objects=[]
                         )
 
-                # --- 3) Lecture d’une frame Kinect ---
-                if not self.kinect.has_new_depth_frame():
-                    await asyncio.sleep(0.01)
+                # --- 3) Attente de la frame suivante (thread d'acquisition) ---
+                # timeout : le changement d'outil reste lu sans frame
+                depth = await self.grabber.next_frame(timeout=0.1)
+                if depth is None:
+                    if self.grabber.finished:
+                        logger.info("Depth source finished.")
+                        break
                     continue
-                frame = self.kinect.get_depth_frame()
+                # valide jusqu'au prochain next_frame() : ne pas la garder
+                frame = depth.data
+                timer.start_frame()
 
-                # --- 4) Calibration ROI si demandé ---
-                if self.config.calibrate_roi:
-                    rx, ry = self.roi_calibrator.run()
-                    logger.info(f"ROI calibrated → x={rx}, y={ry}")
-                    self.config.calibrate_roi = False
+                # --- 4) (calibration ROI faite au démarrage, avant l'acquisition) ---
 
                 # --- 5) Affichage brut (debug) si activé ---
-                if self.config.debug_mode:
+                if self.visualizer.quit_requested:
+                    logger.info("'q' pressed, stopping.")
+                    break
+                if self.debug_visualizer.wants("Depth (debug)"):
                     disp_dbg = cv2.convertScaleAbs(frame, alpha=255.0 / (frame.max() or 1))
-                    cv2.imshow("Depth (debug)", disp_dbg)
-                    if cv2.waitKey(1) == ord('q'):
-                        break
+                    self.debug_visualizer.show("Depth (debug)", disp_dbg, copy=False)
+                    timer.mark("display")
 
                 # --- 6) OUTILS 1–3 (pinceaux) ---
                 if self.current_tool in ('1', '2', '3'):
@@ -306,7 +356,9 @@ class MainController:
                     except RuntimeError:
                         continue
 
+                    timer.mark("baseline")
                     result = self.depth_processor.process(frame, baseline_dessin)
+                    timer.mark("depth")
                     ch = self.tool_channel[self.current_tool]
                     diff = (result.mapped.astype(int) - 128).clip(min=0).astype(float)
                     mask = diff > self.config.stroke_intensity_thresh
@@ -314,8 +366,10 @@ class MainController:
                     buf[mask] = (1 - self.config.alpha) * buf[mask] + self.config.alpha * diff[mask]
                     buf[~mask] *= (1 - 0.15)
                     composite = cv2.convertScaleAbs(self.final_drawings[self.current_tool])
+                    timer.mark("accumulate")
 
                     raw = self.brush_detector.detect(composite, self.current_tool)
+                    timer.mark("brush_detect")
                     existing = list(self.strokes_by_tool[self.current_tool].values())
                     unique = self.stroke_tracker.update(raw, existing)
                     confirmed = self.stroke_confirm.update(unique)
@@ -350,6 +404,7 @@ class MainController:
                         removed_strokes.append(sid)
                     if len(removed_strokes) > 0:
                         logger.info(str(len(removed_strokes)) + " strokes removed.")
+                    timer.mark("tracking")
 
                 # --- 7) OUTIL 4 (canal fond + objets) ---
                 else:
@@ -360,12 +415,14 @@ class MainController:
                         except RuntimeError:
                             # si ensure_baseline_ready échoue, on attend la frame suivante
                             continue
+                    timer.mark("baseline")
 
                     # 7.b) Détection des fonds (par rapport à la baseline_sand)
                     bg_events, obj_events_unused, _cnts_unused = self.channel4_detector.detect(
                         frame,
                         self.baseline_sand
                     )
+                    timer.mark("channel4_detect")
                     logger.debug(f"[run] bg_events reçus : {bg_events}")
 
                     # 7.c) Traitement des événements “fond” en utilisant BackgroundTracker
@@ -375,6 +432,7 @@ class MainController:
                         new_backgrounds.append(ev)
                     for rid in _rem_bgs:
                         removed_backgrounds.append(rid)
+                    timer.mark("backgrounds")
 
                     # 7.d) Si on a maintenant un fond confirmé, on fait la détection d’objets sur baseline_objects
                     if self.active_background is not None:
@@ -384,6 +442,7 @@ class MainController:
                             new_objects.append(ev)
                         for oid in _rem_objs:
                             removed_objects.append(oid)
+                        timer.mark("objects")
 
                     # 7.e) Après avoir confirmé ou retiré, on peut vider skip_removal_ids si besoin
                     #      (vous pouvez adapter cette logique pour ne pas vider immédiatement
@@ -405,25 +464,28 @@ class MainController:
                         new_objects=new_objects,
                         remove_objects=removed_objects,
                     )
-                    
-                if self.baseline_sand is not None:
+                timer.mark("send")
+
+                # Conversions faites seulement quand le visualizer prend l'image
+                if self.baseline_sand is not None and self.visualizer.wants("Baseline Sand (sable)"):
                     # On normalise la baseline_sand (uint16) en 8 bits pour affichage
                     sand_norm = cv2.convertScaleAbs(
                         self.baseline_sand,
                         alpha=255.0 / (self.baseline_sand.max() or 1)
                     )
-                    cv2.imshow("Baseline Sand (sable)", sand_norm)
+                    self.visualizer.show("Baseline Sand (sable)", sand_norm, copy=False)
 
-                if self.baseline_objects is not None:
+                if self.baseline_objects is not None and self.visualizer.wants("Baseline Objects (sable+fond+objets)"):
                     # Même traitement pour sable+fond+objets
                     obj_norm = cv2.convertScaleAbs(
                         self.baseline_objects,
                         alpha=255.0 / (self.baseline_objects.max() or 1)
                     )
-                    cv2.imshow("Baseline Objects (sable+fond+objets)", obj_norm)
-
-                # pour que les fenêtres se mettent à jour
-                cv2.waitKey(1)
+                    self.visualizer.show("Baseline Objects (sable+fond+objets)", obj_norm, copy=False)
+                timer.mark("display")
+                timer.end_frame()
+                if timer.due():
+                    self._report_timing()
 
                 # --- 9) Petite pause non bloquante pour la boucle asyncio ---
                 await asyncio.sleep(0)
@@ -432,7 +494,10 @@ class MainController:
             logger.info("Main loop cancelled, shutting down.")
         finally:
             # --- Cleanup final ---
+            self.grabber.stop()
             self.kinect.close()
+            if timer.enabled and timer.frames:
+                self._report_timing()
 
             if not self.config.bypass_ws:
                 all_stroke_ids = []
@@ -458,11 +523,18 @@ class MainController:
                 )
                 await self.payload_sender.stop()
 
-            if self.config.debug_mode:
-                cv2.destroyAllWindows()
+            # ferme les fenêtres (dans son thread)
+            self.visualizer.stop()
             logger.info("Shutdown complete.")
 
-    
+    def _report_timing(self) -> None:
+        """Log (et télémétrie éventuelle) des temps par étape de la boucle."""
+        report = self.timer.report()
+        report["acquisition"] = self.grabber.stats()
+        logger.info("Timing: %s", StageTimer.format(report))
+        if self.config.timing_telemetry and not self.config.bypass_ws:
+            self.payload_sender.send_telemetry(report)
+
     def _blit_zone_on_baseline(
         self,
         baseline: np.ndarray,
@@ -943,8 +1015,27 @@ class MainController:
         logger.info("Baseline sand (sable) initialisée pour canal 4.")
 
     
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0 (or max)")
+    return speed
+
+
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description="Artineo Kinect module")
+    parser.add_argument("--replay", help="rejouer un enregistrement (.npy / .npz) au lieu de la Kinect")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="vitesse du rejeu : 1 = 30 fps, 2 = deux fois plus vite, max")
+    parser.add_argument("--loop", action="store_true", help="rejouer en boucle")
+    parser.add_argument("--record", help="enregistrer les frames brutes (.npy / .npz)")
+    parser.add_argument("--headless", action="store_true",
+                        help="aucune fenêtre OpenCV (équivaut à headless=true dans la config)")
+    args = parser.parse_args()
+
     logger.setLevel(logging.DEBUG)
     handler = logging.StreamHandler()
     handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
@@ -953,12 +1044,24 @@ if __name__ == '__main__':
     logger.info("Starting Artineo Kinect module...")
 
     # Fetch config from remote
-    client = ArtineoClient(module_id=4, host="artineo.local", port=8000)
+    client = ArtineoClient(module_id=4, host="artineo.local", port=8000, acks="none")
     raw_conf = client.fetch_config()
+    if args.headless:
+        raw_conf = {**(raw_conf or {}), "headless": True}
+
+    config = Config(**(raw_conf or {}))
+    if args.replay:
+        source = RecordedDepthSource(config, args.replay, speed=args.speed,
+                                     loop=args.loop, logger=logger)
+    else:
+        source = KinectInterface(config, logger=logger)
+    if args.record:
+        source = DepthRecorder(source, args.record)
 
     controller = MainController(
         raw_config=raw_conf,
         client=client,
+        source=source,
     )
 
     try:
@@ -1,7 +1,6 @@
 # backend/payload_sender.py
 import logging
 from typing import Any, Dict, List, Optional
-import json
 import asyncio
 from pathlib import Path
 import sys
@@ -83,11 +82,26 @@ class PayloadSender:
             "data": data
         }
 
-        msg = json.dumps(payload, ensure_ascii=False)
+        # sérialisé à l'envoi avec le codec négocié (JSON ou msgpack)
         # on protège l'enqueue si plusieurs coroutines appellent en même temps
         async with self._lock:
             try:
-                self.client.send_ws(msg)
+                self.client.send_message(payload)
                 # self.logger.debug("Enqueued WS message: %s", payload)
             except Exception as e:
                 self.logger.error("Failed to enqueue WS message: %s", e)
+
+    def send_telemetry(self, report: Dict[str, Any]) -> None:
+        """
+        Envoie un rapport de temps par étape (action `telemetry`) ;
+        le serveur garde le dernier par module (GET /telemetry).
+        """
+        payload = {
+            "module": self.client.module_id,
+            "action": ArtineoAction.TELEMETRY,
+            "data": report
+        }
+        try:
+            self.client.send_message(payload)
+        except Exception as e:
+            self.logger.error("Failed to enqueue telemetry: %s", e)
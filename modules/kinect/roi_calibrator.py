@@ -2,8 +2,7 @@ import cv2
 import numpy as np
 import time
 import sys
-from kinect_interface import KinectInterface
-from dependencies.pykinect2 import PyKinectRuntime, PyKinectV2
+from frame_source import DepthSource
 
 class RoiCalibrator:
     """
@@ -11,7 +10,7 @@ class RoiCalibrator:
     montre la position du curseur. Appuyez sur [espace] pour valider,
     [q] pour quitter.
     """
-    def __init__(self, kinect_interface: KinectInterface, scale: int = 2):
+    def __init__(self, kinect_interface: DepthSource, scale: int = 2):
         self.kinect = kinect_interface
         self.scale = scale
         self.selected = (0, 0)
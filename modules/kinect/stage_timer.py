@@ -0,0 +1,134 @@
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+# Kinect v2 frame period
+FRAME_BUDGET_MS = 1000.0 / 30.0
+
+
+def percentiles(samples: Iterable[float], qs=(50, 95, 99)) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles (ms, rounded) plus max, None when empty."""
+    values = sorted(samples)
+    if not values:
+        return {**{f"p{q}": None for q in qs}, "max": None}
+    out = {}
+    for q in qs:
+        rank = max(0, math.ceil(q / 100 * len(values)) - 1)
+        out[f"p{q}"] = round(values[rank], 3)
+    out["max"] = round(values[-1], 3)
+    return out
+
+
+class StageTimer:
+    """
+    Per-stage timing of the main loop.
+
+    Usage, once per processed frame:
+        timer.start_frame()
+        ...acquisition...
+        timer.mark("acquire")
+        ...processing...
+        timer.mark("depth")
+        timer.end_frame()
+
+    `mark(stage)` charges the time elapsed since the previous mark (or
+    `start_frame`) to `stage`; a stage marked twice in a frame is summed.
+    The last `window` frames are kept per stage for rolling percentiles.
+
+    A frame longer than the budget (33 ms at 30 fps) is counted as late.
+    Frames the loop never saw are counted by the acquisition side
+    (`FrameGrabber.skipped`) and added to the report by the caller.
+    """
+
+    enabled = True
+
+    def __init__(self, window: int = 300, budget_ms: float = FRAME_BUDGET_MS,
+                 interval: float = 5.0):
+        self.window = window
+        self.budget_ms = budget_ms
+        self.interval = interval
+        self.frames = 0
+        self.late = 0
+        self._totals: Deque[float] = deque(maxlen=window)
+        self._stages: Dict[str, Deque[float]] = {}
+        self._current: Dict[str, float] = {}
+        self._frame_start = 0.0
+        self._last = 0.0
+        self._last_report = time.perf_counter()
+
+    def start_frame(self) -> None:
+        self._current.clear()
+        self._frame_start = self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self._current[stage] = self._current.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self) -> None:
+        total_ms = (time.perf_counter() - self._frame_start) * 1000
+        self._totals.append(total_ms)
+        for stage, elapsed in self._current.items():
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = deque(maxlen=self.window)
+            samples.append(elapsed * 1000)
+        self.frames += 1
+        if total_ms > self.budget_ms:
+            self.late += 1
+
+    def due(self) -> bool:
+        """True every `interval` seconds (0: never)."""
+        if self.interval <= 0:
+            return False
+        now = time.perf_counter()
+        if now - self._last_report < self.interval:
+            return False
+        self._last_report = now
+        return True
+
+    def report(self) -> dict:
+        """Counters since start, percentiles (ms) over the rolling window."""
+        return {
+            "frames": self.frames,
+            "late": self.late,
+            "budget_ms": round(self.budget_ms, 3),
+            "total_ms": percentiles(self._totals),
+            "stages_ms": {name: percentiles(s) for name, s in self._stages.items()},
+        }
+
+    @staticmethod
+    def format(report: dict) -> str:
+        total = report["total_ms"]
+        stages = ", ".join(
+            f"{name} {p['p50']}/{p['p95']}" for name, p in report["stages_ms"].items()
+        )
+        line = (
+            f"frame p50/p95/p99 {total['p50']}/{total['p95']}/{total['p99']} ms "
+            f"(budget {report['budget_ms']}), late {report['late']}/{report['frames']}"
+        )
+        acquisition = report.get("acquisition")
+        if acquisition:
+            line += (f", skipped {acquisition['skipped']}, "
+                     f"age p50/p95 {acquisition['age_ms']['p50']}/{acquisition['age_ms']['p95']} ms")
+        return f"{line} | stages p50/p95 ms: {stages}"
+
+
+class NullStageTimer:
+    """Timing disabled: same interface, does nothing."""
+
+    enabled = False
+    frames = late = 0
+
+    def start_frame(self) -> None:
+        pass
+
+    def mark(self, stage: str) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
+
+    def due(self) -> bool:
+        return False
@@ -0,0 +1,10 @@
+# modules/kinect/tests/conftest.py
+"""
+The Kinect modules import each other flat (`from config import Config`),
+as when main.py is run from modules/kinect.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,123 @@
+# modules/kinect/tests/test_frame_grabber.py
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from config import Config
+from frame_grabber import FrameGrabber, LatestFrameSlot
+from frame_source import DEPTH_SHAPE, DepthWriter, RecordedDepthSource
+
+
+def publish(slot: LatestFrameSlot, value: int) -> None:
+    """What the capture thread does: fill the back buffer, then publish."""
+    slot.back.fill(value)
+    slot.publish(time.perf_counter())
+
+
+def test_take_before_any_frame_is_none():
+    assert LatestFrameSlot((2, 2)).take() is None
+
+
+def test_taken_frame_survives_later_publishes():
+    slot = LatestFrameSlot((2, 2))
+    publish(slot, 1)
+    frame = slot.take()
+    assert frame.seq == 1 and (frame.data == 1).all()
+    for value in (2, 3, 4):
+        publish(slot, value)
+    # the writer never touches the buffer the consumer holds
+    assert (frame.data == 1).all()
+    newer = slot.take()
+    assert newer.seq == 4 and (newer.data == 4).all()
+    assert newer.data is not frame.data
+    assert slot.take() is None
+
+
+def test_lossy_slot_keeps_only_the_latest_frame():
+    slot = LatestFrameSlot((2, 2))
+    for value in range(1, 6):
+        publish(slot, value)
+    frame = slot.take()
+    assert frame.seq == 5 and (frame.data == 5).all()
+
+
+def test_lossless_publish_waits_for_the_frame_to_be_taken():
+    slot = LatestFrameSlot((2, 2), lossless=True)
+    publish(slot, 1)
+    second = threading.Thread(target=publish, args=(slot, 2))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()            # frame 1 not taken yet
+    assert slot.take().seq == 1
+    second.join(1.0)
+    assert not second.is_alive()
+    assert (slot.take().data == 2).all()
+
+
+def test_wait_wakes_on_a_publish_from_another_thread():
+    async def scenario():
+        slot = LatestFrameSlot((2, 2))
+        slot.attach(asyncio.get_running_loop())
+        assert await slot.wait(0.01) is None
+        threading.Timer(0.05, publish, args=(slot, 7)).start()
+        frame = await slot.wait(2.0)
+        assert frame is not None and (frame.data == 7).all()
+        slot.close()
+        assert await slot.wait(2.0) is None
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def record(path, n: int) -> None:
+    writer = DepthWriter(path)
+    for i in range(n):
+        writer.append(np.full(DEPTH_SHAPE, 1000 + i, dtype=np.uint16))
+    writer.close()
+
+
+def test_grabber_delivers_a_max_speed_replay_losslessly(tmp_path):
+    path = tmp_path / "seq.npy"
+    record(path, 12)
+    source = RecordedDepthSource(Config(), path, speed=None)
+
+    async def scenario():
+        source.open()
+        grabber = FrameGrabber(source)
+        grabber.start()
+        seen = []
+        while not grabber.finished:
+            frame = await grabber.next_frame(1.0)
+            if frame is not None:
+                seen.append(int(frame.data[0, 0]))
+                await asyncio.sleep(0.001)      # slow consumer
+        grabber.stop()
+        return grabber, seen
+
+    grabber, seen = asyncio.run(asyncio.wait_for(scenario(), 10))
+    # constant frames: blur and flip keep the value
+    assert seen == [1000 + i for i in range(12)]
+    stats = grabber.stats()
+    assert stats["captured"] == stats["delivered"] == 12
+    assert stats["skipped"] == 0 and stats["errors"] == 0
+    assert stats["age_ms"]["p50"] is not None
+
+
+def test_grabber_counts_frames_the_loop_missed(tmp_path):
+    path = tmp_path / "seq.npy"
+    record(path, 1)
+    # realtime source: the slot is lossy; frames published by hand
+    grabber = FrameGrabber(RecordedDepthSource(Config(), path, speed=1.0))
+
+    async def scenario():
+        grabber.slot.attach(asyncio.get_running_loop())
+        for value in (1, 2, 3):
+            publish(grabber.slot, value)
+        first = await grabber.next_frame(0.1)
+        publish(grabber.slot, 4)
+        second = await grabber.next_frame(0.1)
+        return first.seq, second.seq
+
+    assert asyncio.run(scenario()) == (3, 4)
+    assert grabber.skipped == 2 and grabber.delivered == 2
@@ -0,0 +1,136 @@
+# modules/kinect/tests/test_frame_source.py
+
+import numpy as np
+import pytest
+
+import frame_source
+from config import Config
+from frame_source import (
+    DEPTH_SHAPE, DepthRecorder, DepthSource, DepthWriter, RecordedDepthSource
+)
+
+
+def frame(i: int) -> np.ndarray:
+    return np.full(DEPTH_SHAPE, i, dtype=np.uint16)
+
+
+def record(path, n: int, chunk_frames: int = 300):
+    writer = DepthWriter(path, chunk_frames=chunk_frames)
+    for i in range(n):
+        writer.append(frame(i))
+    writer.close()
+
+
+def read_all(source: DepthSource):
+    """Raw frame indices delivered until the source finishes."""
+    seen = []
+    for _ in range(1000):
+        if not source.has_new_depth_frame():
+            break
+        seen.append(int(source._get_raw_depth()[0, 0]))
+    return seen
+
+
+class FakeClock:
+    """Stands in for the `time` module inside frame_source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_incomplete_source_cannot_be_instantiated():
+    class OpenOnly(DepthSource):
+        def open(self):
+            pass
+
+    with pytest.raises(TypeError):
+        OpenOnly(Config())
+
+
+@pytest.mark.parametrize("suffix, chunk", [(".npy", 300), (".npz", 4)])
+def test_max_speed_replay_delivers_every_frame_in_order(tmp_path, suffix, chunk):
+    path = tmp_path / f"seq{suffix}"
+    record(path, 10, chunk_frames=chunk)
+    source = RecordedDepthSource(Config(), path, speed=None)
+    source.open()
+    assert read_all(source) == list(range(10))
+    assert source.finished and source.frames_skipped == 0
+    source.close()
+
+
+def test_npy_recording_is_memory_mappable(tmp_path):
+    path = tmp_path / "seq.npy"
+    record(path, 3)
+    frames = np.load(path, mmap_mode="r")
+    assert frames.shape == (3, *DEPTH_SHAPE) and int(frames[2, 0, 0]) == 2
+
+
+def test_loop_restarts_at_the_first_frame(tmp_path):
+    path = tmp_path / "seq.npz"
+    record(path, 3, chunk_frames=2)
+    source = RecordedDepthSource(Config(), path, speed=None, loop=True)
+    source.open()
+    seen = [int(source._get_raw_depth()[0, 0]) for _ in range(7)]
+    assert seen == [0, 1, 2, 0, 1, 2, 0]
+    assert not source.finished
+
+
+@pytest.mark.parametrize("suffix", [".npy", ".npz"])
+def test_paced_replay_skips_frames_a_slow_consumer_missed(tmp_path, monkeypatch, suffix):
+    clock = FakeClock()
+    monkeypatch.setattr(frame_source, "time", clock)
+    path = tmp_path / f"seq{suffix}"
+    record(path, 30, chunk_frames=8)
+    source = RecordedDepthSource(Config(), path, speed=1.0, fps=30.0)
+    source.open()
+    assert int(source._get_raw_depth()[0, 0]) == 0
+    assert not source.has_new_depth_frame()       # frame 1 not due yet
+    clock.now = 5.5 / 30                          # busy for 5.5 frame periods
+    assert int(source._get_raw_depth()[0, 0]) == 5
+    assert source.frames_skipped == 4
+    clock.now = 100.0                             # long past the end
+    assert int(source._get_raw_depth()[0, 0]) == 29
+    assert not source.has_new_depth_frame() and source.finished
+
+
+def test_paced_wait_sleeps_until_the_frame_is_due(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(frame_source, "time", clock)
+    path = tmp_path / "seq.npy"
+    record(path, 5)
+    source = RecordedDepthSource(Config(), path, speed=2.0, fps=30.0)
+    source.open()
+    source._get_raw_depth()
+    assert source.wait_new_depth_frame(1.0)
+    assert clock.now == pytest.approx(1 / 60)
+
+
+def test_recorder_writes_what_the_source_delivers(tmp_path):
+    original = tmp_path / "in.npy"
+    record(original, 4)
+    copy = tmp_path / "out.npz"
+    recorder = DepthRecorder(RecordedDepthSource(Config(), original, speed=None), copy,
+                             chunk_frames=3)
+    recorder.open()
+    assert read_all(recorder) == [0, 1, 2, 3]
+    assert recorder.finished and not recorder.realtime
+    recorder.close()
+    replay = RecordedDepthSource(Config(), copy, speed=None)
+    replay.open()
+    assert read_all(replay) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"path": "seq.avi"},
+    {"path": "seq.npy", "speed": 0},
+])
+def test_invalid_recording_arguments(tmp_path, kwargs):
+    kwargs["path"] = tmp_path / kwargs["path"]
+    with pytest.raises(ValueError):
+        RecordedDepthSource(Config(), **kwargs)
@@ -0,0 +1,82 @@
+# modules/kinect/tests/test_preprocess.py
+
+import cv2
+import numpy as np
+import pytest
+
+from config import Config
+from frame_source import DEPTH_SHAPE, DepthSource
+
+
+class ArraySource(DepthSource):
+    """Serves one given raw frame."""
+
+    def __init__(self, config, raw, blur_ksize=5):
+        super().__init__(config, blur_ksize)
+        self.raw = raw
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def has_new_depth_frame(self):
+        return True
+
+    def _get_raw_depth(self):
+        return self.raw
+
+
+def reference(raw, config, ksize):
+    """Whole-frame blur, then crop and flip (the pre-crop-first path)."""
+    blurred = cv2.medianBlur(raw.astype(np.uint16), ksize)
+    y0, x0 = config.roi_y0, config.roi_x0
+    return cv2.flip(blurred[y0:y0 + config.roi_height, x0:x0 + config.roi_width], 1)
+
+
+@pytest.fixture
+def raw():
+    rng = np.random.default_rng(0)
+    return rng.integers(500, 4000, size=DEPTH_SHAPE, dtype=np.uint16)
+
+
+ROIS = {
+    "default": {},
+    "top-left corner": {"roi_x0": 0, "roi_y0": 0, "roi_x1": 100, "roi_y1": 80},
+    "bottom-right corner": {"roi_x0": 400, "roi_y0": 330, "roi_x1": 512, "roi_y1": 424},
+    "one pixel from the edge": {"roi_x0": 1, "roi_y0": 1, "roi_x1": 511, "roi_y1": 423},
+    "full frame": {"roi_x0": 0, "roi_y0": 0, "roi_x1": 512, "roi_y1": 424},
+}
+
+
+@pytest.mark.parametrize("ksize", [3, 5])
+@pytest.mark.parametrize("roi", ROIS.values(), ids=ROIS.keys())
+def test_crop_first_matches_whole_frame_blur(raw, roi, ksize):
+    config = Config(**roi)
+    source = ArraySource(config, raw, blur_ksize=ksize)
+    assert np.array_equal(source.get_depth_frame(), reference(raw, config, ksize))
+
+
+def test_writes_into_out_and_reuses_its_buffers(raw):
+    config = Config()
+    source = ArraySource(config, raw)
+    out = np.empty((config.roi_height, config.roi_width), dtype=np.uint16)
+    assert source.get_depth_frame(out=out) is out
+    blur_buf = source._blur_buf
+    source.raw = raw[::-1].copy()
+    source.get_depth_frame(out=out)
+    assert source._blur_buf is blur_buf
+    assert np.array_equal(out, reference(source.raw, config, 5))
+
+
+def test_reads_non_contiguous_and_non_uint16_frames(raw):
+    config = Config()
+    wide = np.zeros((DEPTH_SHAPE[0], DEPTH_SHAPE[1] * 2), dtype=np.uint16)
+    wide[:, ::2] = raw
+    strided = wide[:, ::2]
+    assert np.array_equal(ArraySource(config, strided).get_depth_frame(),
+                          reference(raw, config, 5))
+    as_int32 = raw.astype(np.int32)
+    assert np.array_equal(ArraySource(config, as_int32).get_depth_frame(),
+                          reference(raw, config, 5))
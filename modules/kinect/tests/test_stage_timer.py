@@ -0,0 +1,97 @@
+# modules/kinect/tests/test_stage_timer.py
+
+import pytest
+
+import stage_timer
+from stage_timer import NullStageTimer, StageTimer, percentiles
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(stage_timer, "time", clock)
+    return clock
+
+
+def test_percentiles_use_nearest_rank():
+    p = percentiles(range(1, 101))
+    assert p == {"p50": 50, "p95": 95, "p99": 99, "max": 100}
+
+
+def test_percentiles_of_few_samples():
+    assert percentiles([3.0]) == {"p50": 3.0, "p95": 3.0, "p99": 3.0, "max": 3.0}
+    assert percentiles([2.0, 1.0]) == {"p50": 1.0, "p95": 2.0, "p99": 2.0, "max": 2.0}
+    assert percentiles([1.23456])["max"] == 1.235
+
+
+def test_percentiles_of_nothing():
+    assert percentiles([]) == {"p50": None, "p95": None, "p99": None, "max": None}
+
+
+def run_frame(timer, clock, stages):
+    timer.start_frame()
+    for name, ms in stages:
+        clock.now += ms / 1000
+        timer.mark(name)
+    timer.end_frame()
+
+
+def test_marks_charge_elapsed_time_to_each_stage(clock):
+    timer = StageTimer(window=10, budget_ms=30)
+    run_frame(timer, clock, [("acquire", 2), ("depth", 5), ("depth", 3), ("send", 1)])
+    report = timer.report()
+    assert report["frames"] == 1 and report["late"] == 0
+    assert report["total_ms"]["max"] == pytest.approx(11)
+    stages = report["stages_ms"]
+    assert stages["acquire"]["p50"] == pytest.approx(2)
+    assert stages["depth"]["p50"] == pytest.approx(8)       # summed
+    assert stages["send"]["p50"] == pytest.approx(1)
+
+
+def test_frames_over_budget_count_as_late(clock):
+    timer = StageTimer(window=10, budget_ms=30)
+    for ms in (10, 40, 29, 31):
+        run_frame(timer, clock, [("depth", ms)])
+    assert timer.frames == 4 and timer.late == 2
+
+
+def test_percentiles_cover_the_rolling_window_only(clock):
+    timer = StageTimer(window=3)
+    for ms in (100, 1, 2, 3):
+        run_frame(timer, clock, [("depth", ms)])
+    assert timer.report()["stages_ms"]["depth"]["max"] == pytest.approx(3)
+    assert timer.report()["frames"] == 4
+
+
+def test_due_every_interval(clock):
+    timer = StageTimer(interval=5.0)
+    clock.now = 4.9
+    assert not timer.due()
+    clock.now = 5.0
+    assert timer.due() and not timer.due()
+    assert not StageTimer(interval=0).due()
+
+
+def test_format_includes_acquisition(clock):
+    timer = StageTimer()
+    run_frame(timer, clock, [("depth", 4)])
+    report = timer.report()
+    report["acquisition"] = {"skipped": 7, "age_ms": {"p50": 1.5, "p95": 3.0}}
+    line = StageTimer.format(report)
+    assert "late 0/1" in line and "skipped 7" in line and "depth 4.0/4.0" in line
+
+
+def test_null_timer_does_nothing():
+    timer = NullStageTimer()
+    timer.start_frame()
+    timer.mark("depth")
+    timer.end_frame()
+    assert not timer.enabled and not timer.due() and timer.frames == 0
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class Visualizer:
+    """
+    Debug windows rendered by a dedicated thread, off the processing loop.
+
+    - `show(name, img)` never blocks: it keeps only the latest image per
+      window (an image not rendered yet is replaced) and returns at once
+      if that window was updated less than 1/max_fps s ago.
+    - `wants(name)` tells a producer whether an image would be taken
+      right now, so it can skip building it (conversions, overlays).
+    - The thread does every HighGUI call (namedWindow, imshow, waitKey)
+      and collects key presses for `poll_key()`; 'q' sets `quit_requested`.
+
+    With `copy=False`, the caller promises not to modify `img` afterwards
+    (a freshly computed image); otherwise it is copied, at most max_fps
+    times per second.
+    """
+
+    enabled = True
+
+    def __init__(self, max_fps: float = 15.0, logger=None):
+        self.period = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.logger = logger or logging.getLogger(__name__)
+        self.shown = 0
+        self.replaced = 0
+        self.quit_requested = False
+        self._pending: Dict[str, np.ndarray] = {}
+        self._next_due: Dict[str, float] = {}
+        self._keys = deque(maxlen=32)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="kinect-visualizer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def wants(self, name: str) -> bool:
+        return time.perf_counter() >= self._next_due.get(name, 0.0)
+
+    def show(self, name: str, img: np.ndarray, copy: bool = True) -> None:
+        now = time.perf_counter()
+        if now < self._next_due.get(name, 0.0):
+            return
+        self._next_due[name] = now + self.period
+        if copy:
+            img = img.copy()
+        with self._lock:
+            if name in self._pending:
+                self.replaced += 1
+            self._pending[name] = img
+        self._wakeup.set()
+
+    def poll_key(self) -> int:
+        """Oldest key pressed in a window since the last call, or -1."""
+        try:
+            return self._keys.popleft()
+        except IndexError:
+            return -1
+
+    def _run(self) -> None:
+        windows = set()
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                for name, img in batch.items():
+                    if name not in windows:
+                        cv2.namedWindow(name, cv2.WINDOW_NORMAL)
+                        windows.add(name)
+                    cv2.imshow(name, img)
+                    self.shown += 1
+                if windows:
+                    # also pumps window events (resizing, key presses)
+                    key = cv2.waitKey(1) & 0xFF
+                    if key != 0xFF:
+                        if key == ord('q'):
+                            self.quit_requested = True
+                        self._keys.append(key)
+                # capped rate; woken early only to stop
+                remaining = self.period - (time.perf_counter() - started)
+                if remaining > 0:
+                    self._stop.wait(remaining)
+                if not windows:
+                    self._wakeup.wait(0.1)
+                    self._wakeup.clear()
+        except cv2.error as e:
+            self.logger.error("Debug display failed (no GUI? use headless mode): %s", e)
+        finally:
+            if windows:
+                cv2.destroyAllWindows()
+
+
+class NullVisualizer:
+    """Headless mode: same interface, no HighGUI call at all."""
+
+    enabled = False
+    quit_requested = False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def wants(self, name: str) -> bool:
+        return False
+
+    def show(self, name: str, img: np.ndarray, copy: bool = True) -> None:
+        pass
+
+    def poll_key(self) -> int:
+        return -1
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import os
 import random
 import time
@@ -12,11 +11,14 @@ import websockets
 from dotenv import load_dotenv
 from websockets.exceptions import InvalidMessage
 
+from wire_codec import JSON_CODEC, codec_by_name, codec_for_subprotocol
+
 load_dotenv()
 
 class ArtineoAction:
     SET = "set"
     GET = "get"
+    TELEMETRY = "telemetry"
 
 class ArtineoClient:
     def __init__(
@@ -30,6 +32,8 @@ class ArtineoClient:
         ws_retries: int = 5,
         ws_backoff: float = 1.0,
         ws_ping_interval: float = 20.0,
+        encoding: str = None,
+        acks: str = None,
     ):
         # --- HTTP setup ---
         host = host or "artineo.local"
@@ -37,6 +41,11 @@ class ArtineoClient:
         self.module_id     = module_id
         self.base_url      = f"http://{host}:{port}"
         self.ws_url        = f"ws://{host}:{port}/ws"
+        # "none" : le serveur n'acquitte pas les set (producteurs à haut
+        # débit qui n'en font rien) ; défaut via ARTINEO_WS_ACKS
+        acks = acks or os.getenv("ARTINEO_WS_ACKS", "all")
+        if acks != "all":
+            self.ws_url += f"?acks={acks}"
         self.http_retries  = http_retries
         self.http_backoff  = http_backoff
         self.http_timeout  = http_timeout
@@ -46,6 +55,12 @@ class ArtineoClient:
         self.ws_backoff       = ws_backoff
         self.ws_ping_interval = ws_ping_interval
 
+        # encodage demandé ("json" ou "msgpack", défaut via ARTINEO_WS_ENCODING) ;
+        # le codec effectif est celui accepté par le serveur à chaque connexion
+        encoding = encoding or os.getenv("ARTINEO_WS_ENCODING", "json")
+        self._wanted_codec = codec_by_name(encoding)
+        self._codec = JSON_CODEC
+
         # queue pour messages sortants
         self._send_queue = asyncio.Queue()
         # état de connexion WebSocket
@@ -107,12 +122,21 @@ class ArtineoClient:
             self._ws_loop = None
 
             try:
-                async with websockets.connect(self.ws_url, compression=None, ping_interval=None) as ws:
+                subprotocols = None
+                if self._wanted_codec.subprotocol:
+                    subprotocols = [self._wanted_codec.subprotocol]
+                async with websockets.connect(
+                    self.ws_url, compression=None, ping_interval=None,
+                    subprotocols=subprotocols
+                ) as ws:
                     # Désactiver Nagle
                     sock = ws.transport.get_extra_info('socket')
                     if sock:
                         sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
+                    # repli sur JSON si le serveur n'a pas accepté le sous-protocole
+                    self._codec = codec_for_subprotocol(ws.subprotocol)
+
                     # on stocke le protocole et sa boucle
                     self._ws      = ws
                     self._ws_loop = asyncio.get_running_loop()
@@ -131,8 +155,12 @@ class ArtineoClient:
                     ping_task   = asyncio.create_task(self._ws_heartbeat(ws))
 
                     async for raw in ws:
+                        if raw == "ping":
+                            # heartbeat applicatif du serveur
+                            await ws.send("pong")
+                            continue
                         try:
-                            msg = json.loads(raw)
+                            msg = self._codec.decode(raw)
                         except Exception:
                             msg = raw
                         self.on_message(msg)
@@ -177,6 +205,8 @@ class ArtineoClient:
         """Envoie tous les messages mis en file."""
         while True:
             msg = await self._send_queue.get()
+            if not isinstance(msg, (str, bytes)):
+                msg = self._codec.encode(msg)
             try:
                 await ws.send(msg)
             except Exception:
@@ -209,3 +239,12 @@ class ArtineoClient:
         if not self._connected.is_set():
             return
         self._send_queue.put_nowait(message)
+
+    def send_message(self, message: dict):
+        """
+        Comme send_ws, mais prend le message non sérialisé : il est encodé
+        à l'envoi avec le codec négocié (JSON ou msgpack).
+        """
+        if not self._connected.is_set():
+            return
+        self._send_queue.put_nowait(message)
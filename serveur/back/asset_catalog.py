@@ -0,0 +1,223 @@
+# serveur/back/asset_catalog.py
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import stat
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+MEDIA_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.mp4', '.webm', '.mov')
+
+# une URL versionnée (?v=<hash>) ne change jamais de contenu
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+CHUNK_SIZE = 256 * 1024
+
+
+class Asset:
+    __slots__ = ("path", "rel", "size", "mtime_ns", "mime", "digest", "etag")
+
+    def __init__(self, path: str, rel: str, size: int, mtime_ns: int, digest: str):
+        self.path = path
+        self.rel = rel
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.mime, _ = mimetypes.guess_type(path)
+        self.digest = digest
+        self.etag = f'"{digest}"'
+
+    @property
+    def url(self) -> str:
+        return f"/assets/{self.rel}?v={self.digest}"
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _module_id(dirname: str) -> Optional[int]:
+    """`module4` → 4, None pour tout autre nom."""
+    if not dirname.startswith("module"):
+        return None
+    try:
+        module = int(dirname[len("module"):])
+    except ValueError:
+        return None
+    # nom exact, comme l'ancien os.path.isdir(f"assets/module{module}")
+    return module if dirname == f"module{module}" else None
+
+
+class AssetCatalog:
+    """
+    Index des fichiers de `assets/` : chemin, taille, type MIME et hash du
+    contenu, construit au démarrage puis rafraîchi périodiquement.
+
+    Un rafraîchissement ne fait qu'un `os.stat` par fichier et ne rehashe
+    que les fichiers dont (taille, mtime) a changé. Les requêtes `/media`,
+    `/getAsset` et `/assets/...` sont servies depuis cet index, sans toucher
+    au système de fichiers sur la boucle d'évènements. Avant d'envoyer un
+    fichier, `lookup` (en thread) vérifie qu'il n'a pas changé depuis le
+    dernier scan et indexe tout de suite un fichier nouveau.
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 5.0):
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        self._assets: Dict[str, Asset] = {}
+        # module_id -> réponse /media pré-calculée
+        self._media: Dict[int, List[dict]] = {}
+        # dossiers assets/module{N} existants, même vides (/media → [])
+        self._module_dirs: Set[int] = set()
+
+    # ─── indexation (threads) ────────────────────────────────────────────────
+    def scan(self):
+        assets: Dict[str, Asset] = {}
+        module_dirs: Set[int] = set()
+        for dirpath, dirs, files in os.walk(self.root):
+            if dirpath == self.root:
+                module_dirs = {m for m in map(_module_id, dirs) if m is not None}
+            for name in files:
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                old = self._assets.get(rel)
+                if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                    assets[rel] = old
+                    continue
+                try:
+                    digest = _hash_file(path)
+                except OSError:
+                    continue
+                assets[rel] = Asset(path, rel, st.st_size, st.st_mtime_ns, digest)
+        self._assets = assets
+        self._media = self._build_media(assets)
+        self._module_dirs = module_dirs
+
+    @staticmethod
+    def _build_media(assets: Dict[str, Asset]) -> Dict[int, List[dict]]:
+        media: Dict[int, List[dict]] = {}
+        for rel, asset in sorted(assets.items()):
+            parts = rel.split("/")
+            # seulement assets/module{N}/{fichier}, comme l'ancien os.listdir
+            module = _module_id(parts[0]) if len(parts) == 2 else None
+            if module is None:
+                continue
+            if not parts[1].lower().endswith(MEDIA_EXTENSIONS) or not asset.mime:
+                continue
+            media.setdefault(module, []).append({
+                "title": parts[1],
+                "type": asset.mime,
+                "url": asset.url,
+            })
+        return media
+
+    async def run_refresher(self):
+        """Tâche de fond : rescanne `assets/` toutes les `refresh_interval` s."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.scan)
+            except OSError as e:
+                print(f"[assets] Erreur d'indexation: {e}")
+
+    def lookup(self, rel: str) -> Optional[Asset]:
+        """
+        Entrée à jour pour `rel` : un `os.stat`, un rehash seulement si
+        (taille, mtime) a changé depuis le dernier scan, une indexation si
+        le fichier est nouveau. None s'il n'existe pas ou sort de `root`.
+        """
+        path = os.path.abspath(os.path.join(self.root, rel))
+        if not path.startswith(self.root + os.sep):
+            return None
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        old = self._assets.get(rel)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            if old is not None:
+                self._replace(rel, None)
+            return None
+        if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return old
+        try:
+            digest = _hash_file(path)
+        except OSError:
+            return None
+        asset = Asset(path, rel, st.st_size, st.st_mtime_ns, digest)
+        self._replace(rel, asset)
+        return asset
+
+    def _replace(self, rel: str, asset: Optional[Asset]):
+        # copie puis remplacement : la boucle lit l'index sans verrou
+        assets = dict(self._assets)
+        if asset is None:
+            assets.pop(rel, None)
+        else:
+            assets[rel] = asset
+        self._assets = assets
+        self._media = self._build_media(assets)
+
+    # ─── lecture ─────────────────────────────────────────────────────────────
+    def get(self, rel: str) -> Optional[Asset]:
+        return self._assets.get(rel)
+
+    def has_module_dir(self, module: int) -> bool:
+        return module in self._module_dirs
+
+    def media(self, module: int) -> List[dict]:
+        return self._media.get(module, [])
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interprète un en-tête `Range: bytes=...` à plage unique.
+    Renvoie (début, fin inclusive), None pour servir le fichier entier
+    (absent, multi-plages ou unité inconnue), ou lève ValueError si la
+    plage est insatisfaisable (→ 416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    try:
+        if start_s == "":
+            # suffixe : les N derniers octets
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(f"Range invalide: {header}")
+    end = min(end, size - 1)
+    if start < 0 or start >= size or end < start:
+        raise ValueError(f"Range insatisfaisable: {header}")
+    return start, end
+
+
+def iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    """Générateur synchrone (exécuté en threadpool par StreamingResponse)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
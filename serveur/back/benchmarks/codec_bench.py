@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# serveur/back/benchmarks/codec_bench.py
+"""
+Compare JSON et MessagePack sur une trame module 4 représentative
+(diff de strokes Kinect) : temps d'encodage, de décodage et taille.
+
+Usage : python benchmarks/codec_bench.py [--strokes 200] [--removes 50] [-n 2000]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from wire_codec import JSON_CODEC, MSGPACK_CODEC  # noqa: E402
+
+
+def module4_frame(n_strokes: int, n_removes: int, seed: int = 0) -> dict:
+    """Message `set` tel qu'envoyé par PayloadSender.send_update."""
+    rnd = random.Random(seed)
+    strokes = [
+        {
+            "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+            "tool_id": str(rnd.randint(1, 3)),
+            "x": round(rnd.uniform(0, 325), 2),
+            "y": round(rnd.uniform(0, 195), 2),
+            "size": round(rnd.uniform(5, 30), 2),
+        }
+        for _ in range(n_strokes)
+    ]
+    removes = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(n_removes)]
+    return {
+        "module": 4,
+        "action": "set",
+        "data": {
+            "newStrokes": strokes,
+            "removeStrokes": removes,
+            "newObjects": [],
+            "removeObjects": [],
+        },
+    }
+
+
+def bench(codec, frame: dict, number: int) -> dict:
+    encoded = codec.encode(frame)
+    raw = encoded.encode("utf-8") if isinstance(encoded, str) else encoded
+    assert codec.decode(encoded) == frame
+    enc = min(timeit.repeat(lambda: codec.encode(frame), number=number, repeat=5)) / number
+    dec = min(timeit.repeat(lambda: codec.decode(encoded), number=number, repeat=5)) / number
+    return {"codec": codec.name, "bytes": len(raw), "encode_us": enc * 1e6, "decode_us": dec * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--strokes", type=int, default=200, help="nombre de newStrokes par trame")
+    parser.add_argument("--removes", type=int, default=50, help="nombre de removeStrokes par trame")
+    parser.add_argument("-n", "--number", type=int, default=2000, help="itérations par mesure")
+    args = parser.parse_args()
+
+    frame = module4_frame(args.strokes, args.removes)
+    codecs = [JSON_CODEC]
+    if MSGPACK_CODEC is not None:
+        codecs.append(MSGPACK_CODEC)
+    else:
+        print("msgpack non installé : seul JSON est mesuré (pip install msgpack)")
+
+    print(f"Trame module 4 : {args.strokes} newStrokes, {args.removes} removeStrokes")
+    print(f"{'codec':<10}{'octets':>10}{'encode (µs)':>14}{'decode (µs)':>14}")
+    results = [bench(codec, frame, args.number) for codec in codecs]
+    for r in results:
+        print(f"{r['codec']:<10}{r['bytes']:>10}{r['encode_us']:>14.1f}{r['decode_us']:>14.1f}")
+    if len(results) > 1:
+        base, alt = results
+        print(
+            f"msgpack/json : taille x{alt['bytes'] / base['bytes']:.2f}, "
+            f"encode x{alt['encode_us'] / base['encode_us']:.2f}, "
+            f"decode x{alt['decode_us'] / base['decode_us']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
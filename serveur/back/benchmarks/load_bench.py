@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# serveur/back/benchmarks/load_bench.py
+"""
+Banc de charge du serveur relais : N producteurs envoient des `set`, M
+consommateurs s'abonnent (ou pollent avec `get`), on mesure le débit et
+la latence de bout en bout (p50/p95/p99) vers un fichier JSON.
+
+Usage : python benchmarks/load_bench.py [--producers 3] [--consumers 6]
+        [--rate 30] [--duration 10] [--mode subscribe|poll] [--out bench.json]
+
+Sans --url, le serveur est lancé en local (uvicorn main:app) sur un port
+libre. Producteurs et consommateurs tournent dans une seule boucle
+asyncio : au-delà de quelques milliers de messages/s, c'est le banc qui
+sature avant le serveur.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+BACK_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACK_DIR))
+from wire_codec import codec_by_name  # noqa: E402
+
+# type de producteur -> module_id, comme les modules réels
+PRODUCER_MODULES = {"ir": 1, "rotation": 2, "kinect": 4}
+
+
+# ─── charges utiles réalistes ──────────────────────────────────────────────
+class IrPayload:
+    """modules/IR : position et diamètre de la tache détectée."""
+
+    def __init__(self, rnd: random.Random):
+        self.rnd = rnd
+
+    def next(self) -> dict:
+        return {
+            "x": self.rnd.randint(0, 320),
+            "y": self.rnd.randint(0, 240),
+            "diameter": round(self.rnd.uniform(4, 40), 1),
+        }
+
+
+class RotationPayload:
+    """modules/2rotation : angles des trois encodeurs."""
+
+    def __init__(self, rnd: random.Random):
+        self.rnd = rnd
+        self.angles = [0.0, 0.0, 0.0]
+
+    def next(self) -> dict:
+        self.angles = [(a + self.rnd.uniform(-3, 3)) % 360 for a in self.angles]
+        rx, ry, rz = (round(a, 2) for a in self.angles)
+        return {"rotX": rx, "rotY": ry, "rotZ": rz}
+
+
+class KinectPayload:
+    """modules/kinect : diff de strokes (ajouts + suppressions des anciens)."""
+
+    def __init__(self, rnd: random.Random, strokes: int, keep: int = 500):
+        self.rnd = rnd
+        self.strokes = strokes
+        self.keep = keep
+        self.live: List[str] = []
+
+    def next(self) -> dict:
+        new = [
+            {
+                "id": str(uuid.UUID(int=self.rnd.getrandbits(128))),
+                "tool_id": str(self.rnd.randint(1, 3)),
+                "x": round(self.rnd.uniform(0, 325), 2),
+                "y": round(self.rnd.uniform(0, 195), 2),
+                "size": round(self.rnd.uniform(5, 30), 2),
+            }
+            for _ in range(self.strokes)
+        ]
+        self.live.extend(s["id"] for s in new)
+        removed, self.live = self.live[:-self.keep], self.live[-self.keep:]
+        return {
+            "newStrokes": new,
+            "removeStrokes": removed,
+            "newObjects": [],
+            "removeObjects": [],
+        }
+
+
+def make_payload(kind: str, rnd: random.Random, strokes: int):
+    if kind == "ir":
+        return IrPayload(rnd)
+    if kind == "rotation":
+        return RotationPayload(rnd)
+    return KinectPayload(rnd, strokes)
+
+
+# ─── mesures ───────────────────────────────────────────────────────────────
+class Stats:
+    def __init__(self):
+        self.sent: Dict[int, int] = {}
+        self.received: Dict[int, int] = {}
+        self.latencies: Dict[int, List[float]] = {}
+        self.measuring = False
+
+    def on_sent(self, module_id: int):
+        if self.measuring:
+            self.sent[module_id] = self.sent.get(module_id, 0) + 1
+
+    def on_received(self, module_id: int, data: dict):
+        if not self.measuring or not isinstance(data, dict):
+            return
+        mark = data.get("_bench")
+        if not isinstance(mark, dict):
+            return
+        self.received[module_id] = self.received.get(module_id, 0) + 1
+        latency = time.perf_counter() - mark["t"]
+        self.latencies.setdefault(module_id, []).append(latency)
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(sent: int, received: int, latencies: List[float], duration: float) -> dict:
+    values = sorted(latencies)
+
+    def ms(v):
+        return None if v is None else round(v * 1000, 3)
+
+    return {
+        "sent": sent,
+        "received": received,
+        "sent_per_s": round(sent / duration, 1),
+        "received_per_s": round(received / duration, 1),
+        "latency_ms": {
+            "p50": ms(percentile(values, 50)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1] if values else None),
+        },
+    }
+
+
+# ─── clients simulés ───────────────────────────────────────────────────────
+def subprotocols_for(codec):
+    return [codec.subprotocol] if codec.subprotocol else None
+
+
+async def drain(ws, codec, stats: Stats, module_id: int):
+    """Lit tout ce qui arrive : répond aux ping, compte les get_buffer."""
+    async for raw in ws:
+        if raw == "ping":
+            await ws.send("pong")
+            continue
+        try:
+            msg = codec.decode(raw)
+        except ValueError:
+            continue
+        if isinstance(msg, dict) and msg.get("action") == "get_buffer":
+            stats.on_received(module_id, msg.get("buffer"))
+
+
+async def producer(url, codec, kind, rate, strokes, stats, stop, seed, acks="all"):
+    module_id = PRODUCER_MODULES[kind]
+    payload = make_payload(kind, random.Random(seed), strokes)
+    period = 1.0 / rate
+    if acks != "all":
+        url = f"{url}?acks={acks}"
+    async with websockets.connect(url, subprotocols=subprotocols_for(codec),
+                                  compression=None, ping_interval=None) as ws:
+        reader = asyncio.create_task(drain(ws, codec, stats, module_id))
+        next_at = time.perf_counter()
+        seq = 0
+        try:
+            while not stop.is_set():
+                data = payload.next()
+                data["_bench"] = {"seq": seq, "t": time.perf_counter()}
+                await ws.send(codec.encode({
+                    "module": module_id,
+                    "action": "set",
+                    "data": data,
+                    "_ts_client": time.time() * 1000,
+                }))
+                stats.on_sent(module_id)
+                seq += 1
+                next_at += period
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # en retard : on ne rattrape pas en rafale
+                    next_at = time.perf_counter()
+        finally:
+            reader.cancel()
+
+
+async def consumer(url, codec, module_id, mode, poll_rate, stats, stop):
+    async with websockets.connect(url, subprotocols=subprotocols_for(codec),
+                                  compression=None, ping_interval=None) as ws:
+        reader = asyncio.create_task(drain(ws, codec, stats, module_id))
+        try:
+            if mode == "subscribe":
+                await ws.send(codec.encode({"module": module_id, "action": "subscribe"}))
+                await stop.wait()
+                return
+            period = 1.0 / poll_rate
+            request = codec.encode({"module": module_id, "action": "get"})
+            while not stop.is_set():
+                await ws.send(request)
+                await asyncio.sleep(period)
+        finally:
+            reader.cancel()
+
+
+# ─── serveur local ─────────────────────────────────────────────────────────
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int = 1, env: Optional[dict] = None) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+         "--workers", str(workers)],
+        cwd=BACK_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("le serveur s'est arrêté au démarrage")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/hc", timeout=0.5)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("le serveur ne répond pas sur /hc")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACK_DIR,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, url: str) -> dict:
+    codec = codec_by_name(args.encoding)
+    kinds = args.mix.split(",")
+    stats = Stats()
+    stop = asyncio.Event()
+
+    producer_kinds = [kinds[i % len(kinds)] for i in range(args.producers)]
+    modules = sorted({PRODUCER_MODULES[k] for k in producer_kinds}) or [1]
+    tasks = [
+        asyncio.create_task(producer(url, codec, kind, args.rate, args.strokes, stats, stop, i,
+                                     args.acks))
+        for i, kind in enumerate(producer_kinds)
+    ]
+    tasks += [
+        asyncio.create_task(consumer(url, codec, modules[i % len(modules)],
+                                     args.mode, args.poll_rate, stats, stop))
+        for i in range(args.consumers)
+    ]
+
+    await asyncio.sleep(args.warmup)
+    stats.measuring = True
+    t0 = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stats.measuring = False
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [repr(r) for r in results if isinstance(r, Exception)]
+
+    per_module = {
+        str(mid): summarize(stats.sent.get(mid, 0), stats.received.get(mid, 0),
+                            stats.latencies.get(mid, []), elapsed)
+        for mid in modules
+    }
+    total = summarize(sum(stats.sent.values()), sum(stats.received.values()),
+                      [v for vs in stats.latencies.values() for v in vs], elapsed)
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "duration_s": round(elapsed, 3),
+        "total": total,
+        "modules": per_module,
+        "errors": errors,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="serveur existant (ws://hôte:port/ws) ; sinon lancé en local")
+    parser.add_argument("--producers", type=int, default=3, help="nombre de modules producteurs")
+    parser.add_argument("--mix", default="ir,rotation,kinect",
+                        help="types de producteurs, répartis à tour de rôle")
+    parser.add_argument("--rate", type=float, default=30.0, help="set/s par producteur")
+    parser.add_argument("--strokes", type=int, default=20, help="newStrokes par diff Kinect")
+    parser.add_argument("--consumers", type=int, default=6, help="nombre de consommateurs")
+    parser.add_argument("--mode", choices=("subscribe", "poll"), default="subscribe")
+    parser.add_argument("--poll-rate", type=float, default=30.0, help="get/s par consommateur (mode poll)")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--acks", choices=("all", "none"), default="all",
+                        help="acks des set (none : producteurs connectés en /ws?acks=none)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="secondes non mesurées")
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes mesurées")
+    parser.add_argument("--out", default="load_bench.json", help="fichier de résultats JSON")
+    return parser
+
+
+def parse_args(parser: argparse.ArgumentParser) -> argparse.Namespace:
+    args = parser.parse_args()
+    unknown = set(args.mix.split(",")) - set(PRODUCER_MODULES)
+    if unknown:
+        parser.error(f"types inconnus dans --mix : {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args(build_parser())
+
+    proc = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        proc = start_server(port)
+        url = f"ws://127.0.0.1:{port}/ws"
+    try:
+        report = asyncio.run(run(args, url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"{'module':<8}{'envoyés/s':>12}{'reçus/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(report["modules"].items()) + [("total", report["total"])]
+    for name, r in rows:
+        lat = r["latency_ms"]
+        print(f"{name:<8}{r['sent_per_s']:>12}{r['received_per_s']:>12}"
+              f"{lat['p50'] or '-':>10}{lat['p95'] or '-':>10}{lat['p99'] or '-':>10}")
+    if report["errors"]:
+        print(f"{len(report['errors'])} client(s) en erreur, voir {args.out}")
+    print(f"Résultats : {args.out}")
+
+
+if __name__ == "__main__":
+    main()
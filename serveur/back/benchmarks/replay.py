@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# serveur/back/benchmarks/replay.py
+"""
+Rejoue une capture /ws (ARTINEO_CAPTURE) contre un serveur et mesure les
+latences set → ack et set → livraison aux abonnés.
+
+Usage : python benchmarks/replay.py captures/seance.jsonl.gz
+        [--speed 1 | 4 | max] [--modules 1,4] [--url ws://…] [--out replay.json]
+
+Les `set` capturés sont renvoyés dans l'ordre, une connexion par module
+comme les modules réels, à l'échelle de temps demandée (`--speed 2` :
+deux fois plus vite, `max` : sans attente). Chaque `set` rejoué porte un
+`_ts_client` neuf (ms, horloge murale), dans le message comme le module
+IR et dans `data`, où un abonné par module le retrouve à la livraison.
+Pour le module 4, un diff fusionné (fps) porte le `_ts_client` du
+dernier set regroupé.
+
+Sans --url, le serveur est lancé en local (sans journal ni capture).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load_bench import (  # noqa: E402
+    free_port, git_revision, start_server, subprotocols_for, summarize
+)
+from capture import read_capture  # noqa: E402
+from wire_codec import codec_by_name  # noqa: E402
+
+
+def load_sets(path: str, modules: Optional[set]) -> List[dict]:
+    """Entrées "in" de la capture qui sont des `set`, triées par heure."""
+    entries = [
+        e for e in read_capture(path)
+        if e.get("dir") == "in"
+        and isinstance(e.get("msg"), dict)
+        and e["msg"].get("action") == "set"
+        and (modules is None or e.get("module") in modules)
+    ]
+    entries.sort(key=lambda e: e["t"])
+    return entries
+
+
+def captured_latencies(entries: List[dict]) -> Dict[int, List[float]]:
+    """Client → serveur pendant la séance, là où `_ts_client` était présent."""
+    out: Dict[int, List[float]] = {}
+    for e in entries:
+        ts = e["msg"].get("_ts_client")
+        if isinstance(ts, (int, float)):
+            out.setdefault(e["module"], []).append(max(0.0, e["t"] - ts / 1000))
+    return out
+
+
+class Stats:
+    def __init__(self):
+        self.sent: Dict[int, int] = {}
+        self.rejected: Dict[int, int] = {}
+        self.acks: Dict[int, List[float]] = {}
+        self.delivered: Dict[int, List[float]] = {}
+        # heures d'envoi des set en attente d'ack, par module (ordre FIFO)
+        self.inflight: Dict[int, Deque[float]] = {}
+
+    def on_sent(self, module_id: int, at: float):
+        self.sent[module_id] = self.sent.get(module_id, 0) + 1
+        self.inflight.setdefault(module_id, deque()).append(at)
+
+    def on_reply(self, module_id: int, msg: dict):
+        pending = self.inflight.get(module_id)
+        if not pending:
+            return
+        sent_at = pending.popleft()
+        if msg.get("status") == "error":
+            self.rejected[module_id] = self.rejected.get(module_id, 0) + 1
+            return
+        self.acks.setdefault(module_id, []).append(time.time() - sent_at)
+
+    def on_delivered(self, module_id: int, data):
+        ts = data.get("_ts_client") if isinstance(data, dict) else None
+        if isinstance(ts, (int, float)):
+            self.delivered.setdefault(module_id, []).append(time.time() - ts / 1000)
+
+
+async def read_replies(ws, codec, stats: Stats, module_id: int):
+    async for raw in ws:
+        if raw == "ping":
+            await ws.send("pong")
+            continue
+        try:
+            msg = codec.decode(raw)
+        except ValueError:
+            continue
+        if isinstance(msg, dict) and (
+                msg.get("action") == "set_buffer" or msg.get("status") == "error"):
+            stats.on_reply(module_id, msg)
+
+
+async def read_pushes(ws, codec, stats: Stats, module_id: int):
+    async for raw in ws:
+        if raw == "ping":
+            await ws.send("pong")
+            continue
+        try:
+            msg = codec.decode(raw)
+        except ValueError:
+            continue
+        if isinstance(msg, dict) and msg.get("action") == "get_buffer":
+            stats.on_delivered(module_id, msg.get("buffer"))
+
+
+async def run(args, url: str, entries: List[dict]) -> dict:
+    codec = codec_by_name(args.encoding)
+    modules = sorted({e["module"] for e in entries})
+    stats = Stats()
+
+    async def connect():
+        return await websockets.connect(url, subprotocols=subprotocols_for(codec),
+                                        compression=None, ping_interval=None,
+                                        max_size=None)
+
+    producers = {mid: await connect() for mid in modules}
+    consumers = {mid: await connect() for mid in modules}
+    readers = [
+        asyncio.create_task(read_replies(ws, codec, stats, mid))
+        for mid, ws in producers.items()
+    ]
+    for mid, ws in consumers.items():
+        await ws.send(codec.encode({"module": mid, "action": "subscribe"}))
+        readers.append(asyncio.create_task(read_pushes(ws, codec, stats, mid)))
+    # laisse passer acks d'abonnement et rattrapages
+    await asyncio.sleep(0.2)
+
+    t_first = entries[0]["t"] if entries else 0.0
+    start = time.perf_counter()
+    for e in entries:
+        if args.speed is not None:
+            delay = start + (e["t"] - t_first) / args.speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        msg = dict(e["msg"])
+        now = time.time()
+        msg["_ts_client"] = now * 1000
+        if isinstance(msg.get("data"), dict):
+            msg["data"] = {**msg["data"], "_ts_client": now * 1000}
+        await producers[e["module"]].send(codec.encode(msg))
+        stats.on_sent(e["module"], now)
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(args.settle)
+    for task in readers:
+        task.cancel()
+    for ws in list(producers.values()) + list(consumers.values()):
+        await ws.close()
+
+    captured = captured_latencies(entries)
+    span = max(elapsed, 1e-9)
+    per_module = {}
+    for mid in modules:
+        sent = stats.sent.get(mid, 0)
+        delivery = summarize(sent, len(stats.delivered.get(mid, [])),
+                             stats.delivered.get(mid, []), span)
+        per_module[str(mid)] = {
+            **delivery,
+            "rejected": stats.rejected.get(mid, 0),
+            "ack_latency_ms": summarize(sent, 0, stats.acks.get(mid, []), span)["latency_ms"],
+            "captured_latency_ms": summarize(0, 0, captured.get(mid, []), span)["latency_ms"],
+        }
+    all_delivered = [v for vs in stats.delivered.values() for v in vs]
+    total = summarize(sum(stats.sent.values()), len(all_delivered), all_delivered, span)
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "captured_duration_s": round(entries[-1]["t"] - t_first, 3) if entries else 0.0,
+        "replay_duration_s": round(elapsed, 3),
+        "total": total,
+        "modules": per_module,
+    }
+
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("la vitesse doit être > 0 (ou max)")
+    return speed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture", help="fichier de capture (.jsonl ou .jsonl.gz)")
+    parser.add_argument("--url", help="serveur existant (ws://hôte:port/ws) ; sinon lancé en local")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="facteur de vitesse (1 = temps réel) ou max")
+    parser.add_argument("--modules", help="modules à rejouer, ex. 1,4 (défaut : tous)")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="secondes d'attente des livraisons après le dernier set")
+    parser.add_argument("--out", default="replay.json", help="fichier de résultats JSON")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    modules = {int(m) for m in args.modules.split(",")} if args.modules else None
+    entries = load_sets(args.capture, modules)
+    if not entries:
+        print(f"Aucun set à rejouer dans {args.capture}")
+        return
+
+    proc = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        proc = start_server(port, env={"ARTINEO_JOURNAL_DIR": "", "ARTINEO_CAPTURE": ""})
+        url = f"ws://127.0.0.1:{port}/ws"
+    try:
+        report = asyncio.run(run(args, url, entries))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"{len(entries)} set, capturés sur {report['captured_duration_s']} s, "
+          f"rejoués en {report['replay_duration_s']} s")
+    print(f"{'module':<8}{'envoyés':>9}{'reçus':>8}{'refusés':>9}"
+          f"{'ack p50':>10}{'livr. p50':>11}{'livr. p99':>11}")
+    for name, r in report["modules"].items():
+        print(f"{name:<8}{r['sent']:>9}{r['received']:>8}{r['rejected']:>9}"
+              f"{r['ack_latency_ms']['p50'] or '-':>10}"
+              f"{r['latency_ms']['p50'] or '-':>11}{r['latency_ms']['p99'] or '-':>11}")
+    print(f"Résultats : {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# serveur/back/benchmarks/workers_bench.py
+"""
+Compare le débit du serveur avec 1 worker (backend local) et N workers
+(backend redis), avec la même charge que load_bench.py.
+
+Usage : python benchmarks/workers_bench.py [--workers 4] [--redis-url redis://…]
+        [--producers 12 --rate 60 --consumers 24 …] [--out workers_bench.json]
+
+Sans --redis-url, un serveur compatible Redis est lancé en local avec
+fakeredis (pip install fakeredis) : pratique pour vérifier le
+fonctionnement multi-worker, mais bien plus lent qu'un vrai Redis ; pour
+mesurer le passage à l'échelle, utiliser un redis-server (ou valkey).
+Les trois configurations mesurées : 1 worker local, 1 worker redis (coût
+du backend seul), N workers redis.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load_bench import build_parser, free_port, git_revision, parse_args, run, start_server  # noqa: E402
+
+
+def start_redis_standin(port: int) -> subprocess.Popen:
+    code = (
+        "from fakeredis import TcpFakeServer; "
+        f"TcpFakeServer(('127.0.0.1', {port}), server_type='redis').serve_forever()"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("fakeredis n'a pas démarré (pip install fakeredis)")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("fakeredis ne répond pas")
+
+
+def flush_redis(url: str):
+    import redis
+    redis.Redis.from_url(url).flushdb()
+
+
+def run_config(args, workers: int, env: dict) -> dict:
+    port = free_port()
+    # pas de journal disque : on ne mesure que le relais
+    proc = start_server(port, workers=workers, env={"ARTINEO_JOURNAL_DIR": "", **env})
+    try:
+        return asyncio.run(run(args, f"ws://127.0.0.1:{port}/ws"))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+
+
+def main():
+    parser = build_parser()
+    parser.set_defaults(producers=12, rate=60.0, consumers=24, out="workers_bench.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="nombre de workers uvicorn pour la configuration redis")
+    parser.add_argument("--redis-url", help="Redis existant ; sinon fakeredis local")
+    args = parse_args(parser)
+    if args.url:
+        parser.error("--url n'a pas de sens ici : les serveurs sont lancés par le banc")
+
+    redis_proc = None
+    redis_url = args.redis_url
+    if redis_url is None:
+        port = free_port()
+        redis_proc = start_redis_standin(port)
+        redis_url = f"redis://127.0.0.1:{port}/0"
+    redis_env = {"ARTINEO_STATE_BACKEND": "redis", "ARTINEO_REDIS_URL": redis_url}
+
+    configs = [
+        ("1 worker, local", 1, {"ARTINEO_STATE_BACKEND": "local"}),
+        ("1 worker, redis", 1, redis_env),
+        (f"{args.workers} workers, redis", args.workers, redis_env),
+    ]
+    runs = []
+    try:
+        for label, workers, env in configs:
+            if env is redis_env:
+                flush_redis(redis_url)
+            print(f"→ {label}")
+            report = run_config(args, workers, env)
+            runs.append({
+                "label": label,
+                "workers": workers,
+                "backend": env["ARTINEO_STATE_BACKEND"],
+                "total": report["total"],
+                "modules": report["modules"],
+                "errors": report["errors"],
+            })
+    finally:
+        if redis_proc is not None:
+            redis_proc.terminate()
+
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "url")}
+    result = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "cpus": os.cpu_count(),
+        "redis": "fakeredis" if args.redis_url is None else "external",
+        "params": params,
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+        f.write("\n")
+
+    print(f"{'configuration':<22}{'envoyés/s':>12}{'reçus/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in runs:
+        t = r["total"]
+        lat = t["latency_ms"]
+        print(f"{r['label']:<22}{t['sent_per_s']:>12}{t['received_per_s']:>12}"
+              f"{lat['p50'] or '-':>10}{lat['p99'] or '-':>10}")
+    print(f"Résultats : {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# serveur/back/capture.py
+"""
+Capture du trafic /ws, pour rejouer une séance (benchmarks/replay.py).
+
+Une ligne JSON compacte par message :
+`{"t": heure serveur (s), "dir": "in" | "out", "module": id, "msg": message}`.
+"in" : `set` reçus, tels quels (avec `_ts_client` s'il y en a un) ;
+"out" : réponses envoyées et messages publiés aux abonnés.
+Un chemin en `.gz` est compressé.
+
+`record` ne fait que mettre la ligne en attente (sur la boucle) ; la
+tâche `run_writer` sérialise et écrit les lots dans un thread. Si
+l'écriture ne suit pas, les messages au-delà de `max_pending` sont
+comptés dans `dropped` plutôt que de faire grossir la mémoire.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+def open_capture(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_capture(path: str) -> Iterator[dict]:
+    """Relit un fichier de capture, en sautant une dernière ligne tronquée."""
+    with open_capture(path, "r") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except EOFError:
+            # .gz interrompu par un arrêt brutal
+            return
+
+
+class Capture:
+    def __init__(self, path: str, flush_interval: float = 0.5, max_pending: int = 50000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # (time.time(), sens, module_id, message)
+        self._pending: List[Tuple[float, str, Any, Any]] = []
+        self._pending_event: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, direction: str, module_id: Any, message: Any):
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), direction, module_id, message))
+        if self._pending_event is not None:
+            self._pending_event.set()
+
+    def _write(self, batch: List[Tuple[float, str, Any, Any]]):
+        lines = []
+        for t, direction, module_id, message in batch:
+            try:
+                lines.append(json.dumps(
+                    {"t": round(t, 6), "dir": direction, "module": module_id, "msg": message},
+                    ensure_ascii=False, separators=(",", ":")))
+            except (TypeError, ValueError) as e:
+                print(f"[capture] Message ignoré: {e}")
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open_capture(self.path, "a")
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            self.written += len(lines)
+
+    async def run_writer(self):
+        """Tâche de fond : écrit les messages en attente par lots."""
+        self._pending_event = asyncio.Event()
+        if self._pending:
+            self._pending_event.set()
+        try:
+            while True:
+                await self._pending_event.wait()
+                await asyncio.sleep(self.flush_interval)
+                self._pending_event.clear()
+                batch, self._pending = self._pending, []
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except OSError as e:
+                    print(f"[capture] Erreur écriture capture: {e}")
+        finally:
+            self._pending_event = None
+
+    def close(self):
+        """Écrit ce qui reste et ferme le fichier (arrêt du serveur)."""
+        batch, self._pending = self._pending, []
+        try:
+            self._write(batch)
+        except OSError as e:
+            print(f"[capture] Erreur écriture capture: {e}")
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __repr__(self):
+        return (f"Capture({self.path!r}, written={self.written}, "
+                f"pending={len(self._pending)}, dropped={self.dropped})")
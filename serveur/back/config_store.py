@@ -0,0 +1,223 @@
+# serveur/back/config_store.py
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _dumps(obj) -> bytes:
+    # même rendu que JSONResponse
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ConfigEntry:
+    """Config d'un module parsée une fois, avec sa réponse déjà sérialisée."""
+
+    __slots__ = ("data", "body", "etag", "stamp")
+
+    def __init__(self, data: dict, stamp: Optional[Tuple[int, int]]):
+        self.data = data
+        self.body = _dumps({"config": data})
+        self.etag = _etag(self.body)
+        self.stamp = stamp
+
+
+def _atomic_write(path: str, text: str) -> Tuple[int, int]:
+    """Écrit via un fichier temporaire + rename ; renvoie le nouveau stamp."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigStore:
+    """
+    Cache mémoire des fichiers `configs/module{N}.json`.
+
+    Chaque fichier n'est relu que si son (mtime_ns, taille) a changé : un
+    `os.stat` par requête remplace l'ouverture + le parsing JSON. Les
+    réponses sont servies depuis `body` (bytes) et portent un ETag.
+
+    Les mises à jour (`update`) modifient la mémoire immédiatement ; la
+    tâche `run_writer` écrit ensuite les modules modifiés sur disque, au
+    plus une fois par `flush_interval`, en fusionnant les patchs successifs.
+    """
+
+    def __init__(self, config_dir: str, flush_interval: float = 0.5):
+        self.config_dir = config_dir
+        self.flush_interval = flush_interval
+        self._entries: Dict[str, ConfigEntry] = {}
+        self._listing: Optional[Tuple[int, List[str]]] = None
+        self._all: Optional[Tuple[tuple, bytes, str]] = None
+        # fichiers modifiés en mémoire, pas encore écrits
+        self._dirty: Set[str] = set()
+        self._dirty_event: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, name: str) -> ConfigEntry:
+        """
+        Renvoie l'entrée de `name` (nom de fichier), relue si elle a changé.
+        Lève FileNotFoundError si le fichier n'existe pas, ValueError s'il
+        n'est pas du JSON valide.
+        """
+        entry = self._entries.get(name)
+        if name in self._dirty:
+            # la mémoire fait foi tant que l'écriture n'a pas eu lieu
+            return entry
+        path = os.path.join(self.config_dir, name)
+        try:
+            stamp = self._stamp(path)
+        except FileNotFoundError:
+            self._entries.pop(name, None)
+            raise
+        if entry is not None and entry.stamp == stamp:
+            return entry
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entry = ConfigEntry(data, stamp)
+        self._entries[name] = entry
+        return entry
+
+    def get(self, module: int) -> ConfigEntry:
+        return self._load(f"module{module}.json")
+
+    def cached(self, module: int) -> Optional[ConfigEntry]:
+        """Entrée en mémoire sans accès disque (None si jamais chargée)."""
+        return self._entries.get(f"module{module}.json")
+
+    def preload(self):
+        """Charge toutes les configs (au démarrage, hors requêtes)."""
+        for name in self._names():
+            try:
+                self._load(name)
+            except (FileNotFoundError, ValueError):
+                continue
+
+    def _names(self) -> List[str]:
+        mtime = os.stat(self.config_dir).st_mtime_ns
+        if self._listing is None or self._listing[0] != mtime:
+            names = sorted(n for n in os.listdir(self.config_dir) if n.endswith(".json"))
+            self._listing = (mtime, names)
+        names = self._listing[1]
+        # modules créés en mémoire mais pas encore écrits
+        missing = [n for n in self._dirty if n not in names]
+        return sorted(names + missing) if missing else names
+
+    # ─── écriture différée ───────────────────────────────────────────────────
+    def update(self, module: int, patch: dict) -> ConfigEntry:
+        """
+        Applique `patch` à la config en mémoire et marque le module à écrire.
+        N'accède jamais au disque : l'entrée doit déjà être chargée
+        (sinon la config part de {}).
+        """
+        name = f"module{module}.json"
+        current = self._entries.get(name)
+        data = dict(current.data) if current is not None else {}
+        data.update(patch)
+        entry = ConfigEntry(data, current.stamp if current is not None else None)
+        self._entries[name] = entry
+        self._all = None
+        self._dirty.add(name)
+        if self._dirty_event is not None:
+            self._dirty_event.set()
+        return entry
+
+    def _pending_writes(self) -> List[Tuple[str, ConfigEntry, str]]:
+        # les noms restent dans _dirty jusqu'à l'écriture effective, pour que
+        # _load ne relise pas un fichier en cours de remplacement
+        writes = []
+        for name in sorted(self._dirty):
+            entry = self._entries[name]
+            text = json.dumps(entry.data, ensure_ascii=False, indent=2)
+            writes.append((name, entry, text))
+        return writes
+
+    def _written(self, name: str, entry: ConfigEntry, stamp: Tuple[int, int]):
+        # si un patch est arrivé entre-temps, l'entrée reste à écrire
+        if self._entries.get(name) is entry:
+            entry.stamp = stamp
+            self._dirty.discard(name)
+            self._listing = None
+
+    async def flush(self):
+        """Écrit les modules modifiés (temp + rename) dans un thread."""
+        for name, entry, text in self._pending_writes():
+            path = os.path.join(self.config_dir, name)
+            stamp = await asyncio.to_thread(_atomic_write, path, text)
+            self._written(name, entry, stamp)
+
+    async def run_writer(self):
+        """Tâche de fond : écrit au plus une fois par `flush_interval`."""
+        self._dirty_event = asyncio.Event()
+        if self._dirty:
+            self._dirty_event.set()
+        try:
+            while True:
+                await self._dirty_event.wait()
+                # laisse les patchs d'une rafale s'accumuler
+                await asyncio.sleep(self.flush_interval)
+                self._dirty_event.clear()
+                try:
+                    await self.flush()
+                except OSError as e:
+                    print(f"[config] Erreur écriture config: {e}")
+                    self._dirty_event.set()
+        finally:
+            self._dirty_event = None
+
+    def flush_sync(self):
+        """Écrit ce qui reste en attente (arrêt du serveur)."""
+        for name, entry, text in self._pending_writes():
+            stamp = _atomic_write(os.path.join(self.config_dir, name), text)
+            self._written(name, entry, stamp)
+
+    def get_all(self) -> Tuple[bytes, str]:
+        """Réponse `{"configurations": {...}}` sérialisée et son ETag."""
+        entries = []
+        for name in self._names():
+            try:
+                entries.append((name, self._load(name)))
+            except FileNotFoundError:
+                continue
+        key = tuple((name, e.etag) for name, e in entries)
+        if self._all is None or self._all[0] != key:
+            body = _dumps({"configurations": {name: e.data for name, e in entries}})
+            self._all = (key, body, _etag(body))
+        return self._all[1], self._all[2]
+
+    def invalidate(self, module: Optional[int] = None):
+        """Oublie les entrées propres (les modifications en attente restent)."""
+        if module is None:
+            for name in list(self._entries):
+                if name not in self._dirty:
+                    del self._entries[name]
+            self._listing = None
+        else:
+            name = f"module{module}.json"
+            if name not in self._dirty:
+                self._entries.pop(name, None)
+        self._all = None
@@ -0,0 +1,169 @@
+# serveur/back/diff_log.py
+
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from scene import DIFF_FIELDS, DIFF_KEYS, Scene, item_id
+
+
+class _Entry:
+    """Un diff en attente, compacté au fil des `set` reçus."""
+
+    def __init__(self, snapshot: bool = False, ts: Optional[float] = None, snapshot_keys=()):
+        self.snapshot = snapshot
+        # clés d'ajout toujours présentes dans un snapshot (même vides)
+        self.snapshot_keys = frozenset(k for k, _ in snapshot_keys)
+        # horodatage du plus ancien `set` fusionné dans ce diff
+        self.ts = ts
+        # new_key -> {id: item}, remove_key -> {id: None} (dicts ordonnés)
+        self.added: Dict[str, Dict[Hashable, Any]] = {k: {} for k, _ in DIFF_KEYS}
+        self.removed: Dict[str, Dict[Hashable, None]] = {k: {} for _, k in DIFF_KEYS}
+        # ids ajoutés alors qu'ils n'étaient pas dans la scène : leur
+        # suppression peut être annulée sans laisser de trace
+        self.fresh: Dict[str, set] = {k: set() for k, _ in DIFF_KEYS}
+        # autres clés (button, timerControl, …) : la dernière valeur gagne
+        self.scalars: Dict[str, Any] = {}
+
+    def size(self) -> int:
+        return (
+            sum(len(d) for d in self.added.values())
+            + sum(len(d) for d in self.removed.values())
+        )
+
+    def is_empty(self) -> bool:
+        return not self.snapshot and not self.scalars and self.size() == 0
+
+    def to_payload(self) -> dict:
+        payload: Dict[str, Any] = dict(self.scalars)
+        if self.snapshot:
+            payload["snapshot"] = True
+        for new_key, rm_key in DIFF_KEYS:
+            if self.added[new_key] or new_key in self.snapshot_keys:
+                payload[new_key] = list(self.added[new_key].values())
+            if self.removed[rm_key]:
+                payload[rm_key] = list(self.removed[rm_key].keys())
+        return payload
+
+
+class DiffLog:
+    """
+    File de diffs bornée et compactée pour les modules à diffs cumulatifs.
+
+    Expose la même interface que la `deque` des autres modules
+    (`append`, `popleft`, `len`) :
+      - un `newStrokes` suivi d'un `removeStrokes` du même id s'annulent
+        (idem pour les objets et les fonds) ;
+      - les autres clés (button, timerControl…) gardent la dernière valeur ;
+      - au-delà de `max_entries` diffs ou `max_items` éléments en attente,
+        la file est remplacée par un instantané complet de la scène
+        (`"snapshot": true`), donc jamais plus que O(taille de la scène).
+
+    La scène (`Scene`) est partagée avec le serveur, qui l'applique avant
+    de mettre le diff en file.
+    """
+
+    def __init__(self, scene: Scene, max_entries: int = 16, max_items: int = 2000):
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._entries: deque = deque()
+        self.scene = scene
+
+    def append(
+        self,
+        data: dict,
+        ts: Optional[float] = None,
+        created: Optional[Dict[str, Set[Hashable]]] = None,
+    ):
+        """
+        Met le diff en file (compacté). Appelé après `Scene.apply`, dont
+        `created` est le retour : sans lui, aucune suppression n'est omise.
+        `ts` horodate le `set` d'origine (mesure du délai de livraison).
+        """
+        created = created or {}
+        if not self._entries:
+            self._entries.append(_Entry(ts=ts))
+        entry = self._entries[-1]
+        if entry.ts is None:
+            entry.ts = ts
+
+        for new_key, rm_key in DIFF_KEYS:
+            for item in data.get(new_key) or []:
+                iid = item_id(item)
+                if iid is None:
+                    # sans id on ne peut pas compacter : clé unique
+                    iid = ("_anon", id(item))
+                if iid in entry.removed[rm_key]:
+                    # ré-ajout après suppression : l'ordre compte, on ouvre
+                    # un nouveau diff plutôt que de fusionner
+                    entry = _Entry(ts=ts)
+                    self._entries.append(entry)
+                if entry.snapshot or iid in created.get(new_key, ()):
+                    entry.fresh[new_key].add(iid)
+                entry.added[new_key][iid] = item
+
+            for iid in data.get(rm_key) or []:
+                if not isinstance(iid, Hashable):
+                    continue
+                if self._cancel_pending(new_key, iid) or entry.snapshot:
+                    continue
+                entry.removed[rm_key][iid] = None
+
+        for key, value in data.items():
+            if key not in DIFF_FIELDS:
+                entry.scalars[key] = value
+
+        self._enforce_bounds()
+
+    def _cancel_pending(self, new_key: str, iid: Hashable) -> bool:
+        """
+        Retire l'ajout encore en attente de `iid`. Renvoie True si la
+        suppression devient inutile (l'élément n'a jamais atteint le client).
+        """
+        for entry in reversed(self._entries):
+            if iid in entry.added[new_key]:
+                del entry.added[new_key][iid]
+                if iid in entry.fresh[new_key]:
+                    entry.fresh[new_key].discard(iid)
+                    return True
+                return False
+        return False
+
+    def _enforce_bounds(self):
+        entries = self._entries
+        if len(entries) == 1 and entries[0].snapshot:
+            return
+        pending = sum(e.size() for e in entries)
+        if len(entries) <= self.max_entries and pending <= self.max_items:
+            return
+        stamps = [e.ts for e in entries if e.ts is not None]
+        snap = _Entry(
+            snapshot=True, ts=min(stamps) if stamps else None,
+            snapshot_keys=self.scene.keys
+        )
+        for e in entries:
+            snap.scalars.update(e.scalars)
+        for new_key, _ in self.scene.keys:
+            snap.added[new_key] = dict(self.scene.items[new_key])
+            snap.fresh[new_key] = set(self.scene.items[new_key])
+        entries.clear()
+        entries.append(snap)
+
+    def pop_timed(self) -> Tuple[dict, Optional[float]]:
+        """Comme `popleft`, avec l'horodatage du plus ancien `set` du diff."""
+        while self._entries:
+            entry = self._entries.popleft()
+            if not entry.is_empty():
+                return entry.to_payload(), entry.ts
+        raise IndexError("pop from an empty DiffLog")
+
+    def popleft(self) -> dict:
+        return self.pop_timed()[0]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return sum(1 for e in self._entries if not e.is_empty())
+
+    def __repr__(self) -> str:
+        return f"DiffLog(entries={len(self._entries)}, version={self.scene.version})"
@@ -0,0 +1,119 @@
+# serveur/back/event_stream.py
+"""
+Flux Server-Sent Events (`GET /stream?module=…`) pour les consommateurs
+en lecture seule (dashboard, bornes).
+
+Chaque mise à jour est encodée une seule fois en événement SSE
+(`id:` + `data:` JSON) et la même chaîne d'octets est mise dans la file
+de chaque auditeur. Comme pour les abonnés /ws, la file est bornée : un
+auditeur en retard ne garde que le dernier état (modules 1–3) ou reçoit
+un snapshot à la place des diffs perdus (modules à scène).
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from topics import LATEST_ONLY, POLICIES
+
+# délai de reconnexion suggéré au navigateur (ms)
+RETRY_MS = 2000
+
+
+def encode_event(message: dict, event_id: Optional[str] = None) -> bytes:
+    """Un événement SSE ; sans id, le navigateur garde le dernier reçu."""
+    data = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}data: {data}\n\n".encode("utf-8")
+
+
+class StreamListener:
+    def __init__(
+        self,
+        module_id: int,
+        policy: str,
+        maxsize: int = 64,
+        resync: Optional[Callable[[], bytes]] = None,
+        on_drop: Optional[Callable[[int], None]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue: {policy}")
+        self.module_id = module_id
+        self.policy = policy
+        self.maxsize = 1 if policy == LATEST_ONLY else max(1, maxsize)
+        self.dropped = 0
+        self._resync = resync
+        self._on_drop = on_drop
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def offer(self, event: bytes):
+        if len(self._queue) >= self.maxsize:
+            if self.policy == LATEST_ONLY:
+                self._drop(len(self._queue))
+                self._queue.clear()
+            elif self._resync is not None:
+                # la scène contient déjà cet événement : le snapshot le remplace
+                self._drop(len(self._queue) + 1)
+                self._queue.clear()
+                event = self._resync()
+            else:
+                self._drop(1)
+                self._queue.popleft()
+        self._queue.append(event)
+        self._wakeup.set()
+
+    def _drop(self, n: int):
+        self.dropped += n
+        if self._on_drop is not None:
+            self._on_drop(n)
+
+    async def events(self, keepalive: float) -> AsyncIterator[bytes]:
+        """Corps de la réponse : ce qui est en file, par paquets."""
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    # commentaire SSE : garde la connexion ouverte (proxys)
+                    yield b": keepalive\n\n"
+                    continue
+            events = b"".join(self._queue)
+            self._queue.clear()
+            yield events
+
+
+class EventStreams:
+    """Auditeurs SSE par module."""
+
+    def __init__(self):
+        self.listeners: Dict[int, Set[StreamListener]] = {}
+
+    def add(self, listener: StreamListener):
+        self.listeners.setdefault(listener.module_id, set()).add(listener)
+
+    def remove(self, listener: StreamListener):
+        listeners = self.listeners.get(listener.module_id)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del self.listeners[listener.module_id]
+
+    def publish(self, module_id: int, message: dict, event_id: Optional[str] = None) -> int:
+        """Encode `message` une fois et le met en file de chaque auditeur."""
+        listeners = self.listeners.get(module_id)
+        if not listeners:
+            return 0
+        event = encode_event(message, event_id)
+        for listener in listeners:
+            listener.offer(event)
+        return len(listeners)
+
+    def __repr__(self):
+        return f"EventStreams({ {m: len(ls) for m, ls in self.listeners.items()} })"
@@ -0,0 +1,211 @@
+# serveur/back/journal.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config_store import _atomic_write
+
+CHECKPOINT_FILE = "checkpoint.json"
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}"
+
+
+class Journal:
+    """
+    Journal append-only des `set` appliqués, pour retrouver `buffer` et les
+    scènes après un redémarrage.
+
+    `append` ne fait que mettre l'entrée en attente (sur la boucle) ; la
+    tâche `run_writer` sérialise et écrit les lots dans un thread, avec un
+    seul fsync par lot. Tous les `checkpoint_every` entrées (ou toutes les
+    `checkpoint_interval` s), l'état complet est écrit dans
+    `checkpoint.json` et les segments précédents sont supprimés : au
+    démarrage, on ne rejoue que le checkpoint et la fin du journal.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 0.2,
+        checkpoint_every: int = 2000,
+        checkpoint_interval: float = 60.0,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.seq = 0
+        # (seq, module_id, data) en attente d'écriture
+        self._pending: List[Tuple[int, Any, Any]] = []
+        self._pending_event: Optional[asyncio.Event] = None
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        # fichier ouvert par le thread d'écriture (flush_sync peut courir
+        # pendant qu'un lot annulé termine encore dans son thread)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._checkpoint_seq = 0
+
+    # ─── relecture (démarrage) ───────────────────────────────────────────────
+    def _segments(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            n for n in names
+            if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+
+    def load(self) -> Tuple[Optional[dict], List[Tuple[Any, Any]]]:
+        """
+        Lit le dernier checkpoint et les entrées postérieures. Renvoie
+        (état du checkpoint ou None, [(module_id, data), ...]).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        checkpoint = None
+        last_seq = 0
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            last_seq = self._checkpoint_seq = checkpoint["seq"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            print(f"[journal] Checkpoint illisible, relecture complète: {e}")
+            checkpoint = None
+
+        entries = []
+        for seq, module_id, data in self._read_entries():
+            if seq <= last_seq:
+                continue
+            entries.append((module_id, data))
+            last_seq = seq
+        self.seq = last_seq
+        return checkpoint, entries
+
+    def _read_entries(self) -> Iterator[Tuple[int, Any, Any]]:
+        for name in self._segments():
+            with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        yield entry["seq"], entry["module"], entry["data"]
+                    except (ValueError, KeyError):
+                        # ligne tronquée par un arrêt brutal
+                        continue
+
+    # ─── écriture ────────────────────────────────────────────────────────────
+    def append(self, module_id: Any, data: Any):
+        self.seq += 1
+        self._pending.append((self.seq, module_id, data))
+        if self._pending_event is not None:
+            self._pending_event.set()
+
+    def _checkpoint_due(self) -> bool:
+        return (
+            self._since_checkpoint >= self.checkpoint_every
+            or (self._since_checkpoint
+                and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval)
+        )
+
+    def _take(self, snapshot: Callable[[], dict], force_checkpoint: bool = False):
+        """
+        Prend le lot en attente et, si un checkpoint est dû, l'état courant :
+        les deux sont capturés ensemble, sur la boucle.
+        """
+        batch, self._pending = self._pending, []
+        self._since_checkpoint += len(batch)
+        state = None
+        if self._since_checkpoint and (force_checkpoint or self._checkpoint_due()):
+            state = snapshot()
+            state["seq"] = self.seq
+            self._since_checkpoint = 0
+            self._last_checkpoint = time.monotonic()
+        return batch, state
+
+    def _write(self, batch: List[Tuple[int, Any, Any]], state: Optional[dict]):
+        """Écrit le lot (un fsync), puis le checkpoint éventuel (thread)."""
+        with self._lock:
+            if batch:
+                lines = []
+                for seq, module_id, data in batch:
+                    try:
+                        lines.append(json.dumps(
+                            {"seq": seq, "module": module_id, "data": data},
+                            ensure_ascii=False, separators=(",", ":")))
+                    except (TypeError, ValueError) as e:
+                        print(f"[journal] Entrée {seq} ignorée: {e}")
+                if self._segment is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    path = os.path.join(self.directory, _segment_name(batch[0][0]))
+                    self._segment = open(path, "a", encoding="utf-8")
+                self._segment.write("\n".join(lines) + "\n")
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+            if state is not None:
+                self._write_checkpoint(state)
+
+    def _write_checkpoint(self, state: dict):
+        if state["seq"] <= self._checkpoint_seq:
+            # lot annulé qui termine après un checkpoint plus récent
+            return
+        self._checkpoint_seq = state["seq"]
+        text = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        _atomic_write(os.path.join(self.directory, CHECKPOINT_FILE), text)
+        # tout ce qui précède est dans le checkpoint : nouveau segment
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        for name in self._segments():
+            os.unlink(os.path.join(self.directory, name))
+
+    async def run_writer(self, snapshot: Callable[[], dict]):
+        """
+        Tâche de fond : écrit les entrées en attente au plus une fois par
+        `flush_interval`. `snapshot()` renvoie l'état à mettre en checkpoint.
+        """
+        self._pending_event = asyncio.Event()
+        if self._pending:
+            self._pending_event.set()
+        try:
+            while True:
+                await self._pending_event.wait()
+                # regroupe une rafale de set en un seul fsync
+                await asyncio.sleep(self.flush_interval)
+                self._pending_event.clear()
+                batch, state = self._take(snapshot)
+                try:
+                    await asyncio.to_thread(self._write, batch, state)
+                except OSError as e:
+                    print(f"[journal] Erreur écriture journal: {e}")
+        finally:
+            self._pending_event = None
+
+    def flush_sync(self, snapshot: Callable[[], dict]):
+        """Écrit ce qui reste et un checkpoint final (arrêt du serveur)."""
+        batch, state = self._take(snapshot, force_checkpoint=True)
+        self._write(batch, state)
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def __repr__(self):
+        return f"Journal({self.directory!r}, seq={self.seq}, pending={len(self._pending)})"
+
+
+def restore_buffer(checkpoint: Optional[dict]) -> Dict[Any, Any]:
+    """`buffer` enregistré dans un checkpoint (paires [module, data])."""
+    if not checkpoint:
+        return {}
+    return {module_id: data for module_id, data in checkpoint.get("buffer", [])}
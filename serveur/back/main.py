@@ -2,27 +2,57 @@
 
 import asyncio
 import json
-import mimetypes
 import os
 import time
 from contextlib import suppress
-from typing import Dict
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from collections import deque
 
 from fastapi import (
-    Body, FastAPI, HTTPException, Query, WebSocket,
+    Body, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket,
     WebSocketDisconnect
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import (
+    FileResponse, HTMLResponse, JSONResponse, PlainTextResponse,
+    StreamingResponse
+)
+
+from asset_catalog import (
+    IMMUTABLE, REVALIDATE, Asset, AssetCatalog, iter_file, parse_range
+)
+from capture import Capture
+from config_store import ConfigStore
+from diff_log import DiffLog
+from event_stream import EventStreams, StreamListener, encode_event
+from journal import Journal, restore_buffer
+from metrics import Registry, module_label
+from outbox import ACKS_ALL, Outbox
+from publish_scheduler import PublishScheduler
+from schemas import SchemaError, check_frame, validate_message
+from scene import Scene
+from state_backend import make_backend
+from topics import DROP_OLDEST, LATEST_ONLY, POLICIES, Subscriber, Topic
+from tracing import CATEGORIES, Tracer, parse_rates
+from wire_codec import JSON_CODEC, Frame, negotiate
+
+
+def label_of(module_id) -> str:
+    """Label `module` des métriques et des traces : modules configurés seulement."""
+    return module_label(module_id, diff_queues)
+
 
 # ─── Gestion du mode debug ──────────────────────────────────────────────────
+# BACK_DEBUG=true active toutes les catégories ; BACK_TRACE permet un
+# réglage fin, ex. "ws.in=0.01,ws.set=1" (modifiable ensuite via POST /trace)
 DEBUG = os.getenv("BACK_DEBUG", "false").lower() in ("1", "true", "yes")
-
-def debug_print(*args, **kwargs):
-    if DEBUG:
-        print(*args, **kwargs)
+tracer = Tracer(
+    parse_rates("*" if DEBUG else os.getenv("BACK_TRACE", "")),
+    ring_size=int(os.getenv("BACK_TRACE_RING", "100")),
+    label=label_of
+)
+trace = tracer.trace
 # ─────────────────────────────────────────────────────────────────────────────
 
 app = FastAPI()
@@ -34,12 +64,6 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
-# Monte le dossier assets en /assets
-app.mount(
-    "/assets",
-    StaticFiles(directory="assets"),
-    name="assets"
-)
 
 # --------------------------------------------------
 # Configuration des endpoints REST
@@ -48,9 +72,118 @@ app.mount(
 CONFIG_DIR = "configs"
 DEFAULT_BUFFER_FILE = "assets/default_buffer.json"
 
+# configs parsées une fois, relues seulement si le fichier change
+config_store = ConfigStore(CONFIG_DIR)
+
+ASSETS_DIR = "assets"
+
+# index des assets (taille, mime, hash), rafraîchi en tâche de fond
+asset_catalog = AssetCatalog(ASSETS_DIR)
+
 # buffer global (un dict par module_id)
 buffer: Dict[int, dict] = {1: {}, 2: {}, 3: {}, 4: {}, 41: {}}
 
+# version de buffer[module], +1 à chaque set (ETag, GET /buffer?since=…)
+buffer_versions: Dict[int, int] = {}
+# requêtes GET /buffer en attente d'une nouvelle version, par module ;
+# l'Event n'existe que s'il y a quelqu'un à réveiller
+_buffer_waiters: Dict[int, asyncio.Event] = {}
+# distingue les suites de versions d'un processus à l'autre : après un
+# redémarrage, les versions repartent (ou reprennent du journal) mais ne
+# désignent plus forcément le même contenu. Partagée par les workers via
+# le checkpoint du backend Redis, dont les versions sont identiques.
+buffer_epoch = os.urandom(4).hex()
+
+
+def bump_buffer_version(module_id):
+    buffer_versions[module_id] = buffer_versions.get(module_id, 0) + 1
+    event = _buffer_waiters.pop(module_id, None)
+    if event is not None:
+        event.set()
+
+
+async def wait_buffer_change(module_id: int, version: int, timeout: float) -> bool:
+    """Attend que buffer[module] dépasse `version` ; False si le délai expire."""
+    if buffer_versions.get(module_id, 0) != version:
+        return True
+    event = _buffer_waiters.get(module_id)
+    if event is None:
+        event = _buffer_waiters[module_id] = asyncio.Event()
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+def buffer_etag(module_id: int, version: int) -> str:
+    return f'"b{module_id}-{buffer_epoch}-{version}"'
+
+
+def parse_buffer_since(module_id: int, since: str) -> Optional[int]:
+    """
+    Version désignée par un `since` au format ETag (guillemets facultatifs) ;
+    None s'il vient d'une autre époque, d'un autre module ou est mal formé.
+    """
+    prefix = f"b{module_id}-{buffer_epoch}-"
+    token = since.strip().strip('"')
+    if not token.startswith(prefix):
+        return None
+    try:
+        return int(token[len(prefix):])
+    except ValueError:
+        return None
+
+
+def scene_since(version: int) -> str:
+    """Jeton `since` d'une version de scène : `<époque>-<version>`."""
+    return f"{buffer_epoch}-{version}"
+
+
+def parse_scene_since(since: Any) -> Optional[int]:
+    """
+    Version de scène désignée par un jeton `since` ; None s'il vient d'une
+    autre époque ou n'est pas un jeton (entier des anciens clients).
+    """
+    if type(since) is not str:
+        return None
+    epoch, _, version = since.partition("-")
+    if epoch != buffer_epoch:
+        return None
+    try:
+        return int(version)
+    except ValueError:
+        return None
+
+
+@app.on_event("startup")
+async def start_config_store():
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    await asyncio.to_thread(config_store.preload)
+    app.state.config_writer = asyncio.create_task(config_store.run_writer())
+
+
+@app.on_event("shutdown")
+async def stop_config_store():
+    app.state.config_writer.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.config_writer
+    # écrit les derniers patchs en attente
+    config_store.flush_sync()
+
+
+@app.on_event("startup")
+async def start_asset_catalog():
+    await asyncio.to_thread(asset_catalog.scan)
+    app.state.asset_refresher = asyncio.create_task(asset_catalog.run_refresher())
+
+
+@app.on_event("shutdown")
+async def stop_asset_catalog():
+    app.state.asset_refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.asset_refresher
+
 
 @app.on_event("startup")
 async def load_default_buffer():
@@ -60,41 +193,51 @@ async def load_default_buffer():
             with open(DEFAULT_BUFFER_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
             buffer = {int(k): v for k, v in data.items()}
-            debug_print(f"[startup] default buffer chargé pour modules: {list(buffer.keys())}")
+            trace("startup", "default buffer chargé pour modules: %s", list(buffer.keys()))
         except Exception as e:
-            debug_print(f"[startup] Erreur en chargeant {DEFAULT_BUFFER_FILE}: {e}")
+            trace("startup", "Erreur en chargeant %s: %s", DEFAULT_BUFFER_FILE, e)
     else:
-        debug_print(f"[startup] Aucun default buffer ({DEFAULT_BUFFER_FILE}) trouvé, buffer vide.")
+        trace("startup", "Aucun default buffer (%s) trouvé, buffer vide.", DEFAULT_BUFFER_FILE)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Évalue un en-tête If-None-Match (liste d'ETags, faibles acceptés, ou *)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cached_json(body: bytes, etag: str, if_none_match: str = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body,
+        media_type="application/json; charset=utf-8",
+        headers=headers
+    )
 
 
 @app.get("/config")
-async def get_config(module: int = None):
+async def get_config(
+    module: int = None,
+    if_none_match: str = Header(None)
+):
     if module is not None:
-        file_path = os.path.join(CONFIG_DIR, f"module{module}.json")
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Fichier de config introuvable")
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-            return JSONResponse(
-                content={"config": cfg},
-                media_type="application/json; charset=utf-8"
-            )
+            entry = config_store.get(module)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Fichier de config introuvable")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erreur lecture fichier: {e}")
+        return cached_json(entry.body, entry.etag, if_none_match)
     # sinon, renvoyer tout
-    all_configs = {}
     try:
-        for name in os.listdir(CONFIG_DIR):
-            if name.endswith(".json"):
-                with open(os.path.join(CONFIG_DIR, name), "r", encoding="utf-8") as f:
-                    all_configs[name] = json.load(f)
-        return JSONResponse(
-            content={"configurations": all_configs},
-            media_type="application/json; charset=utf-8"
-        )
+        body, etag = config_store.get_all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lecture configurations: {e}")
+    return cached_json(body, etag, if_none_match)
 
 
 @app.post("/config")
@@ -102,31 +245,20 @@ async def update_config(
     module: int = Query(..., description="ID du module à configurer"),
     payload: dict = Body(..., description="Clés à mettre à jour dans la config")
 ):
-    file_path = os.path.join(CONFIG_DIR, f"module{module}.json")
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-
-    if os.path.exists(file_path):
+    # Ne touche jamais le disque sur la boucle d'évènements : la config est
+    # modifiée en mémoire puis écrite en tâche de fond (config_store.run_writer)
+    if config_store.cached(module) is None:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-        except Exception as e:
+            await asyncio.to_thread(config_store.get, module)
+        except FileNotFoundError:
+            pass  # nouveau module : la config part de {}
+        except ValueError as e:
             raise HTTPException(status_code=500, detail=f"Erreur lecture config: {e}")
-    else:
-        cfg = {}
-
-    cfg.update(payload)
 
-    try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur écriture config: {e}")
-
-    return JSONResponse(
-        status_code=200,
-        content={"config": cfg},
-        media_type="application/json; charset=utf-8"
-    )
+    entry = config_store.update(module, payload)
+    # un changement de fps s'applique tout de suite à la publication
+    configure_scheduler(module, entry.data)
+    return cached_json(entry.body, entry.etag)
 
 
 @app.get("/history")
@@ -138,186 +270,888 @@ async def get_history():
 
 
 @app.get("/buffer")
-async def get_buffer(module: int = Query(..., description="ID du module")):
+async def get_buffer(
+    module: int = Query(..., description="ID du module"),
+    since: Optional[str] = Query(None, description="ETag déjà connu (champ `etag`) : attend la version suivante"),
+    timeout: float = Query(25.0, ge=0, le=60, description="attente max (s) avec since"),
+    if_none_match: str = Header(None)
+):
     """
-    Renvoie la dernière donnée du buffer pour le module donné.
+    Renvoie la dernière donnée du buffer pour le module donné, avec sa
+    version et son ETag. Avec `since=<etag>`, la requête reste ouverte
+    jusqu'à ce qu'une version plus récente existe (ou `timeout` s, puis
+    304). Un `since` d'une autre époque (serveur redémarré) reçoit tout de
+    suite le buffer complet. 304 aussi si If-None-Match correspond à la
+    version courante.
     """
     if module not in buffer:
         raise HTTPException(status_code=404, detail=f"Module {module} introuvable")
+    known = parse_buffer_since(module, since) if since is not None else None
+    if known is not None:
+        await wait_buffer_change(module, known, timeout)
+    version = buffer_versions.get(module, 0)
+    etag = buffer_etag(module, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if known == version or etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
     # log pour debug
-    debug_print(f"[HTTP] GET /buffer?module={module}  → {buffer[module]!r}")
+    trace("http", "GET /buffer?module=%s  → v%d %r", module, version, buffer[module])
     return JSONResponse(
-        content={"buffer": buffer[module]},
-        media_type="application/json; charset=utf-8"
+        content={"buffer": buffer[module], "version": version, "etag": etag},
+        media_type="application/json; charset=utf-8",
+        headers=headers
+    )
+
+
+def serve_asset(asset: Asset, request: Request) -> Response:
+    """
+    Sert un asset indexé : ETag fort (hash du contenu), `immutable` si l'URL
+    porte le bon `?v=<hash>`, 304 sur If-None-Match et 206 sur Range.
+    En HEAD, mêmes statut et en-têtes que le GET, sans corps.
+    """
+    immutable = request.query_params.get("v") == asset.digest
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != asset.etag:
+        # la copie du client est périmée : on renvoie tout le fichier
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, asset.size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{asset.size}"
+        return Response(status_code=416, headers=headers)
+
+    head = request.method == "HEAD"
+    if byte_range is None:
+        if head:
+            headers["Content-Length"] = str(asset.size)
+            return Response(media_type=asset.mime, headers=headers)
+        return FileResponse(asset.path, media_type=asset.mime, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+    headers["Content-Length"] = str(length)
+    if head:
+        return Response(status_code=206, media_type=asset.mime, headers=headers)
+    return StreamingResponse(
+        iter_file(asset.path, start, length),
+        status_code=206,
+        media_type=asset.mime,
+        headers=headers
     )
 
 
+# HEAD comme l'ancien montage StaticFiles (sondes, revalidation des caches)
+@app.api_route("/assets/{path:path}", methods=["GET", "HEAD"])
+async def get_static_asset(path: str, request: Request):
+    # re-stat avant d'envoyer : fichier modifié ou ajouté depuis le scan
+    asset = await asyncio.to_thread(asset_catalog.lookup, path)
+    if asset is None:
+        raise HTTPException(404, "Asset non trouvé")
+    return serve_asset(asset, request)
+
+
 @app.get("/getAsset")
 async def get_asset(
+    request: Request,
     module: int = Query(..., description="Numéro du module"),
     path: str  = Query(..., description="Chemin relatif vers l'asset dans le dossier du module")
 ):
     """
     Renvoie le fichier situé dans assets/module{module}/{path}
     """
-    base_dir = os.path.abspath(os.path.join("assets", f"module{module}"))
+    base_dir = os.path.abspath(os.path.join(ASSETS_DIR, f"module{module}"))
     normalized = os.path.normpath(path)
     full_path = os.path.abspath(os.path.join(base_dir, normalized))
 
     if not full_path.startswith(base_dir + os.sep):
         raise HTTPException(400, "Chemin invalide")
-    if not os.path.isfile(full_path):
+    rel = os.path.relpath(full_path, asset_catalog.root).replace(os.sep, "/")
+    asset = await asyncio.to_thread(asset_catalog.lookup, rel)
+    if asset is None:
         raise HTTPException(404, "Asset non trouvé")
+    return serve_asset(asset, request)
 
-    media_type, _ = mimetypes.guess_type(full_path)
-    return FileResponse(full_path, media_type=media_type)
-
-MEDIA_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.mp4', '.webm', '.mov')
 
 @app.get("/media")
 async def get_media(module: int = Query(..., description="ID du module")):
     """
     Retourne la liste des médias (audio / vidéo) disponibles pour un module donné.
     On suppose que les fichiers sont dans assets/module{module}/
+    Les URL sont versionnées (`?v=<hash>`) et donc cachables indéfiniment.
     """
-    base_dir = os.path.join("assets", f"module{module}")
-    if not os.path.isdir(base_dir):
+    if not asset_catalog.has_module_dir(module):
         # si le dossier assets/module{module} n’existe pas, levons un 404
         raise HTTPException(status_code=404, detail=f"Dossier assets/module{module} introuvable")
-    
-    medias = []
-    for filename in os.listdir(base_dir):
-        # Ne lister que les fichiers audio ou vidéo (extensions courantes)
-        if filename.lower().endswith(MEDIA_EXTENSIONS):
-            # Déduit le mime-type du fichier (audio/mpeg, video/mp4, etc.)
-            mime_type, _ = mimetypes.guess_type(filename)
-            if not mime_type:
-                # Si on n’arrive pas à deviner, passer au suivant
-                continue
-
-            medias.append({
-                "title": filename,
-                "type": mime_type,
-                # L’URL qu’on renverra sera récupérable via l’endpoint statique `/assets/…`
-                # C’est-à-dire : /assets/module{module}/{filename}
-                "url": f"/assets/module{module}/{filename}"
-            })
-
-    return JSONResponse(content={"medias": medias})
+    return JSONResponse(content={"medias": asset_catalog.media(module)})
 
 
 # --------------------------------------------------
 # Gestion des connexions WebSocket
 # --------------------------------------------------
 
+# politique de file par abonné ; les modules 1, 2, 3 envoient un état
+# complet à chaque set, seul le dernier compte
+SUBSCRIBER_POLICIES: Dict[int, str] = {
+    1: LATEST_ONLY,
+    2: LATEST_ONLY,
+    3: LATEST_ONLY,
+}
+SUBSCRIBER_QUEUE_SIZE = 64
+# réponses en attente d'envoi par connexion (voir outbox.Outbox)
+OUTBOX_SIZE = 256
+
+# heartbeat serveur : "ping" texte toutes les HEARTBEAT_INTERVAL s, une
+# socket muette depuis HEARTBEAT_TIMEOUT s est fermée (0 = désactivé)
+HEARTBEAT_INTERVAL = float(os.getenv("ARTINEO_HEARTBEAT_INTERVAL", "3"))
+HEARTBEAT_TIMEOUT = float(os.getenv("ARTINEO_HEARTBEAT_TIMEOUT", "9"))
+
+# taille maximale d'une trame reçue (octets, ou caractères en texte) ;
+# au-delà, refusée sans être décodée (0 = pas de limite)
+MAX_FRAME_BYTES = int(os.getenv("ARTINEO_MAX_FRAME_BYTES", str(1 << 20)))
+
+
 class ConnectionManager:
+    """
+    Registre des topics, un par module_id. Un module peut avoir plusieurs
+    producteurs et plusieurs abonnés ; chaque abonné a sa propre file de
+    sortie bornée (voir `topics.Subscriber`). L'index inverse
+    socket → modules évite de parcourir tous les topics à la déconnexion.
+    """
+
     def __init__(self):
-        self.active: Dict[int, WebSocket] = {}
+        self.topics: Dict[int, Topic] = {}
+        self._modules_by_ws: Dict[WebSocket, Set[int]] = {}
         self._last_pong_time: Dict[int, float] = {}
+        # dernière trame reçue par socket (time.monotonic), pour le heartbeat
+        self._last_seen: Dict[WebSocket, float] = {}
+        # codec négocié pour chaque socket (JSON par défaut)
+        self.codecs: Dict[WebSocket, object] = {}
+        # file de réponses de chaque socket, vidée par sa propre tâche
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+
+    async def connect(self, ws: WebSocket) -> Outbox:
+        codec = negotiate(ws.scope.get("subprotocols", ()))
+        await ws.accept(subprotocol=codec.subprotocol)
+        self.codecs[ws] = codec
+        self._last_seen[ws] = time.monotonic()
+
+        async def send(sock: WebSocket, frame: Frame, label: str, ts: Optional[float]):
+            await send_frame(sock, frame, label)
+            if ts is not None:
+                metric_delivery.observe(label, time.perf_counter() - ts)
+
+        outbox = self.outboxes[ws] = Outbox(
+            ws, codec, send,
+            maxsize=OUTBOX_SIZE,
+            acks=ws.query_params.get("acks", ACKS_ALL),
+            on_drop=metric_outbox_dropped.inc
+        )
+        return outbox
+
+    def touch(self, ws: WebSocket):
+        self._last_seen[ws] = time.monotonic()
 
-    async def connect(self, ws: WebSocket):
-        await ws.accept()
+    def _attach(self, module_id: int, ws: WebSocket) -> Topic:
+        topic = self.topics.get(module_id)
+        if topic is None:
+            topic = self.topics[module_id] = Topic(module_id)
+        self._modules_by_ws.setdefault(ws, set()).add(module_id)
+        return topic
 
     def register(self, module_id: int, ws: WebSocket):
-        self.active[module_id] = ws
+        self._attach(module_id, ws).peers.add(ws)
         self._last_pong_time[module_id] = time.time()
 
+    def modules(self):
+        """Modules ayant au moins une socket connectée."""
+        return [mid for mid, topic in self.topics.items() if topic.peers]
+
+    def modules_of(self, ws: WebSocket) -> Set[int]:
+        return self._modules_by_ws.get(ws, set())
+
     def disconnect(self, ws: WebSocket):
-        for mid, sock in list(self.active.items()):
-            if sock is ws:
-                del self.active[mid]
-                del self._last_pong_time[mid]
+        for mid in self._modules_by_ws.pop(ws, ()):
+            topic = self.topics.get(mid)
+            if topic is None:
+                continue
+            topic.peers.discard(ws)
+            sub = topic.subscribers.pop(ws, None)
+            if sub is not None:
+                sub.close()
+            if not topic.peers:
+                self._last_pong_time.pop(mid, None)
+            if not topic:
+                del self.topics[mid]
+        self.codecs.pop(ws, None)
+        self._last_seen.pop(ws, None)
+        outbox = self.outboxes.pop(ws, None)
+        if outbox is not None:
+            outbox.close()
+
+    def subscribe(
+        self,
+        module_id: int,
+        ws: WebSocket,
+        policy: Optional[str] = None,
+        resync=None
+    ) -> Subscriber:
+        """
+        Abonne `ws` au module (remplace un abonnement existant). `policy`
+        vient du client ; à défaut, celle du module (SUBSCRIBER_POLICIES).
+        """
+        topic = self._attach(module_id, ws)
+        old = topic.subscribers.pop(ws, None)
+        if old is not None:
+            old.close()
+        if policy not in POLICIES:
+            policy = SUBSCRIBER_POLICIES.get(module_id, DROP_OLDEST)
+        label = label_of(module_id)
+
+        async def send(sock: WebSocket, frame: Frame, ts: Optional[float]):
+            await send_frame(sock, frame, label)
+            if ts is not None:
+                metric_delivery.observe(label, time.perf_counter() - ts)
+
+        sub = Subscriber(
+            ws, module_id, self.codecs.get(ws, JSON_CODEC), send,
+            policy=policy,
+            maxsize=SUBSCRIBER_QUEUE_SIZE,
+            resync=resync,
+            on_drop=lambda n: metric_dropped.inc(label, n),
+            on_error=self._subscriber_failed
+        )
+        topic.subscribers[ws] = sub
+        return sub
+
+    def _subscriber_failed(self, sub: Subscriber):
+        topic = self.topics.get(sub.module_id)
+        if topic is not None and topic.subscribers.get(sub.ws) is sub:
+            self.unsubscribe(sub.module_id, sub.ws)
+
+    def unsubscribe(self, module_id: int, ws: WebSocket):
+        topic = self.topics.get(module_id)
+        if topic is None:
+            return
+        sub = topic.subscribers.pop(ws, None)
+        if sub is not None:
+            sub.close()
+        if not topic:
+            del self.topics[module_id]
+
+    def publish(
+        self, module_id: int, message: dict, ts: Optional[float] = None
+    ) -> int:
+        """
+        Met `message` dans la file de chaque abonné du module, sans attendre
+        les envois. Le message est encodé une seule fois par codec utilisé.
+        Renvoie le nombre d'abonnés. `ts` (perf_counter du `set`) alimente
+        la mesure du délai de livraison.
+        """
+        topic = self.topics.get(module_id)
+        if topic is None or not topic.subscribers:
+            return 0
+        frames: Dict[str, Frame] = {}
+        for sub in topic.subscribers.values():
+            frame = frames.get(sub.codec.name)
+            if frame is None:
+                frame = frames[sub.codec.name] = sub.codec.encode(message)
+            sub.offer(frame, ts)
+        return len(topic.subscribers)
+
+    async def _ping(self, ws: WebSocket, timeout: float):
+        try:
+            await asyncio.wait_for(send_frame(ws, "ping"), timeout)
+        except Exception:
+            await self.close_dead(ws)
+
+    async def broadcast_ping(self, timeout: float = HEARTBEAT_TIMEOUT):
+        """Envoie "ping" à toutes les sockets en parallèle."""
+        await asyncio.gather(
+            *(self._ping(ws, timeout) for ws in list(self._last_seen)),
+            return_exceptions=True
+        )
 
-    async def broadcast_ping(self):
-        for ws in list(self.active.values()):
-            with suppress(Exception):
-                await ws.send_text("ping")
+    async def close_dead(self, ws: WebSocket):
+        """Libère tout de suite abonnements et files, puis ferme la socket."""
+        self.disconnect(ws)
+        with suppress(Exception):
+            await asyncio.wait_for(ws.close(code=1001), 1.0)
+
+    async def run_heartbeat(
+        self,
+        interval: float = HEARTBEAT_INTERVAL,
+        timeout: float = HEARTBEAT_TIMEOUT
+    ):
+        """
+        Tâche de fond : ferme les sockets sans trafic depuis `timeout` s,
+        puis pingue les autres. Toute trame reçue (dont "pong") compte.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            dead = [ws for ws, seen in self._last_seen.items() if now - seen > timeout]
+            if dead:
+                await asyncio.gather(*(self.close_dead(ws) for ws in dead))
+            await self.broadcast_ping(timeout)
 
     def record_pong(self, module_id: int):
         self._last_pong_time[module_id] = time.time()
 
+    def pong(self, ws: WebSocket):
+        """
+        "pong" reçu : via l'index inverse, sans parcourir les topics. Seuls
+        les modules dont la socket est un pair sont vivants grâce à elle,
+        pas ceux auxquels elle est seulement abonnée.
+        """
+        for mid in self.modules_of(ws):
+            topic = self.topics.get(mid)
+            if topic is not None and ws in topic.peers:
+                self.record_pong(mid)
+
+
+async def send_frame(ws: WebSocket, frame: Frame, label: str = "none"):
+    t0 = time.perf_counter()
+    if isinstance(frame, bytes):
+        await ws.send_bytes(frame)
+    else:
+        await ws.send_text(frame)
+    metric_send.observe(label, time.perf_counter() - t0)
+    metric_msgs_out.inc(label)
+    metric_bytes_out.inc(label, len(frame))
+
+
+async def receive_frame(ws: WebSocket) -> Frame:
+    """Comme `receive_text`, mais accepte aussi les trames binaires."""
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    text = message.get("text")
+    return text if text is not None else message.get("bytes", b"")
+
 
 manager = ConnectionManager()
 
+
+@app.on_event("startup")
+async def start_heartbeat():
+    app.state.heartbeat = None
+    if HEARTBEAT_INTERVAL > 0:
+        app.state.heartbeat = asyncio.create_task(manager.run_heartbeat())
+
+
+@app.on_event("shutdown")
+async def stop_heartbeat():
+    if app.state.heartbeat is not None:
+        app.state.heartbeat.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.heartbeat
+
+# ─── métriques (exposées sur /metrics) ─────────────────────────────────────
+metrics = Registry()
+metric_msgs_in = metrics.counter(
+    "artineo_ws_messages_in_total", "Messages WebSocket reçus")
+metric_msgs_out = metrics.counter(
+    "artineo_ws_messages_out_total", "Messages WebSocket envoyés")
+metric_bytes_in = metrics.counter(
+    "artineo_ws_payload_bytes_in_total",
+    "Taille des messages reçus (caractères pour les trames texte)")
+metric_bytes_out = metrics.counter(
+    "artineo_ws_payload_bytes_out_total",
+    "Taille des messages envoyés (caractères pour les trames texte)")
+metric_send = metrics.histogram(
+    "artineo_ws_send_seconds", "Durée d'un envoi WebSocket")
+metric_delivery = metrics.histogram(
+    "artineo_set_to_delivery_seconds",
+    "Délai entre un set et sa livraison au consommateur (get ou push)")
+metric_rejected = metrics.counter(
+    "artineo_ws_rejected_total",
+    "Messages refusés (trame trop grosse, module inconnu, data hors schéma)")
+metric_outbox_dropped = metrics.counter(
+    "artineo_ws_outbox_dropped_total",
+    "Réponses jetées faute de place dans la file de sortie d'une connexion")
+metric_dropped = metrics.counter(
+    "artineo_subscriber_dropped_total",
+    "Messages jetés faute de place dans la file d'un abonné")
+metrics.gauge(
+    "artineo_subscriber_queue_depth", "Messages en attente dans les files des abonnés",
+    lambda: {
+        label_of(mid): sum(len(s) for s in topic.subscribers.values())
+        for mid, topic in manager.topics.items() if topic.subscribers
+    })
+metrics.gauge(
+    "artineo_diff_queue_depth", "Diffs en attente dans diff_queues",
+    lambda: {label_of(mid): len(q) for mid, q in diff_queues.items()})
+metrics.gauge(
+    "artineo_sse_listeners", "Clients connectés à /stream",
+    lambda: {label_of(mid): len(ls) for mid, ls in event_streams.listeners.items()})
+
+# ─── flux SSE (/stream) : même chemin de publication que /ws ────────────────
+event_streams = EventStreams()
+# commentaire envoyé sur un flux inactif, pour que les proxys le gardent ouvert
+SSE_KEEPALIVE = 15.0
+
+# ─── scènes versionnées des modules à diffs cumulatifs ─────────────────────
+scenes: Dict[int, Scene] = {
+    4: Scene(),
+    # boutons : pas de strokes/objets, seulement l'état (button…)
+    41: Scene(keys=())
+}
+
+# ─── télémétrie des modules : dernier rapport reçu (GET /telemetry) ─────────
+module_telemetry: Dict[int, dict] = {}
+
+# ─── backend d'état : un worker (local) ou plusieurs (redis) ───────────────
+STATE_BACKEND = os.getenv("ARTINEO_STATE_BACKEND", "local")
+state_backend = make_backend(STATE_BACKEND, os.getenv("ARTINEO_REDIS_URL"))
+
+# ─── journal des set (état retrouvé au redémarrage) ────────────────────────
+# dossier vide = pas de journal ; avec redis, c'est Redis qui garde l'état
+JOURNAL_DIR = os.getenv("ARTINEO_JOURNAL_DIR", "journal")
+journal: Optional[Journal] = (
+    Journal(JOURNAL_DIR) if JOURNAL_DIR and STATE_BACKEND == "local" else None
+)
+
+
+def apply_set(module_id, data) -> Tuple[Optional[int], Optional[dict]]:
+    """
+    Applique un `set` à `buffer` et à la scène du module (s'il en a une).
+    Renvoie (version, ids créés) de la scène, ou (None, None).
+    """
+    buffer[module_id] = data
+    bump_buffer_version(module_id)
+    scene = scenes.get(module_id)
+    if scene is None:
+        return None, None
+    return scene.apply(data)
+
+
+def journal_snapshot() -> dict:
+    """État complet pour un checkpoint du journal (pris sur la boucle)."""
+    return {
+        # paires : les module_id ne sont pas forcément des chaînes
+        "buffer": [[mid, data] for mid, data in buffer.items()],
+        "versions": [[mid, v] for mid, v in buffer_versions.items()],
+        "epoch": buffer_epoch,
+        "scenes": {str(mid): scene.dump() for mid, scene in scenes.items()},
+    }
+
+
+def restore_state(checkpoint: Optional[dict], adopt_epoch: bool = True):
+    """
+    Recharge `buffer` et les scènes depuis un `journal_snapshot()`.
+    `adopt_epoch` : reprend aussi l'époque des versions (workers Redis).
+    """
+    global buffer_epoch
+    buffer.update(restore_buffer(checkpoint))
+    if adopt_epoch and (checkpoint or {}).get("epoch"):
+        buffer_epoch = checkpoint["epoch"]
+    for mid, version in (checkpoint or {}).get("versions", []):
+        buffer_versions[mid] = version
+    for mid, dumped in (checkpoint or {}).get("scenes", {}).items():
+        scene = scenes.get(int(mid))
+        if scene is not None:
+            scene.load(dumped)
+
+
+@app.on_event("startup")
+async def restore_journal():
+    # après load_default_buffer : le journal a le dernier mot
+    app.state.journal_writer = None
+    if journal is None:
+        return
+    t0 = time.perf_counter()
+    checkpoint, entries = await asyncio.to_thread(journal.load)
+    # nouvelle époque : un set servi mais pas encore journalisé avant un
+    # arrêt brutal ferait réutiliser sa version pour un autre contenu
+    restore_state(checkpoint, adopt_epoch=False)
+    for module_id, data in entries:
+        apply_set(module_id, data)
+    trace(
+        "startup", "journal rejoué : checkpoint=%s, %d set en %.1f ms",
+        checkpoint is not None, len(entries), (time.perf_counter() - t0) * 1000
+    )
+    app.state.journal_writer = asyncio.create_task(journal.run_writer(journal_snapshot))
+
+
+@app.on_event("shutdown")
+async def stop_journal():
+    if app.state.journal_writer is None:
+        return
+    app.state.journal_writer.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.journal_writer
+    # derniers set + checkpoint final
+    journal.flush_sync(journal_snapshot)
+
+
+# ─── capture du trafic (rejouée par benchmarks/replay.py) ───────────────────
+# ARTINEO_CAPTURE=captures/seance.jsonl.gz ; vide = pas de capture
+CAPTURE_FILE = os.getenv("ARTINEO_CAPTURE", "")
+capture: Optional[Capture] = Capture(CAPTURE_FILE) if CAPTURE_FILE else None
+
+
+@app.on_event("startup")
+async def start_capture():
+    app.state.capture_writer = None
+    if capture is not None:
+        app.state.capture_writer = asyncio.create_task(capture.run_writer())
+
+
+@app.on_event("shutdown")
+async def stop_capture():
+    if app.state.capture_writer is None:
+        return
+    app.state.capture_writer.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.capture_writer
+    capture.close()
+
+
 # ─── file de queues de diffs ────────────────────────────────────────────────
-diff_queues: Dict[int, deque] = {
+diff_queues: Dict[int, Union[deque, DiffLog]] = {
     # modules 1,2,3 : un seul buffer (maxlen=1)
     1: deque(maxlen=1),
     2: deque(maxlen=1),
     3: deque(maxlen=1),
-    # module 4 : stacking illimité
-    41: deque(),
-    4: deque()
+    # module 4 : diffs cumulatifs compactés, bornés (snapshot si débordement)
+    41: DiffLog(scenes[41]),
+    4: DiffLog(scenes[4])
 }
 
 
+def queue_diff(module_id: int, data: dict, ts: float, created=None):
+    queue = diff_queues[module_id]
+    if isinstance(queue, DiffLog):
+        queue.append(data, ts, created)
+    else:
+        queue.append((ts, data))
+
+
+def pop_diff(module_id: int) -> Tuple[dict, Optional[float]]:
+    """Diff le plus ancien et l'horodatage (perf_counter) de son `set`."""
+    queue = diff_queues[module_id]
+    if isinstance(queue, DiffLog):
+        return queue.pop_timed()
+    ts, data = queue.popleft()
+    return data, ts
+
+
+def deliver(
+    module_id: int,
+    payload: dict,
+    ts: Optional[float],
+    version: Optional[int] = None,
+    created=None
+):
+    """Publie aux abonnés ; sans abonné, met en file pour les clients qui pollent."""
+    out = get_buffer_message(module_id, payload, version)
+    tracer.record(module_id, "out", out)
+    event_streams.publish(module_id, out, stream_event_id(module_id, version))
+    if capture is not None:
+        capture.record("out", module_id, out)
+    if not manager.publish(module_id, out, ts):
+        queue_diff(module_id, payload, ts, created)
+
+
+# ─── cadence de publication (fps des configs) ──────────────────────────────
+schedulers: Dict[int, PublishScheduler] = {}
+
+
+def configure_scheduler(module_id: int, config: dict):
+    """
+    Crée, règle ou retire le PublishScheduler du module selon le `fps` de
+    sa config. Sans fps (ou fps <= 0), chaque set est publié tout de suite.
+    """
+    if module_id not in diff_queues:
+        return
+    fps = config.get("fps") if isinstance(config, dict) else None
+    valid = isinstance(fps, (int, float)) and not isinstance(fps, bool) and fps > 0
+    scheduler = schedulers.get(module_id)
+    if not valid:
+        if scheduler is not None:
+            scheduler.flush()
+            scheduler.close()
+            del schedulers[module_id]
+        return
+    if scheduler is not None:
+        scheduler.set_fps(fps)
+    else:
+        schedulers[module_id] = PublishScheduler(module_id, fps, deliver, scenes.get(module_id))
+
+
+@app.on_event("startup")
+async def start_publish_schedulers():
+    # après start_config_store : les configs sont déjà en mémoire
+    for module_id in diff_queues:
+        entry = config_store.cached(module_id)
+        if entry is not None:
+            configure_scheduler(module_id, entry.data)
+
+
+@app.on_event("shutdown")
+async def stop_publish_schedulers():
+    for scheduler in schedulers.values():
+        scheduler.close()
+
+
+def publish_set(module_id: int, data: dict, ts: float, version=None, created=None):
+    scheduler = schedulers.get(module_id)
+    if scheduler is None:
+        deliver(module_id, data, ts, version, created)
+    else:
+        scheduler.push(data, ts, version, created)
+
+
+def commit_set(module_id, data, ts: Optional[float]):
+    """
+    Applique un `set` validé par le backend d'état (reçu par ce worker ou,
+    avec redis, par un autre) : buffer, scène, journal, publication.
+    """
+    version, created = apply_set(module_id, data)
+    if journal is not None:
+        journal.append(module_id, data)
+    publish_set(module_id, data, ts, version, created)
+
+
+@app.on_event("startup")
+async def start_state_backend():
+    # après restore_journal et start_publish_schedulers
+    await state_backend.start(commit_set, journal_snapshot, restore_state)
+
+
+@app.on_event("shutdown")
+async def stop_state_backend():
+    await state_backend.stop()
+
+
+def get_buffer_message(
+    module_id: int, payload: dict, version: Optional[int] = None
+) -> dict:
+    msg = {
+        "action": "get_buffer",
+        "module": module_id,
+        "buffer": payload
+    }
+    if version is not None:
+        # scène versionnée : le client renvoie `since` à l'abonnement
+        msg["version"] = version
+        msg["since"] = scene_since(version)
+    return msg
+
+
+def scene_catchup(module_id: int, scene: Scene, since=None) -> List[dict]:
+    """
+    Messages qui mettent un client à niveau : les deltas depuis le jeton
+    `since` s'ils sont encore en historique, sinon un snapshot complet
+    (jeton absent, trop ancien ou d'une autre époque).
+    """
+    known = parse_scene_since(since)
+    deltas = scene.deltas_since(known) if known is not None else None
+    if deltas is None:
+        return [scene_snapshot_message(module_id, scene)]
+    return [get_buffer_message(module_id, data, version) for version, data in deltas]
+
+
+def scene_snapshot_message(module_id: int, scene: Scene) -> dict:
+    return get_buffer_message(module_id, scene.snapshot(), scene.version)
+
+
+def stream_event_id(module_id: int, version: Optional[int] = None) -> Optional[str]:
+    """
+    Id SSE, avec l'époque : jeton `since` de la version de scène (aucun
+    pour une partie de diff sans version), sinon ETag (sans guillemets) de
+    la version courante du buffer (état complet).
+    """
+    if module_id in scenes:
+        return scene_since(version) if version is not None else None
+    return buffer_etag(module_id, buffer_versions.get(module_id, 0)).strip('"')
+
+
+@app.get("/stream")
+async def stream(
+    module: int = Query(..., description="ID du module"),
+    since: Optional[str] = Query(None, description="dernier id reçu (à défaut de Last-Event-ID)"),
+    last_event_id: str = Header(None)
+):
+    """
+    Flux SSE des mises à jour d'un module, mêmes messages que les push
+    /ws (`get_buffer`). L'id d'événement porte l'époque et la version : à
+    la reconnexion, le navigateur renvoie Last-Event-ID et ne reçoit que
+    ce qui lui manque (deltas de scène, ou l'état courant). Sans id connu,
+    ou avec un id d'une autre époque (serveur redémarré), le flux
+    commence par l'état courant.
+    """
+    if module not in buffer:
+        raise HTTPException(status_code=404, detail=f"Module {module} introuvable")
+    if last_event_id is not None:
+        since = last_event_id
+
+    scene = scenes.get(module)
+    resync = None
+    if scene is not None:
+        def resync():
+            return encode_event(scene_snapshot_message(module, scene),
+                                stream_event_id(module, scene.version))
+        catchup = [
+            encode_event(message, message["since"])
+            for message in scene_catchup(module, scene, since)
+        ]
+    else:
+        version = buffer_versions.get(module, 0)
+        known = parse_buffer_since(module, since) if since is not None else None
+        catchup = [] if known == version else [
+            encode_event(get_buffer_message(module, buffer[module]),
+                         stream_event_id(module))
+        ]
+
+    listener = StreamListener(
+        module,
+        SUBSCRIBER_POLICIES.get(module, DROP_OLDEST),
+        maxsize=SUBSCRIBER_QUEUE_SIZE,
+        resync=resync,
+        on_drop=lambda n: metric_dropped.inc(label_of(module), n),
+    )
+    # rattrapage et push suivants passent par la même file, dans l'ordre
+    event_streams.add(listener)
+    for event in catchup:
+        listener.offer(event)
+
+    async def body():
+        try:
+            async for chunk in listener.events(SSE_KEEPALIVE):
+                yield chunk
+        finally:
+            event_streams.remove(listener)
+
+    trace("http", "GET /stream?module=%s since=%s", module, since)
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
-    await manager.connect(ws)
+    outbox = await manager.connect(ws)
+    codec = outbox.codec
+    # `/ws?observer=1` (dashboard) : abonnements seulement, la socket ne
+    # compte pas comme un pair des modules (/hc)
+    observer = ws.query_params.get("observer") in ("1", "true")
+
+    label = "none"
+
+    def reply(obj, ts: Optional[float] = None):
+        # mise en file seulement : encodage et envoi dans la tâche de l'outbox
+        if capture is not None:
+            capture.record("out", obj.get("module"), obj)
+        outbox.put(obj, label, ts)
+
     try:
         while True:
-            raw = await ws.receive_text()
-            debug_print(f"[WS] Message reçu brut: {raw}")
+            raw = await receive_frame(ws)
+            received_at = time.perf_counter()
+            manager.touch(ws)
+            trace("ws.in", "Message reçu brut: %s", raw)
 
+            msg = None
             try:
-                msg = json.loads(raw)
+                check_frame(raw, MAX_FRAME_BYTES)
+                msg = codec.decode(raw)
+                # schéma du module vérifié avant toute écriture d'état
+                validate_message(msg)
                 module_id = msg.get("module")
                 action    = msg.get("action")
+                label     = label_of(module_id)
+                metric_msgs_in.inc(label)
+                metric_bytes_in.inc(label, len(raw))
+                tracer.record(module_id, "in", msg)
 
                 # enregistre la socket
-                if isinstance(module_id, int):
+                if isinstance(module_id, int) and not observer:
                     manager.register(module_id, ws)
 
                 if action == "set" and "data" in msg:
-                    # Met à jour le buffer global et la queue de diffs
-                    buffer[module_id] = msg["data"]
-                    if (module_id != 4):
-                        diff_queues[module_id].append(msg["data"])
+                    # Met à jour le buffer global puis publie aux abonnés,
+                    # au plus au fps de la config du module ; la queue de
+                    # diffs ne sert qu'aux clients qui pollent encore.
+                    if capture is not None:
+                        capture.record("in", module_id, msg)
+                    state_backend.submit(module_id, msg["data"], received_at)
+
+                    trace("ws.set", "buffer[%s] ← %r", module_id, msg["data"])
+
+                    # /ws?acks=none : pas d'ack (producteurs à haut débit)
+                    if outbox.wants_acks:
+                        resp = {
+                          "status": "ok",
+                          "action": "set_buffer",
+                          "module": module_id
+                        }
+                        reply(resp)
+                    continue
+
+                if action == "telemetry":
+                    # rapport de temps d'un module (ex. Kinect) : on garde le dernier
+                    module_telemetry[module_id] = {"received_at": time.time(), **msg["data"]}
+                    trace("ws.in", "telemetry[%s] ← %r", module_id, msg["data"])
+                    if outbox.wants_acks:
+                        reply({"status": "ok", "action": "telemetry", "module": module_id})
+                    continue
+
+                if action == "subscribe" and isinstance(module_id, int):
+                    scene = scenes.get(module_id)
+                    resync = None
+                    if scene is not None:
+                        resync = partial(scene_snapshot_message, module_id, scene)
+                    sub = manager.subscribe(module_id, ws, msg.get("policy"), resync)
+                    # le rattrapage passe par la file de l'abonné, avant
+                    # tout push ultérieur
+                    if scene is not None:
+                        # scène versionnée : snapshot ou deltas depuis "since",
+                        # qui remplacent les diffs en file
+                        diff_queues[module_id].clear()
+                        for message in scene_catchup(module_id, scene, msg.get("since")):
+                            sub.offer_message(message)
                     else:
-                        if len(diff_queues[module_id]) > 1:
-                            for key in [
-                                "newStrokes", "removeStrokes",
-                                "newObjects", "removeObjects",
-                                "newBackgrounds", "removeBackgrounds"
-                            ]:
-                                for item in msg["data"].get(key, []):
-                                    diff_queues[module_id][1][key].append(item)
-                            # diff_queues[module_id][0]["button"] = msg["data"]["button"]
-                            print(diff_queues[module_id])
-                        else:
-                            diff_queues[module_id].append(msg["data"])
-                        
-                    # else:
-                    #     # module 4 : on agrège dans l'entrée existante, ou on crée la première
-                    #     dq = diff_queues[module_id]
-                    #     if dq:
-                    #         # il y a déjà un diff en attente → on étend chaque liste
-                    #         existing = dq[0]
-                    #         for key in [
-                    #             "newStrokes", "removeStrokes",
-                    #             "newObjects", "removeObjects",
-                    #             "newBackgrounds", "removeBackgrounds"
-                    #         ]:
-                    #             existing[key].extend(msg["data"].get(key, []))
-                    #         # on met à jour le bouton (on écrase l'ancienne valeur)
-                    #         existing["button"] = msg["data"]["button"]
-                    #     else:
-                    #         # premier diff → on l'ajoute
-                    #         dq.append(msg["data"])
-                        
-                    debug_print(f"[WS] buffer[{module_id}] ← {msg['data']!r}")
+                        # vide les diffs accumulés avant l'abonnement
+                        pending = diff_queues.get(module_id)
+                        while pending:
+                            payload, ts = pop_diff(module_id)
+                            sub.offer_message(get_buffer_message(module_id, payload), ts)
+                    resp = {
+                        "status": "ok",
+                        "action": "subscribe",
+                        "module": module_id,
+                        "policy": sub.policy
+                    }
+                    reply(resp)
+                    continue
 
+                if action == "unsubscribe" and isinstance(module_id, int):
+                    manager.unsubscribe(module_id, ws)
                     resp = {
-                      "status": "ok",
-                      "action": "set_buffer",
-                      "module": module_id
+                        "status": "ok",
+                        "action": "unsubscribe",
+                        "module": module_id
                     }
-                    await ws.send_text(json.dumps(resp, ensure_ascii=False))
+                    reply(resp)
                     continue
 
                 if action == "get":
+                    ts = None
                     if diff_queues[module_id]:
-                        payload = diff_queues[module_id].popleft()
+                        payload, ts = pop_diff(module_id)
                     else:
                         payload = {}
                     resp = {
@@ -325,40 +1159,61 @@ async def websocket_endpoint(ws: WebSocket):
                         "module": module_id,
                         "buffer": payload
                     }
-                    debug_print(f"[WS] get_buffer → {resp}")
-                    await ws.send_text(json.dumps(resp, ensure_ascii=False))
+                    trace("ws.get", "get_buffer → %s", resp)
+                    tracer.record(module_id, "out", resp)
+                    # délai de livraison mesuré une fois la réponse envoyée
+                    reply(resp, ts)
                     continue
 
                 # ack pour autres cas
                 ack = {"action": "ack", "data": msg}
-                await ws.send_text(json.dumps(ack, ensure_ascii=False))
+                reply(ack)
                 continue
 
-            except json.JSONDecodeError:
+            except SchemaError as e:
+                module_id = msg.get("module") if isinstance(msg, dict) else None
+                label = label_of(module_id)
+                metric_rejected.inc(label)
+                metric_bytes_in.inc(label, len(raw))
+                trace("ws.in", "Message refusé: %s", e)
+                reply({
+                    "status": "error",
+                    "action": msg.get("action") if isinstance(msg, dict) else None,
+                    "module": module_id,
+                    "reason": e.reason,
+                    "error": str(e)
+                })
+                continue
+
+            except ValueError:
+                # JSONDecodeError ou trame msgpack invalide
                 pass
 
+            metric_msgs_in.inc("none")
+            metric_bytes_in.inc("none", len(raw))
+
             # ping/pong normal
             if raw == "ping":
-                await ws.send_text("pong")
+                outbox.put("pong")
             elif raw == "pong":
                 # recalcule le last_pong
-                for mid, sock in manager.active.items():
-                    if sock is ws:
-                        manager.record_pong(mid)
+                manager.pong(ws)
             else:
-                await ws.send_text(f"ECHO:{raw}")
+                outbox.put(f"ECHO:{raw}")
 
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(ws)
 
 
 @app.get("/hc")
 async def health_check():
-    THRESHOLD = 9.0  # secondes
+    THRESHOLD = HEARTBEAT_TIMEOUT or 9.0  # secondes
     now = time.time()
     statuses: Dict[int, str] = {
         mid: ("alive" if (now - manager._last_pong_time.get(mid,0)) <= THRESHOLD else "dead")
-        for mid in manager.active.keys()
+        for mid in manager.modules()
     }
     return JSONResponse(
         content={"modules": statuses},
@@ -366,6 +1221,57 @@ async def health_check():
     )
 
 
+@app.get("/telemetry")
+async def get_telemetry(
+    module: Optional[int] = Query(None, description="ID du module (tous si absent)")
+):
+    """Dernier rapport `telemetry` reçu de chaque module (temps par étape…)."""
+    if module is None:
+        body = {str(mid): report for mid, report in module_telemetry.items()}
+    elif module in module_telemetry:
+        body = module_telemetry[module]
+    else:
+        raise HTTPException(status_code=404, detail=f"Pas de télémétrie pour le module {module}")
+    return JSONResponse(content=body, media_type="application/json; charset=utf-8")
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Compteurs et histogrammes par module, format texte Prometheus."""
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/trace")
+async def get_trace(
+    module: Optional[int] = Query(None, description="ID du module (tous si absent)"),
+    limit: Optional[int] = Query(None, ge=0, description="N derniers messages")
+):
+    """Derniers messages reçus/émis par module et taux de trace actifs."""
+    body = {"rates": tracer.rates, "modules": tracer.recent(module, limit)}
+    # repr pour ce qui n'est pas du JSON (octets d'une trame msgpack…)
+    return Response(
+        json.dumps(body, ensure_ascii=False, default=repr),
+        media_type="application/json; charset=utf-8"
+    )
+
+
+@app.post("/trace")
+async def set_trace(rates: Dict[str, float] = Body(..., embed=True)):
+    """
+    Règle à chaud l'échantillonnage : {"rates": {"ws.in": 0.01, "*": 0}}.
+    0 coupe une catégorie, 1 trace tout.
+    """
+    expanded: Dict[str, float] = {}
+    for cat, rate in rates.items():
+        for name in (CATEGORIES if cat == "*" else (cat,)):
+            expanded[name] = rate
+    tracer.set_rates(expanded)
+    return JSONResponse(content={"rates": tracer.rates})
+
+
 html = """
 <!DOCTYPE html>
 <html>
@@ -394,6 +1300,8 @@ html = """
     const ws = new WebSocket("ws://artineo.local:8000/ws");
     ws.onmessage = e => {
       const data = e.data;
+      // heartbeat serveur : sans réponse, la socket est fermée
+      if (data === "ping") { ws.send("pong"); return; }
       try {
         const obj = JSON.parse(data);
         if (obj.action === "get_buffer") {
@@ -0,0 +1,123 @@
+# serveur/back/metrics.py
+"""
+Compteurs et histogrammes par module, exposés au format texte Prometheus
+sur `/metrics`. Volontairement minimal (pas de dépendance à
+prometheus_client) : un seul label, `module`.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Container, Dict, List, Optional, Sequence
+
+# secondes : de 100 µs à 2,5 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def module_label(module_id, known: Container[int] = ()) -> str:
+    """
+    Label `module` d'un id. Borne la cardinalité : seuls les modules
+    configurés (`known`) ont leur propre label ; tout autre id, envoyé
+    par un client quelconque, tombe dans "other".
+    """
+    if isinstance(module_id, int) and not isinstance(module_id, bool) and module_id in known:
+        return str(module_id)
+    return "none" if module_id is None else "other"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[str, float] = {}
+
+    def inc(self, module: str, amount: float = 1):
+        self.values[module] = self.values.get(module, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{{module="{m}"}} {_fmt(v)}'
+            for m, v in sorted(self.values.items())
+        ]
+
+
+class Gauge:
+    """Jauge lue au moment du scrape via `collect()` → {module: valeur}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], Dict[str, float]]):
+        self.name = name
+        self.help = help_text
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{{module="{m}"}} {_fmt(v)}'
+            for m, v in sorted(self.collect().items())
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # module -> [compte par bucket (non cumulé) ..., +Inf], somme
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+
+    def observe(self, module: str, value: float):
+        counts = self._counts.get(module)
+        if counts is None:
+            counts = self._counts[module] = [0] * (len(self.buckets) + 1)
+            self._sums[module] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[module] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for m in sorted(self._counts):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), self._counts[m]):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{module="{m}",le="{_fmt(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{module="{m}"}} {_fmt(self._sums[m])}')
+            lines.append(f'{self.name}_count{{module="{m}"}} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self.register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, collect) -> Gauge:
+        return self.register(Gauge(name, help_text, collect))
+
+    def histogram(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets or LATENCY_BUCKETS))
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.samples())
+        return "\n".join(out) + "\n"
@@ -0,0 +1,111 @@
+# serveur/back/outbox.py
+"""
+File de sortie d'une connexion /ws : réponses (acks, get_buffer, erreurs)
+et pong. Les push aux abonnés ont leurs propres files (`topics.Subscriber`).
+
+La boucle de lecture ne fait que décoder, appliquer et mettre en file ;
+l'encodage et l'envoi se font dans une tâche dédiée. Un client qui ne lit
+plus (fenêtre TCP pleine) ne bloque donc pas la lecture de ses propres
+messages suivants. La file est bornée : au-delà, les plus anciennes
+réponses sont jetées.
+
+Acks des `set` : si le client est en retard, les acks consécutifs d'un
+même module sont regroupés en un seul (`count`). Un producteur qui n'en
+a pas besoin se connecte avec `/ws?acks=none` ; les erreurs restent
+envoyées.
+"""
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional, Union
+
+from fastapi import WebSocket
+
+from wire_codec import Frame
+
+ACKS_ALL = "all"
+ACKS_NONE = "none"
+ACK_MODES = (ACKS_ALL, ACKS_NONE)
+
+# send(ws, trame, label, ts) ; ts = perf_counter du set d'origine (get)
+SendFn = Callable[[WebSocket, Frame, str, Optional[float]], Awaitable[None]]
+
+
+def is_set_ack(message) -> bool:
+    return (
+        isinstance(message, dict)
+        and message.get("action") == "set_buffer"
+        and message.get("status") == "ok"
+    )
+
+
+class Outbox:
+    def __init__(
+        self,
+        ws: WebSocket,
+        codec,
+        send: SendFn,
+        maxsize: int = 256,
+        acks: str = ACKS_ALL,
+        on_drop: Optional[Callable[[str], None]] = None,
+    ):
+        self.ws = ws
+        self.codec = codec
+        self.maxsize = max(1, maxsize)
+        self.acks = acks if acks in ACK_MODES else ACKS_ALL
+        self.dropped = 0
+        self.batched = 0
+        self._send = send
+        self._on_drop = on_drop
+        # [message (dict) ou trame, label, ts] ; listes : un ack en file
+        # peut être remplacé par l'ack regroupé
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self):
+        return len(self._queue)
+
+    @property
+    def wants_acks(self) -> bool:
+        return self.acks != ACKS_NONE
+
+    def put(self, message: Union[dict, Frame], label: str = "none", ts: Optional[float] = None):
+        """Met une réponse en file (encodée au moment de l'envoi)."""
+        if self._queue and is_set_ack(message):
+            last = self._queue[-1]
+            if is_set_ack(last[0]) and last[0].get("module") == message.get("module"):
+                # nouveau dict : une capture garde peut-être une référence
+                last[0] = {**last[0], "count": last[0].get("count", 1) + 1}
+                self.batched += 1
+                return
+        if len(self._queue) >= self.maxsize:
+            _, dropped_label, _ = self._queue.popleft()
+            self.dropped += 1
+            if self._on_drop is not None:
+                self._on_drop(dropped_label)
+        self._queue.append([message, label, ts])
+        self._wakeup.set()
+
+    async def _run(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                message, label, ts = self._queue.popleft()
+                frame = message if isinstance(message, (str, bytes)) else self.codec.encode(message)
+                await self._send(self.ws, frame, label, ts)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # socket fermée : la boucle de lecture s'en apercevra
+            self._queue.clear()
+
+    def close(self):
+        self._queue.clear()
+        self._task.cancel()
+
+    def __repr__(self):
+        return (f"Outbox(acks={self.acks}, queued={len(self._queue)}, "
+                f"batched={self.batched}, dropped={self.dropped})")
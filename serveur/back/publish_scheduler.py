@@ -0,0 +1,118 @@
+# serveur/back/publish_scheduler.py
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from diff_log import DiffLog
+from scene import TRANSIENT_KEYS, Scene
+
+# deliver(module_id, payload, ts, version, created)
+DeliverFn = Callable[[int, dict, Optional[float], Optional[int], Optional[dict]], None]
+
+
+def merge_latest(pending: Optional[dict], data: dict) -> dict:
+    """
+    Dernière valeur d'un module à état complet, sans perdre une commande
+    ponctuelle (timerControl…) arrivée dans le même intervalle.
+    """
+    if not pending or not isinstance(data, dict):
+        return data
+    carried = {k: pending[k] for k in TRANSIENT_KEYS if k in pending and k not in data}
+    return {**data, **carried} if carried else data
+
+
+class PublishScheduler:
+    """
+    Limite la publication d'un module à `fps` messages par seconde.
+
+    Les `set` reçus entre deux publications sont regroupés : dernière
+    valeur pour les modules à état complet (1, 2, 3), diff fusionné via un
+    `DiffLog` pour les modules à scène (4, 41). Après un silence, le
+    premier `set` part tout de suite ; ensuite au plus un envoi par
+    intervalle. Encodage et envois suivent donc la cadence d'affichage et
+    non celle du capteur. `fps <= 0` : publication immédiate.
+    """
+
+    def __init__(
+        self,
+        module_id: int,
+        fps: float,
+        deliver: DeliverFn,
+        scene: Optional[Scene] = None,
+    ):
+        self.module_id = module_id
+        self.fps = fps
+        self.scene = scene
+        self._deliver = deliver
+        self._diffs = DiffLog(scene) if scene is not None else None
+        self._latest: Optional[dict] = None
+        self._has_latest = False
+        # perf_counter du plus ancien set non publié
+        self._ts: Optional[float] = None
+        self._last_publish = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self.coalesced = 0
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.fps if self.fps > 0 else 0.0
+
+    def set_fps(self, fps: float):
+        self.fps = fps
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            self._schedule()
+
+    def push(self, data, ts: Optional[float], version: Optional[int] = None, created=None):
+        if self.fps <= 0 and not self._pending():
+            self._deliver(self.module_id, data, ts, version, created)
+            return
+        if self._pending():
+            self.coalesced += 1
+        if self._diffs is not None:
+            self._diffs.append(data, ts, created)
+        else:
+            self._latest = merge_latest(self._latest, data)
+            self._has_latest = True
+            if self._ts is None:
+                self._ts = ts
+        self._schedule()
+
+    def _pending(self) -> bool:
+        return self._has_latest or bool(self._diffs)
+
+    def _schedule(self):
+        if self._handle is not None:
+            return
+        delay = self._last_publish + self.interval - time.monotonic()
+        if delay <= 0:
+            self.flush()
+        else:
+            self._handle = asyncio.get_running_loop().call_later(delay, self.flush)
+
+    def flush(self):
+        """Publie ce qui est en attente (appelé par le timer ou à l'arrêt)."""
+        self._handle = None
+        if not self._pending():
+            return
+        self._last_publish = time.monotonic()
+        if self._diffs is not None:
+            while self._diffs:
+                payload, ts = self._diffs.pop_timed()
+                # seule la dernière partie porte la version courante de la scène
+                version = self.scene.version if not self._diffs else None
+                self._deliver(self.module_id, payload, ts, version, None)
+            return
+        data, ts = self._latest, self._ts
+        self._latest, self._has_latest, self._ts = None, False, None
+        self._deliver(self.module_id, data, ts, None, None)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def __repr__(self):
+        return f"PublishScheduler({self.module_id}, fps={self.fps}, coalesced={self.coalesced})"
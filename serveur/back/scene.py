@@ -0,0 +1,110 @@
+# serveur/back/scene.py
+
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+# paires (ajout, suppression) des diffs cumulatifs du module 4
+DIFF_KEYS = (
+    ("newStrokes", "removeStrokes"),
+    ("newObjects", "removeObjects"),
+    ("newBackgrounds", "removeBackgrounds"),
+)
+DIFF_FIELDS = frozenset(k for pair in DIFF_KEYS for k in pair)
+
+# commandes ponctuelles : jamais rejouées dans un snapshot
+TRANSIENT_KEYS = frozenset(("timerControl",))
+
+
+def item_id(item: Any) -> Optional[Hashable]:
+    if isinstance(item, dict):
+        iid = item.get("id")
+        if isinstance(iid, Hashable):
+            return iid
+    return None
+
+
+class Scene:
+    """
+    État matérialisé d'un module à diffs cumulatifs (module 4, 41).
+
+    Chaque `apply` incrémente `version`. Les `history` derniers diffs sont
+    conservés pour qu'un client qui se reconnecte reçoive « les deltas
+    depuis N » ; au-delà, il reçoit un `snapshot()` complet.
+    """
+
+    def __init__(self, keys=DIFF_KEYS, history: int = 256):
+        self.version = 0
+        # paires (ajout, suppression) matérialisées par ce module ; un
+        # snapshot ne contient (et ne réinitialise côté client) que celles-ci
+        self.keys = tuple(keys)
+        # new_key -> {id: item}
+        self.items: Dict[str, Dict[Hashable, Any]] = {k: {} for k, _ in self.keys}
+        # dernières valeurs des autres clés (button, tool…)
+        self.state: Dict[str, Any] = {}
+        self._history: deque = deque(maxlen=history)
+
+    def apply(self, data: dict) -> Tuple[int, Dict[str, Set[Hashable]]]:
+        """
+        Applique le diff. Renvoie la nouvelle version et, par clé d'ajout,
+        les ids qui n'existaient pas encore dans la scène.
+        """
+        created: Dict[str, Set[Hashable]] = {}
+        for new_key, rm_key in self.keys:
+            items = self.items[new_key]
+            for item in data.get(new_key) or []:
+                iid = item_id(item)
+                if iid is None:
+                    continue
+                if iid not in items:
+                    created.setdefault(new_key, set()).add(iid)
+                items[iid] = item
+            for iid in data.get(rm_key) or []:
+                if isinstance(iid, Hashable):
+                    items.pop(iid, None)
+        for key, value in data.items():
+            if key not in DIFF_FIELDS and key not in TRANSIENT_KEYS:
+                self.state[key] = value
+        self.version += 1
+        self._history.append((self.version, data))
+        return self.version, created
+
+    def snapshot(self) -> dict:
+        payload: Dict[str, Any] = dict(self.state)
+        payload["snapshot"] = True
+        for new_key, _ in self.keys:
+            payload[new_key] = list(self.items[new_key].values())
+        return payload
+
+    def dump(self) -> dict:
+        """État sérialisable (checkpoint du journal), sans l'historique."""
+        return {
+            "version": self.version,
+            "state": dict(self.state),
+            "items": {k: list(v.values()) for k, v in self.items.items()},
+        }
+
+    def load(self, dumped: dict):
+        """Inverse de `dump` ; les deltas antérieurs ne sont plus disponibles."""
+        self.version = dumped.get("version", 0)
+        self.state = dict(dumped.get("state", {}))
+        for new_key, _ in self.keys:
+            self.items[new_key] = {
+                item_id(item): item
+                for item in dumped.get("items", {}).get(new_key, [])
+                if item_id(item) is not None
+            }
+        self._history.clear()
+
+    def deltas_since(self, version: int) -> Optional[List[Tuple[int, dict]]]:
+        """
+        Diffs appliqués après `version`, dans l'ordre. None si l'historique
+        ne remonte pas assez loin (ou si `version` vient d'une autre vie du
+        serveur) : il faut alors un snapshot.
+        """
+        if version > self.version:
+            return None
+        if version == self.version:
+            return []
+        if not self._history or self._history[0][0] > version + 1:
+            return None
+        return [(v, d) for v, d in self._history if v > version]
@@ -0,0 +1,260 @@
+# serveur/back/schemas.py
+"""
+Schémas des messages /ws, par module (1, 2, 3, 4, 41).
+
+Chaque schéma est compilé une fois, à l'import, en une fonction qui
+valide le `data` d'un `set` en une seule passe : type des champs connus,
+nombre d'éléments des listes, longueur des chaînes. Les clés inconnues
+passent telles quelles (les clients en ajoutent : cases cochées de
+tablet_slider, marqueurs du banc de charge…) et aucun champ n'est
+obligatoire, un `set` pouvant ne porter qu'une commande
+(`{"timerControl": "reset"}`).
+
+Une trame trop grosse est refusée avant décodage (`check_frame`), un
+message invalide avant de toucher au buffer, aux scènes ou au journal
+(`validate_message`).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from wire_codec import Frame
+
+# bornes d'un data (la taille de trame, elle, est réglée dans main.py)
+MAX_ITEMS = 10000
+MAX_STRING = 1024
+
+Check = Callable[[Any], None]
+
+
+class SchemaError(ValueError):
+    """
+    Message refusé. Le chemin du champ fautif (`data.newStrokes[3].x`)
+    n'est construit qu'en remontant l'erreur : rien n'est formaté pour un
+    message valide.
+    """
+
+    def __init__(self, message: str, reason: str = "schema"):
+        super().__init__(message)
+        self.message = message
+        self.reason = reason
+        self.path: List[str] = []
+
+    def at(self, part: str) -> "SchemaError":
+        self.path.insert(0, part)
+        return self
+
+    def __str__(self):
+        if not self.path:
+            return self.message
+        return f"{''.join(self.path).lstrip('.')}: {self.message}"
+
+
+_MISSING = object()
+
+
+# ─── types élémentaires ─────────────────────────────────────────────────────
+# bool est une sous-classe d'int : on compare les types exacts
+
+def number(nullable: bool = False) -> Check:
+    def check(value):
+        if value is None and nullable:
+            return
+        if type(value) is not int and type(value) is not float:
+            raise SchemaError(f"nombre attendu, reçu {type(value).__name__}")
+    return check
+
+
+def integer(nullable: bool = False) -> Check:
+    def check(value):
+        if value is None and nullable:
+            return
+        if type(value) is not int:
+            raise SchemaError(f"entier attendu, reçu {type(value).__name__}")
+    return check
+
+
+def boolean() -> Check:
+    def check(value):
+        if type(value) is not bool:
+            raise SchemaError(f"booléen attendu, reçu {type(value).__name__}")
+    return check
+
+
+def string(nullable: bool = False, choices: Optional[Tuple[str, ...]] = None) -> Check:
+    allowed = frozenset(choices) if choices is not None else None
+
+    def check(value):
+        if value is None and nullable:
+            return
+        if type(value) is not str:
+            raise SchemaError(f"chaîne attendue, reçu {type(value).__name__}")
+        if len(value) > MAX_STRING:
+            raise SchemaError(f"chaîne trop longue ({len(value)})", "too_large")
+        if allowed is not None and value not in allowed:
+            raise SchemaError(f"valeur inconnue {value!r}")
+    return check
+
+
+def _check_id(value):
+    if type(value) is not str and type(value) is not int:
+        raise SchemaError("id (chaîne ou entier) attendu")
+
+
+def _check_list(value):
+    if type(value) is not list:
+        raise SchemaError(f"liste attendue, reçu {type(value).__name__}")
+    if len(value) > MAX_ITEMS:
+        raise SchemaError(f"trop d'éléments ({len(value)})", "too_large")
+
+
+def ids() -> Check:
+    """Liste d'ids (removeStrokes, removeObjects…)."""
+    def check(value):
+        _check_list(value)
+        for i, item in enumerate(value):
+            try:
+                _check_id(item)
+            except SchemaError as e:
+                raise e.at(f"[{i}]")
+    return check
+
+
+def items(fields: Dict[str, Check]) -> Check:
+    """
+    Liste d'objets portant un `id` (strokes, objets, fonds) : c'est la clé
+    de la scène, elle est donc obligatoire.
+    """
+    validate_item = compile_schema(fields)
+
+    def check(value):
+        _check_list(value)
+        for i, item in enumerate(value):
+            try:
+                validate_item(item)
+                if "id" not in item:
+                    raise SchemaError("id manquant")
+                _check_id(item["id"])
+            except SchemaError as e:
+                raise e.at(f"[{i}]")
+    return check
+
+
+def compile_schema(fields: Dict[str, Check]) -> Check:
+    """Fonction de validation d'un objet : un lookup et un appel par champ connu."""
+    checks = tuple(fields.items())
+
+    def validate(obj):
+        if type(obj) is not dict:
+            raise SchemaError(f"objet attendu, reçu {type(obj).__name__}")
+        get = obj.get
+        for key, check in checks:
+            value = get(key, _MISSING)
+            if value is not _MISSING:
+                try:
+                    check(value)
+                except SchemaError as e:
+                    raise e.at(f".{key}")
+    return validate
+
+
+# ─── schémas des modules ────────────────────────────────────────────────────
+# commandes ponctuelles acceptées par tous les modules (cf. scene.TRANSIENT_KEYS)
+COMMON: Dict[str, Check] = {
+    "timerControl": string(choices=("reset", "pause", "resume")),
+}
+
+SHAPE_ITEM: Dict[str, Check] = {
+    "type": string(), "shape": string(),
+    "cx": number(), "cy": number(), "w": number(), "h": number(),
+    "angle": number(), "scale": number(),
+}
+
+STROKE_ITEM: Dict[str, Check] = {
+    "tool_id": string(), "x": number(), "y": number(), "size": number(),
+}
+
+SCHEMAS: Dict[int, Dict[str, Check]] = {
+    # IR : position et diamètre du point détecté
+    1: {"x": number(), "y": number(), "diameter": number()},
+    # rotation : angles cumulés
+    2: {"rotX": number(), "rotY": number(), "rotZ": number()},
+    # RFID : uid lus (None si pas de carte), série courante, minuteur "m:ss"
+    3: {
+        "uid1": string(nullable=True), "uid2": string(nullable=True),
+        "uid3": string(nullable=True),
+        "current_set": integer(), "button_pressed": boolean(), "timer": string(),
+    },
+    # Kinect : diffs de scène
+    4: {
+        "newStrokes": items(STROKE_ITEM), "removeStrokes": ids(),
+        "newObjects": items(SHAPE_ITEM), "removeObjects": ids(),
+        "newBackgrounds": items(SHAPE_ITEM), "removeBackgrounds": ids(),
+        "button": integer(nullable=True),
+    },
+    # boutons : numéro appuyé, ou état de chaque bouton
+    41: {
+        "button": integer(nullable=True),
+        "button1": boolean(), "button2": boolean(), "button3": boolean(),
+    },
+}
+
+VALIDATORS: Dict[int, Check] = {
+    module_id: compile_schema({**COMMON, **fields})
+    for module_id, fields in SCHEMAS.items()
+}
+
+_check_since_token = string(nullable=True)
+_check_policy = string(nullable=True)
+
+
+def _check_since(value):
+    # jeton `<époque>-<version>` ; un entier (anciens clients) vaut un snapshot
+    if type(value) is not int:
+        _check_since_token(value)
+
+
+# ─── messages ───────────────────────────────────────────────────────────────
+def check_frame(raw: Frame, max_bytes: int):
+    """Refuse une trame trop grosse, avant tout décodage (0 = pas de limite)."""
+    if max_bytes > 0 and len(raw) > max_bytes:
+        raise SchemaError(f"trame trop grosse ({len(raw)} > {max_bytes})", "too_large")
+
+
+def validate_message(msg: Any):
+    """
+    Valide un message décodé. Les actions qui touchent l'état d'un module
+    (`set`, `get`, `telemetry`) exigent un module connu ; `set` exige un
+    `data` conforme au schéma du module, `telemetry` un objet.
+    """
+    if type(msg) is not dict:
+        raise SchemaError(f"message: objet attendu, reçu {type(msg).__name__}")
+    module_id = msg.get("module")
+    if module_id is not None and type(module_id) is not int:
+        raise SchemaError("module: entier attendu")
+    action = msg.get("action")
+    if action is None:
+        return
+    if type(action) is not str:
+        raise SchemaError("action: chaîne attendue")
+    if action == "set" or action == "get":
+        validator = VALIDATORS.get(module_id)
+        if validator is None:
+            raise SchemaError(f"module inconnu: {module_id!r}", "unknown_module")
+        if action == "set":
+            if "data" not in msg:
+                raise SchemaError("set sans data")
+            try:
+                validator(msg["data"])
+            except SchemaError as e:
+                raise e.at("data")
+    elif action == "telemetry":
+        if module_id not in VALIDATORS:
+            raise SchemaError(f"module inconnu: {module_id!r}", "unknown_module")
+        if type(msg.get("data")) is not dict:
+            raise SchemaError("telemetry: data objet attendu")
+    elif action == "subscribe":
+        for key, check in (("since", _check_since), ("policy", _check_policy)):
+            try:
+                check(msg.get(key))
+            except SchemaError as e:
+                raise e.at(key)
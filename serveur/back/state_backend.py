@@ -0,0 +1,215 @@
+# serveur/back/state_backend.py
+"""
+Backends d'état partagé du serveur relais.
+
+Chaque `set` reçu est soumis au backend (`submit`), qui le fait appliquer
+(`apply` : buffer, scène, journal, publication aux abonnés locaux) :
+
+- `LocalBackend` : un seul worker, application immédiate ;
+- `RedisBackend` : plusieurs workers uvicorn. Les `set` de tous les
+  workers passent par un même stream Redis ; chaque worker le lit et
+  l'applique dans le même ordre. Buffers, versions de scène et files de
+  diffs sont donc des répliques identiques, et chaque worker pousse à ses
+  propres abonnés. Un checkpoint périodique (écrit par un seul worker à la
+  fois) permet à un worker qui démarre de rattraper l'état.
+
+`redis` est optionnel : seul le backend Redis en a besoin.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from typing import Any, Callable, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = OSError
+
+# apply(module_id, data, ts) ; ts = perf_counter local du set d'origine
+ApplyFn = Callable[[Any, Any, Optional[float]], None]
+SnapshotFn = Callable[[], dict]
+RestoreFn = Callable[[dict], None]
+
+
+class LocalBackend:
+    """Un seul processus : les `set` sont appliqués tout de suite."""
+
+    name = "local"
+
+    def __init__(self):
+        self._apply: Optional[ApplyFn] = None
+
+    async def start(self, apply: ApplyFn, snapshot: SnapshotFn, restore: RestoreFn):
+        self._apply = apply
+
+    def submit(self, module_id, data, ts: Optional[float]):
+        self._apply(module_id, data, ts)
+
+    async def stop(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Log ordonné des `set` dans un stream Redis (XADD / XREAD), partagé
+    par tous les workers.
+
+    L'écriture est groupée (un pipeline par tour de boucle) et la lecture
+    se fait par lots. Le stream est borné (`maxlen`, approximatif) ; tous
+    les `checkpoint_every` set, un worker (verrou SET NX PX) enregistre
+    l'état complet et l'id du dernier set appliqué, à partir desquels un
+    nouveau worker rattrape. `checkpoint_every` doit rester bien inférieur
+    à `maxlen`.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "artineo",
+        maxlen: int = 20000,
+        checkpoint_every: int = 2000,
+        batch: int = 500,
+    ):
+        if aioredis is None:
+            raise RuntimeError("Backend redis demandé mais le paquet redis n'est pas installé")
+        self.url = url
+        self.stream = f"{prefix}:sets"
+        self.checkpoint_key = f"{prefix}:checkpoint"
+        self.lock_key = f"{prefix}:checkpoint-lock"
+        self.maxlen = maxlen
+        self.checkpoint_every = checkpoint_every
+        self.batch = batch
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._redis = None
+        self._apply: Optional[ApplyFn] = None
+        self._snapshot: Optional[SnapshotFn] = None
+        self._last_id = b"0"
+        self._since_checkpoint = 0
+        self._outbox: List[str] = []
+        self._outbox_event = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, apply: ApplyFn, snapshot: SnapshotFn, restore: RestoreFn):
+        self._apply = apply
+        self._snapshot = snapshot
+        self._redis = aioredis.from_url(self.url)
+        raw = await self._redis.get(self.checkpoint_key)
+        if raw is None:
+            # premier worker : son état initial (et son époque de versions)
+            # devient le point de départ de tous
+            body = json.dumps(
+                {"id": self._last_id.decode(), "state": snapshot()},
+                ensure_ascii=False, separators=(",", ":"))
+            await self._redis.set(self.checkpoint_key, body, nx=True)
+            raw = await self._redis.get(self.checkpoint_key)
+        if raw is not None:
+            checkpoint = json.loads(raw)
+            restore(checkpoint["state"])
+            self._last_id = checkpoint["id"].encode()
+        # rattrapage avant de servir : tout ce qui suit le checkpoint
+        while await self._read(block=None):
+            pass
+        self._tasks = [
+            asyncio.create_task(self._writer()),
+            asyncio.create_task(self._reader()),
+        ]
+
+    # ─── écriture ────────────────────────────────────────────────────────────
+    def submit(self, module_id, data, ts: Optional[float]):
+        try:
+            payload = json.dumps(
+                {"m": module_id, "d": data, "w": time.time()},
+                ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            print(f"[state] set ignoré (non sérialisable): {e}")
+            return
+        self._outbox.append(payload)
+        self._outbox_event.set()
+
+    async def _flush_outbox(self):
+        batch, self._outbox = self._outbox, []
+        if not batch:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for payload in batch:
+            pipe.xadd(self.stream, {"p": payload}, maxlen=self.maxlen, approximate=True)
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            print(f"[state] Erreur XADD ({len(batch)} set perdus): {e}")
+
+    async def _writer(self):
+        while True:
+            await self._outbox_event.wait()
+            self._outbox_event.clear()
+            await self._flush_outbox()
+
+    # ─── lecture ─────────────────────────────────────────────────────────────
+    async def _read(self, block: Optional[int]) -> int:
+        resp = await self._redis.xread(
+            {self.stream: self._last_id}, count=self.batch, block=block)
+        n = 0
+        for _stream, entries in resp or ():
+            for entry_id, fields in entries:
+                self._last_id = entry_id
+                n += 1
+                try:
+                    payload = json.loads(fields[b"p"])
+                except (KeyError, ValueError):
+                    continue
+                # horloge murale → délai écoulé depuis le set (autre processus)
+                age = max(0.0, time.time() - payload.get("w", time.time()))
+                self._apply(payload["m"], payload["d"], time.perf_counter() - age)
+        self._since_checkpoint += n
+        return n
+
+    async def _reader(self):
+        while True:
+            try:
+                await self._read(block=1000)
+                if self._since_checkpoint >= self.checkpoint_every:
+                    await self._checkpoint()
+            except RedisError as e:
+                print(f"[state] Erreur XREAD: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _checkpoint(self):
+        self._since_checkpoint = 0
+        # toutes les répliques sont identiques à un id donné : un seul
+        # worker suffit
+        if not await self._redis.set(self.lock_key, self.worker_id, nx=True, px=5000):
+            return
+        state = self._snapshot()
+        body = await asyncio.to_thread(
+            json.dumps,
+            {"id": self._last_id.decode(), "state": state},
+            ensure_ascii=False, separators=(",", ":"))
+        await self._redis.set(self.checkpoint_key, body)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._redis is not None:
+            # derniers set reçus : les autres workers doivent les voir
+            await self._flush_outbox()
+            await self._redis.aclose()
+
+
+def make_backend(name: str, redis_url: Optional[str] = None):
+    if name == "local":
+        return LocalBackend()
+    if name == "redis":
+        return RedisBackend(redis_url or "redis://127.0.0.1:6379/0")
+    raise ValueError(f"Backend d'état inconnu: {name}")
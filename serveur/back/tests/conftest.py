@@ -0,0 +1,26 @@
+# serveur/back/tests/conftest.py
+"""
+Les modules du serveur s'importent à plat (`from scene import Scene`),
+comme quand uvicorn est lancé depuis serveur/back.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACK_DIR)
+
+# pas de journal ni de capture sur disque quand un test importe main
+os.environ.setdefault("ARTINEO_JOURNAL_DIR", "")
+os.environ.setdefault("ARTINEO_CAPTURE", "")
+
+
+@pytest.fixture
+def server():
+    """Module `main` démarré (évènements startup/shutdown) et son TestClient."""
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as client:
+        yield main, client
@@ -0,0 +1,167 @@
+# serveur/back/tests/test_assets.py
+
+import pytest
+
+from asset_catalog import AssetCatalog, parse_range
+
+BODY = bytes(range(256)) * 4   # 1024 octets
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    # multi-plages ou unité inconnue : fichier entier
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=1024-", "bytes=10-5", "bytes=-0", "bytes=a-b", "bytes=-",
+])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1024)
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    import main
+    (tmp_path / "module1").mkdir()
+    (tmp_path / "module1" / "son.mp3").write_bytes(BODY)
+    (tmp_path / "module1" / "notes.txt").write_text("x")
+    (tmp_path / "module7").mkdir()
+    monkeypatch.setattr(main, "asset_catalog", AssetCatalog(str(tmp_path)))
+    monkeypatch.setattr(main, "ASSETS_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def client(assets, server):
+    return server[1]
+
+
+def test_full_get_has_strong_etag(client):
+    res = client.get("/assets/module1/son.mp3")
+    assert res.status_code == 200 and res.content == BODY
+    assert res.headers["etag"].startswith('"') and res.headers["accept-ranges"] == "bytes"
+    assert res.headers["cache-control"] == "no-cache"
+
+
+def test_versioned_url_is_immutable(client):
+    url = client.get("/media", params={"module": 1}).json()["medias"][0]["url"]
+    res = client.get(url)
+    assert "immutable" in res.headers["cache-control"]
+
+
+def test_if_none_match_gives_304(client):
+    etag = client.get("/assets/module1/son.mp3").headers["etag"]
+    res = client.get("/assets/module1/son.mp3", headers={"If-None-Match": etag})
+    assert res.status_code == 304 and res.content == b""
+
+
+def test_range_gives_206(client):
+    res = client.get("/assets/module1/son.mp3", headers={"Range": "bytes=10-19"})
+    assert res.status_code == 206 and res.content == BODY[10:20]
+    assert res.headers["content-range"] == "bytes 10-19/1024"
+
+
+def test_if_range_with_stale_etag_sends_whole_file(client):
+    etag = client.get("/assets/module1/son.mp3").headers["etag"]
+    fresh = client.get("/assets/module1/son.mp3",
+                       headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert fresh.status_code == 206
+    stale = client.get("/assets/module1/son.mp3",
+                       headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale.status_code == 200 and stale.content == BODY
+
+
+def test_unsatisfiable_range_gives_416(client):
+    res = client.get("/assets/module1/son.mp3", headers={"Range": "bytes=5000-"})
+    assert res.status_code == 416
+    assert res.headers["content-range"] == "bytes */1024"
+
+
+def test_head_has_get_headers_without_body(client):
+    get = client.get("/assets/module1/son.mp3")
+    head = client.head("/assets/module1/son.mp3")
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["etag"] == get.headers["etag"]
+    assert head.headers["content-length"] == "1024"
+    ranged = client.head("/assets/module1/son.mp3", headers={"Range": "bytes=0-9"})
+    assert ranged.status_code == 206 and ranged.content == b""
+    assert ranged.headers["content-length"] == "10"
+    assert client.head("/assets/module1/absent.mp3").status_code == 404
+
+
+def test_get_asset_rejects_path_traversal(client):
+    res = client.get("/getAsset", params={"module": 1, "path": "../module7/x"})
+    assert res.status_code == 400
+
+
+def test_media_lists_only_media_files(client):
+    medias = client.get("/media", params={"module": 1}).json()["medias"]
+    assert [m["title"] for m in medias] == ["son.mp3"]
+    assert medias[0]["type"] == "audio/mpeg"
+
+
+def test_media_of_empty_module_dir_is_empty(client):
+    res = client.get("/media", params={"module": 7})
+    assert res.status_code == 200 and res.json() == {"medias": []}
+    assert client.get("/media", params={"module": 2}).status_code == 404
+
+
+def test_rescan_rehashes_only_changed_files(tmp_path):
+    (tmp_path / "module1").mkdir()
+    path = tmp_path / "module1" / "a.wav"
+    path.write_bytes(b"one")
+    catalog = AssetCatalog(str(tmp_path))
+    catalog.scan()
+    before = catalog.get("module1/a.wav")
+    catalog.scan()
+    assert catalog.get("module1/a.wav") is before
+    path.write_bytes(b"two!")
+    catalog.scan()
+    assert catalog.get("module1/a.wav").digest != before.digest
+
+
+def test_changed_file_is_restatted_before_serving(client, tmp_path):
+    url = client.get("/media", params={"module": 1}).json()["medias"][0]["url"]
+    etag = client.get(url).headers["etag"]
+    (tmp_path / "module1" / "son.mp3").write_bytes(BODY[:100])
+    res = client.get(url, headers={"Range": "bytes=50-"})
+    assert res.status_code == 206 and res.content == BODY[50:100]
+    assert res.headers["content-range"] == "bytes 50-99/100"
+    assert res.headers["etag"] != etag
+    # l'ancienne URL versionnée ne désigne plus ce contenu
+    assert res.headers["cache-control"] == "no-cache"
+    assert client.get("/media", params={"module": 1}).json()["medias"][0]["url"] != url
+
+
+def test_new_file_is_served_before_the_next_scan(client, tmp_path):
+    (tmp_path / "module1" / "nouveau.wav").write_bytes(b"RIFF")
+    res = client.get("/assets/module1/nouveau.wav")
+    assert res.status_code == 200 and res.content == b"RIFF"
+    titles = [m["title"] for m in client.get("/media", params={"module": 1}).json()["medias"]]
+    assert titles == ["nouveau.wav", "son.mp3"]
+
+
+def test_deleted_file_is_404_before_the_next_scan(client, tmp_path):
+    assert client.get("/assets/module1/son.mp3").status_code == 200
+    (tmp_path / "module1" / "son.mp3").unlink()
+    assert client.get("/assets/module1/son.mp3").status_code == 404
+    assert client.get("/media", params={"module": 1}).json() == {"medias": []}
+
+
+def test_lookup_stays_inside_root(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "secret.txt").write_text("x")
+    catalog = AssetCatalog(str(tmp_path / "assets"))
+    assert catalog.lookup("../secret.txt") is None
+    assert catalog.lookup("") is None
@@ -0,0 +1,105 @@
+# serveur/back/tests/test_buffer_since.py
+
+import asyncio
+import time
+
+import pytest
+
+
+@pytest.fixture
+def client(server):
+    return server[1]
+
+
+def current(client, module=1):
+    return client.get("/buffer", params={"module": module}).json()
+
+
+def test_body_carries_version_and_etag(client):
+    res = client.get("/buffer", params={"module": 1})
+    body = res.json()
+    assert body["etag"] == res.headers["etag"]
+    assert body["etag"].endswith(f'-{body["version"]}"')
+
+
+def test_since_current_etag_waits_then_304(client):
+    body = current(client)
+    start = time.perf_counter()
+    res = client.get("/buffer", params={"module": 1, "since": body["etag"], "timeout": 0.2})
+    assert res.status_code == 304
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_since_without_quotes_is_accepted(client):
+    body = current(client)
+    res = client.get("/buffer", params={"module": 1, "since": body["etag"].strip('"'),
+                                        "timeout": 0})
+    assert res.status_code == 304
+
+
+@pytest.mark.parametrize("since", [
+    '"b1-00000000-{v}"',   # autre époque (serveur redémarré)
+    '"b4-{epoch}-{v}"',     # autre module
+    "{v}",                  # ancien format : version seule
+    "n'importe quoi",
+])
+def test_foreign_since_gets_full_buffer_at_once(server, since):
+    main, client = server
+    body = current(client)
+    since = since.format(v=body["version"], epoch=main.buffer_epoch)
+    start = time.perf_counter()
+    res = client.get("/buffer", params={"module": 1, "since": since, "timeout": 5})
+    assert res.status_code == 200 and res.json() == body
+    assert time.perf_counter() - start < 1
+
+
+def test_if_none_match_gives_304(client):
+    body = current(client)
+    res = client.get("/buffer", params={"module": 1}, headers={"If-None-Match": body["etag"]})
+    assert res.status_code == 304
+
+
+@pytest.fixture
+def main_loop_state(monkeypatch):
+    """`main` seul, sans les Event d'attente créés par la boucle du TestClient."""
+    import main
+    monkeypatch.setattr(main, "_buffer_waiters", {})
+    return main
+
+
+def test_set_wakes_a_waiting_long_poll(main_loop_state):
+    main = main_loop_state
+
+    async def scenario():
+        version = main.buffer_versions.get(1, 0)
+        waiter = asyncio.create_task(main.wait_buffer_change(1, version, 5))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        main.apply_set(1, {"a": 1})
+        return await asyncio.wait_for(waiter, 1)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_stale_version_returns_at_once(main_loop_state):
+    main = main_loop_state
+
+    async def scenario():
+        stale = main.buffer_versions.get(1, 0) - 1
+        return await asyncio.wait_for(main.wait_buffer_change(1, stale, 5), 0.5)
+
+    main.apply_set(1, {"a": 2})
+    assert asyncio.run(scenario()) is True
+
+
+def test_journal_restore_starts_a_new_epoch(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "buffer_epoch", "11111111")
+    main.restore_state({"epoch": "22222222"}, adopt_epoch=False)
+    assert main.buffer_epoch == "11111111"
+    # workers Redis : même suite de versions, même époque
+    main.restore_state({"epoch": "22222222"})
+    assert main.buffer_epoch == "22222222"
+    assert main.journal_snapshot()["epoch"] == "22222222"
+    assert main.parse_buffer_since(1, '"b1-22222222-7"') == 7
+    assert main.parse_buffer_since(1, '"b1-11111111-7"') is None
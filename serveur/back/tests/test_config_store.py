@@ -0,0 +1,204 @@
+# serveur/back/tests/test_config_store.py
+
+import asyncio
+import json
+import os
+
+import pytest
+
+import config_store
+from config_store import ConfigStore, _atomic_write
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "module1.json").write_text('{"fps": 30, "seuil": 5}', encoding="utf-8")
+    return ConfigStore(str(tmp_path), flush_interval=0.05)
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Chemins passés à _atomic_write, dans l'ordre."""
+    calls = []
+
+    def counting(path, text):
+        calls.append(os.path.basename(path))
+        return _atomic_write(path, text)
+    monkeypatch.setattr(config_store, "_atomic_write", counting)
+    return calls
+
+
+def test_update_is_in_memory_until_flushed(store, tmp_path, writes):
+    store.get(1)
+    entry = store.update(1, {"seuil": 7})
+    assert entry.data == {"fps": 30, "seuil": 7}
+    assert read(tmp_path / "module1.json")["seuil"] == 5
+    # la mémoire fait foi tant que l'écriture n'a pas eu lieu
+    assert store.get(1) is entry
+    store.flush_sync()
+    assert read(tmp_path / "module1.json") == {"fps": 30, "seuil": 7}
+    assert writes == ["module1.json"]
+
+
+def test_writer_coalesces_a_burst_into_one_write(store, tmp_path, writes):
+    store.get(1)
+
+    async def scenario():
+        writer = asyncio.create_task(store.run_writer())
+        await asyncio.sleep(0)
+        for i in range(10):
+            store.update(1, {"seuil": i})
+            store.update(2, {"step": i})
+        await asyncio.sleep(0.2)
+        writer.cancel()
+
+    asyncio.run(scenario())
+    assert sorted(writes) == ["module1.json", "module2.json"]
+    assert read(tmp_path / "module1.json")["seuil"] == 9
+    assert read(tmp_path / "module2.json") == {"step": 9}
+    # fichier écrit par le serveur : pas relu
+    entry = store.cached(1)
+    assert store.get(1) is entry
+
+
+def test_patch_arriving_during_a_write_stays_dirty(store, tmp_path):
+    store.get(1)
+    store.update(1, {"seuil": 6})
+    ((name, written, text),) = store._pending_writes()
+    stamp = _atomic_write(str(tmp_path / name), text)
+    newer = store.update(1, {"seuil": 8})       # arrivé pendant l'écriture
+    store._written(name, written, stamp)
+    assert store.get(1) is newer and newer.data["seuil"] == 8
+    assert read(tmp_path / "module1.json")["seuil"] == 6
+    store.flush_sync()
+    assert read(tmp_path / "module1.json")["seuil"] == 8
+
+
+def test_atomic_write_replaces_without_leftovers(tmp_path):
+    path = tmp_path / "module1.json"
+    path.write_text("{}", encoding="utf-8")
+    stamp = _atomic_write(str(path), '{"a": 1}')
+    assert read(path) == {"a": 1}
+    st = os.stat(path)
+    assert stamp == (st.st_mtime_ns, st.st_size)
+    assert os.listdir(tmp_path) == ["module1.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "module1.json"
+    path.write_text('{"a": 1}', encoding="utf-8")
+
+    def failing_replace(src, dst):
+        raise OSError("disque plein")
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        _atomic_write(str(path), '{"a": 2}')
+    assert read(path) == {"a": 1}
+    assert os.listdir(tmp_path) == ["module1.json"]
+
+
+def test_writer_retries_after_an_error(store, tmp_path, monkeypatch):
+    store.get(1)
+    failures = [OSError("disque plein")]
+
+    def flaky(path, text):
+        if failures:
+            raise failures.pop()
+        return _atomic_write(path, text)
+    monkeypatch.setattr(config_store, "_atomic_write", flaky)
+
+    async def scenario():
+        writer = asyncio.create_task(store.run_writer())
+        await asyncio.sleep(0)
+        store.update(1, {"seuil": 9})
+        await asyncio.sleep(0.3)
+        writer.cancel()
+
+    asyncio.run(scenario())
+    assert read(tmp_path / "module1.json")["seuil"] == 9
+    assert not store._dirty
+
+
+def rewrite(path, text):
+    """Modification externe, mtime distinct même sur un système de fichiers grossier."""
+    st = os.stat(path)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_file_is_reread_only_when_its_stamp_changes(store, tmp_path):
+    entry = store.get(1)
+    assert store.get(1) is entry
+    rewrite(tmp_path / "module1.json", '{"fps": 10}')
+    fresh = store.get(1)
+    assert fresh.data == {"fps": 10} and fresh.etag != entry.etag
+
+
+def test_deleted_or_broken_file(store, tmp_path):
+    store.get(1)
+    rewrite(tmp_path / "module1.json", "{pas du json")
+    with pytest.raises(ValueError):
+        store.get(1)
+    os.unlink(tmp_path / "module1.json")
+    with pytest.raises(FileNotFoundError):
+        store.get(1)
+    assert store.cached(1) is None
+
+
+def test_get_all_follows_new_files(store, tmp_path):
+    body, etag = store.get_all()
+    assert json.loads(body) == {"configurations": {"module1.json": {"fps": 30, "seuil": 5}}}
+    assert store.get_all() == (body, etag)
+    (tmp_path / "module2.json").write_text('{"step": 1}', encoding="utf-8")
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1_000_000_000))
+    body2, etag2 = store.get_all()
+    assert etag2 != etag
+    assert json.loads(body2)["configurations"]["module2.json"] == {"step": 1}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Serveur démarré sur un dossier de configs temporaire."""
+    from fastapi.testclient import TestClient
+    import main
+    (tmp_path / "module1.json").write_text('{"fps": 30}', encoding="utf-8")
+    monkeypatch.setattr(main, "CONFIG_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "config_store", ConfigStore(str(tmp_path)))
+    monkeypatch.setattr(main, "schedulers", {})
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("params", [{"module": 1}, {}])
+def test_get_config_etag_gives_304(client, params):
+    res = client.get("/config", params=params)
+    etag = res.headers["etag"]
+    assert res.status_code == 200 and res.headers["cache-control"] == "no-cache"
+    again = client.get("/config", params=params, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+
+
+def test_get_config_sees_external_edits(client, tmp_path):
+    etag = client.get("/config", params={"module": 1}).headers["etag"]
+    rewrite(tmp_path / "module1.json", '{"fps": 12}')
+    res = client.get("/config", params={"module": 1}, headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json() == {"config": {"fps": 12}}
+    assert res.headers["etag"] != etag
+
+
+def test_post_config_changes_the_etag(client):
+    etag = client.get("/config", params={"module": 1}).headers["etag"]
+    res = client.post("/config", params={"module": 1}, json={"seuil": 3})
+    assert res.json() == {"config": {"fps": 30, "seuil": 3}}
+    assert res.headers["etag"] != etag
+    after = client.get("/config", params={"module": 1}, headers={"If-None-Match": etag})
+    assert after.status_code == 200 and after.headers["etag"] == res.headers["etag"]
+
+
+def test_missing_config_is_404(client):
+    assert client.get("/config", params={"module": 9}).status_code == 404
@@ -0,0 +1,88 @@
+# serveur/back/tests/test_diff_log.py
+
+from diff_log import DiffLog
+from scene import Scene
+
+
+def stroke(sid, **extra):
+    return {"id": sid, **extra}
+
+
+def push(log: DiffLog, data: dict, ts=None):
+    """Comme le serveur : la scène d'abord, puis la file."""
+    _, created = log.scene.apply(data)
+    log.append(data, ts, created)
+
+
+def drain(log: DiffLog):
+    out = []
+    while len(log):
+        out.append(log.popleft())
+    return out
+
+
+def test_add_then_remove_of_a_new_item_cancels_out():
+    log = DiffLog(Scene())
+    push(log, {"newStrokes": [stroke("a")]})
+    push(log, {"removeStrokes": ["a"]})
+    assert len(log) == 0
+
+
+def test_remove_of_an_item_the_client_has_is_kept():
+    scene = Scene()
+    scene.apply({"newStrokes": [stroke("a")]})
+    log = DiffLog(scene)
+    push(log, {"newStrokes": [stroke("a", color=1)]})
+    push(log, {"removeStrokes": ["a"]})
+    assert drain(log) == [{"removeStrokes": ["a"]}]
+
+
+def test_successive_adds_merge_and_last_item_wins():
+    log = DiffLog(Scene())
+    push(log, {"newStrokes": [stroke("a", x=1)]})
+    push(log, {"newStrokes": [stroke("a", x=2), stroke("b")], "button": 1})
+    push(log, {"button": 2})
+    assert drain(log) == [
+        {"button": 2, "newStrokes": [stroke("a", x=2), stroke("b")]}
+    ]
+
+
+def test_readd_after_remove_keeps_order_in_a_new_diff():
+    scene = Scene()
+    scene.apply({"newStrokes": [stroke("a")]})
+    log = DiffLog(scene)
+    push(log, {"removeStrokes": ["a"]})
+    push(log, {"newStrokes": [stroke("a", x=9)]})
+    assert drain(log) == [
+        {"removeStrokes": ["a"]},
+        {"newStrokes": [stroke("a", x=9)]},
+    ]
+
+
+def test_overflow_collapses_into_a_scene_snapshot():
+    log = DiffLog(Scene(), max_entries=16, max_items=3)
+    for i in range(5):
+        push(log, {"newStrokes": [stroke(i)], "tool": i}, ts=float(i))
+    payload, ts = log.pop_timed()
+    assert payload["snapshot"] is True
+    assert payload["newStrokes"] == [stroke(i) for i in range(5)]
+    assert payload["tool"] == 4
+    # horodatage du plus ancien set fusionné
+    assert ts == 0.0
+    assert len(log) == 0
+
+
+def test_snapshot_lists_every_scene_key_even_empty():
+    log = DiffLog(Scene(), max_items=0)
+    push(log, {"newStrokes": [stroke("a")]})
+    payload = log.popleft()
+    assert payload["newObjects"] == [] and payload["newBackgrounds"] == []
+
+
+def test_remove_after_snapshot_drops_the_item_from_it():
+    log = DiffLog(Scene(), max_items=0)
+    push(log, {"newStrokes": [stroke("a"), stroke("b")]})
+    push(log, {"removeStrokes": ["a"]})
+    payload = log.popleft()
+    assert payload["newStrokes"] == [stroke("b")]
+    assert "removeStrokes" not in payload
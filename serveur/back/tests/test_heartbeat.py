@@ -0,0 +1,140 @@
+# serveur/back/tests/test_heartbeat.py
+
+import asyncio
+import time
+
+import pytest
+
+
+class FakeSocket:
+    """Ce que ConnectionManager utilise d'une WebSocket."""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed = None
+        self.fail = fail
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("socket morte")
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+@pytest.fixture
+def manager():
+    import main
+    return main.ConnectionManager()
+
+
+def run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_reverse_index_follows_register_and_subscribe(manager):
+    a, b = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        manager.register(1, a)
+        manager.subscribe(4, a)
+        manager.register(1, b)
+        assert manager.modules_of(a) == {1, 4} and manager.modules_of(b) == {1}
+        sub = manager.topics[4].subscribers[a]
+        manager.disconnect(a)
+        await asyncio.sleep(0)
+        assert manager.modules_of(a) == set()
+        assert 4 not in manager.topics and sub._task.done()
+        assert manager.topics[1].peers == {b}
+
+    run(scenario)
+
+
+def test_pong_refreshes_only_the_modules_of_its_socket(manager):
+    a, b = FakeSocket(), FakeSocket()
+    manager.register(1, a)
+    manager.register(2, b)
+    manager._last_pong_time.update({1: 0.0, 2: 0.0})
+    manager.pong(a)
+    assert manager._last_pong_time[1] > 0 and manager._last_pong_time[2] == 0.0
+
+
+def test_heartbeat_closes_silent_sockets_and_pings_the_others(manager):
+    silent, alive = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        manager.register(1, silent)
+        manager.subscribe(4, silent)
+        manager.register(1, alive)
+        manager._last_seen[silent] = time.monotonic() - 60
+        manager._last_seen[alive] = time.monotonic()
+        task = asyncio.create_task(manager.run_heartbeat(interval=0.01, timeout=30))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    run(scenario)
+    assert silent.closed == 1001 and silent.sent == []
+    assert manager.modules_of(silent) == set() and 4 not in manager.topics
+    assert alive.closed is None and "ping" in alive.sent
+    assert manager.topics[1].peers == {alive}
+
+
+def test_failed_ping_closes_the_socket(manager):
+    dead = FakeSocket(fail=True)
+
+    async def scenario():
+        manager.register(3, dead)
+        manager._last_seen[dead] = time.monotonic()
+        await manager.broadcast_ping(timeout=1)
+
+    run(scenario)
+    assert dead.closed == 1001
+    assert dead not in manager._last_seen and 3 not in manager.topics
+
+
+def test_ws_ping_pong_and_health(server):
+    main, client = server
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text("ping")
+        assert ws.receive_text() == "pong"
+        ws.send_json({"module": 2, "action": "get"})
+        ws.receive_json()
+        assert client.get("/hc").json()["modules"]["2"] == "alive"
+        main.manager._last_pong_time[2] = 0.0
+        assert client.get("/hc").json()["modules"]["2"] == "dead"
+        ws.send_text("pong")
+        for _ in range(100):
+            if main.manager._last_pong_time[2] > 0:
+                break
+            time.sleep(0.01)
+        assert client.get("/hc").json()["modules"]["2"] == "alive"
+
+
+def test_observer_socket_does_not_keep_modules_alive(server):
+    main, client = server
+    with client.websocket_connect("/ws?observer=1") as ws:
+        ws.send_json({"module": 41, "action": "subscribe"})
+        assert ws.receive_json()["buffer"]["snapshot"] is True
+        assert ws.receive_json()["action"] == "subscribe"
+        assert "41" not in client.get("/hc").json()["modules"]
+        main.commit_set(41, {"button": 3}, None)
+        assert ws.receive_json()["buffer"] == {"button": 3}
+
+
+def test_pong_of_a_subscriber_only_socket_is_ignored(manager):
+    peer, watcher = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        manager.register(4, peer)
+        manager.subscribe(4, watcher)
+        manager._last_pong_time[4] = 0.0
+        manager.pong(watcher)
+        assert manager._last_pong_time[4] == 0.0
+        manager.pong(peer)
+        assert manager._last_pong_time[4] > 0
+
+    run(scenario)
@@ -0,0 +1,93 @@
+# serveur/back/tests/test_journal.py
+
+import asyncio
+import os
+
+from journal import CHECKPOINT_FILE, Journal, restore_buffer
+
+
+def state_of(entries):
+    """Snapshot minimal : le dernier `data` de chaque module."""
+    return lambda: {"buffer": [[m, d] for m, d in dict(entries).items()]}
+
+
+def write_batch(journal: Journal, items):
+    """Ajoute et écrit `items` sans checkpoint (le thread d'écriture, en direct)."""
+    for module_id, data in items:
+        journal.append(module_id, data)
+    batch, state = journal._take(lambda: {})
+    journal._write(batch, state)
+
+
+def test_replays_entries_without_checkpoint(tmp_path):
+    journal = Journal(str(tmp_path), checkpoint_every=100)
+    write_batch(journal, [(1, {"x": 1}), (4, {"newStrokes": []}), (1, {"x": 2})])
+    checkpoint, entries = Journal(str(tmp_path)).load()
+    assert checkpoint is None
+    assert entries == [(1, {"x": 1}), (4, {"newStrokes": []}), (1, {"x": 2})]
+
+
+def test_checkpoint_replaces_earlier_segments(tmp_path):
+    journal = Journal(str(tmp_path), checkpoint_every=100)
+    items = [(1, {"x": 1}), (2, {"y": 1})]
+    write_batch(journal, items)
+    journal.flush_sync(state_of(items))
+    assert os.listdir(tmp_path) == [CHECKPOINT_FILE]
+
+    reloaded = Journal(str(tmp_path))
+    checkpoint, entries = reloaded.load()
+    assert restore_buffer(checkpoint) == {1: {"x": 1}, 2: {"y": 1}}
+    assert entries == [] and reloaded.seq == 2
+
+
+def test_entries_after_checkpoint_continue_the_sequence(tmp_path):
+    journal = Journal(str(tmp_path), checkpoint_every=100)
+    write_batch(journal, [(1, {"x": 1})])
+    journal.flush_sync(state_of([(1, {"x": 1})]))
+
+    restarted = Journal(str(tmp_path), checkpoint_every=100)
+    restarted.load()
+    write_batch(restarted, [(1, {"x": 2}), (3, {"z": 0})])
+    checkpoint, entries = Journal(str(tmp_path)).load()
+    assert checkpoint["seq"] == 1
+    assert entries == [(1, {"x": 2}), (3, {"z": 0})]
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    journal = Journal(str(tmp_path), checkpoint_every=100)
+    write_batch(journal, [(1, {"x": 1}), (1, {"x": 2})])
+    journal.flush_sync(lambda: {})   # ferme le segment (checkpoint vide)
+    write_batch(journal, [(1, {"x": 3})])
+    segment = [n for n in os.listdir(tmp_path) if n != CHECKPOINT_FILE][0]
+    with open(tmp_path / segment, "a", encoding="utf-8") as f:
+        f.write('{"seq": 4, "module": 1, "da')
+    _, entries = Journal(str(tmp_path)).load()
+    assert entries == [(1, {"x": 3})]
+
+
+def test_unserializable_entry_is_dropped_not_the_batch(tmp_path):
+    journal = Journal(str(tmp_path), checkpoint_every=100)
+    write_batch(journal, [(1, {"x": 1}), (1, {"bad": object()}), (1, {"x": 2})])
+    _, entries = Journal(str(tmp_path)).load()
+    assert entries == [(1, {"x": 1}), (1, {"x": 2})]
+
+
+def test_writer_task_checkpoints_every_n_entries(tmp_path):
+    async def scenario():
+        journal = Journal(str(tmp_path), flush_interval=0.01, checkpoint_every=3)
+        applied = []
+        writer = asyncio.create_task(journal.run_writer(state_of(applied)))
+        for i in range(4):
+            applied.append((1, {"x": i}))
+            journal.append(1, {"x": i})
+        await asyncio.sleep(0.1)
+        writer.cancel()
+        try:
+            await writer
+        except asyncio.CancelledError:
+            pass
+        journal.flush_sync(state_of(applied))
+    asyncio.run(scenario())
+    checkpoint, entries = Journal(str(tmp_path)).load()
+    assert checkpoint["seq"] == 4 and entries == []
+    assert restore_buffer(checkpoint) == {1: {"x": 3}}
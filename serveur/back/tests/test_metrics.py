@@ -0,0 +1,46 @@
+# serveur/back/tests/test_metrics.py
+
+from metrics import Registry, module_label
+from tracing import Tracer
+
+KNOWN = {1, 2, 3, 4, 41}
+
+
+def test_module_label_only_names_known_modules():
+    assert module_label(4, KNOWN) == "4"
+    assert module_label(999, KNOWN) == "other"
+    assert module_label(True, {1}) == "other"
+    assert module_label("4", KNOWN) == "other"
+    assert module_label(None, KNOWN) == "none"
+    assert module_label(4) == "other"
+
+
+def test_unknown_ids_share_one_series():
+    registry = Registry()
+    counter = registry.counter("artineo_test_total", "test")
+    for mid in (4, 1000, 1001, 1002):
+        counter.inc(module_label(mid, KNOWN))
+    assert counter.values == {"4": 1, "other": 3}
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    hist = registry.histogram("artineo_test_seconds", "test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe("4", value)
+    text = registry.render()
+    assert 'artineo_test_seconds_bucket{module="4",le="0.1"} 1' in text
+    assert 'artineo_test_seconds_bucket{module="4",le="1"} 3' in text
+    assert 'artineo_test_seconds_bucket{module="4",le="+Inf"} 4' in text
+    assert 'artineo_test_seconds_count{module="4"} 4' in text
+    assert "# TYPE artineo_test_seconds histogram" in text
+
+
+def test_tracer_folds_unknown_ids_into_one_ring():
+    tracer = Tracer(ring_size=2, label=lambda mid: module_label(mid, KNOWN))
+    for mid in range(100, 110):
+        tracer.record(mid, "in", {"module": mid})
+    tracer.record(4, "in", {"module": 4})
+    recent = tracer.recent()
+    assert sorted(recent) == ["4", "other"]
+    assert [e["msg"]["module"] for e in recent["other"]] == [108, 109]
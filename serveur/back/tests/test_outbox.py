@@ -0,0 +1,77 @@
+# serveur/back/tests/test_outbox.py
+
+import asyncio
+
+from outbox import ACKS_ALL, ACKS_NONE, Outbox
+from wire_codec import JSON_CODEC
+
+
+def ack(module):
+    return {"action": "set_buffer", "status": "ok", "module": module}
+
+
+def run_outbox(messages, maxsize=256, acks=ACKS_ALL):
+    """Met `messages` en file pendant que le client ne lit pas, puis les envoie."""
+    async def scenario():
+        gate = asyncio.Event()
+        sent, drops = [], []
+
+        async def send(ws, frame, label, ts):
+            await gate.wait()
+            sent.append(frame if frame == "pong" else JSON_CODEC.decode(frame))
+
+        outbox = Outbox(object(), JSON_CODEC, send, maxsize=maxsize, acks=acks,
+                        on_drop=drops.append)
+        for message, label in messages:
+            outbox.put(message, label)
+        gate.set()
+        for _ in range(len(messages) + 5):
+            await asyncio.sleep(0)
+        outbox.close()
+        return outbox, sent, drops
+    return asyncio.run(scenario())
+
+
+def test_consecutive_acks_of_a_module_are_batched():
+    outbox, sent, _ = run_outbox([(ack(4), "4")] * 5 + [(ack(1), "1"), (ack(4), "4")])
+    assert sent == [{**ack(4), "count": 5}, ack(1), ack(4)]
+    assert outbox.batched == 4
+
+
+def test_ack_is_not_merged_across_another_reply():
+    reply = {"action": "get_buffer", "module": 4}
+    _, sent, _ = run_outbox([(ack(4), "4"), (reply, "4"), (ack(4), "4")])
+    assert sent == [ack(4), reply, ack(4)]
+
+
+def test_full_queue_drops_the_oldest_reply():
+    messages = [({"n": i}, str(i)) for i in range(5)]
+    outbox, sent, drops = run_outbox(messages, maxsize=3)
+    assert sent == [{"n": 2}, {"n": 3}, {"n": 4}]
+    assert outbox.dropped == 2 and drops == ["0", "1"]
+
+
+def test_pre_encoded_frames_are_sent_as_is():
+    _, sent, _ = run_outbox([("pong", "none")])
+    assert sent == ["pong"]
+
+
+def test_acks_mode():
+    outbox, _, _ = run_outbox([], acks=ACKS_NONE)
+    assert not outbox.wants_acks
+    outbox, _, _ = run_outbox([], acks="bogus")
+    assert outbox.acks == ACKS_ALL and outbox.wants_acks
+
+
+def test_send_error_empties_the_queue():
+    async def scenario():
+        async def send(ws, frame, label, ts):
+            raise ConnectionError
+
+        outbox = Outbox(object(), JSON_CODEC, send)
+        outbox.put({"n": 1})
+        outbox.put({"n": 2})
+        await asyncio.sleep(0)
+        assert len(outbox) == 0
+        outbox.close()
+    asyncio.run(scenario())
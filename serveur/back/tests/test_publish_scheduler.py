@@ -0,0 +1,147 @@
+# serveur/back/tests/test_publish_scheduler.py
+
+import asyncio
+
+import pytest
+
+from publish_scheduler import PublishScheduler, merge_latest
+from scene import Scene
+
+
+class Recorder:
+    """deliver() qui garde (payload, ts, version) de chaque publication."""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, module_id, payload, ts, version, created):
+        self.sent.append((payload, ts, version))
+
+
+def run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_merge_latest_keeps_a_transient_command():
+    assert merge_latest(None, {"x": 1}) == {"x": 1}
+    assert merge_latest({"x": 1, "timerControl": "reset"}, {"x": 2}) == \
+        {"x": 2, "timerControl": "reset"}
+    assert merge_latest({"timerControl": "reset"}, {"timerControl": "pause"}) == \
+        {"timerControl": "pause"}
+
+
+def test_sets_within_an_interval_are_coalesced_to_the_latest():
+    sent = Recorder()
+
+    async def scenario():
+        scheduler = PublishScheduler(1, 20, sent)
+        scheduler.push({"x": 0}, 1.0)
+        assert sent.sent == [({"x": 0}, 1.0, None)]        # après un silence : tout de suite
+        for i in range(1, 5):
+            scheduler.push({"x": i}, 1.0 + i)
+        assert len(sent.sent) == 1
+        await asyncio.sleep(0.1)
+        scheduler.close()
+        return scheduler
+
+    scheduler = run(scenario)
+    # dernière valeur, horodatage du plus ancien set en attente
+    assert sent.sent[1:] == [({"x": 4}, 2.0, None)]
+    assert scheduler.coalesced == 3
+
+
+def test_zero_fps_publishes_every_set():
+    sent = Recorder()
+    scheduler = PublishScheduler(1, 0, sent)
+    for i in range(3):
+        scheduler.push({"x": i}, None)
+    assert [p for p, _, _ in sent.sent] == [{"x": 0}, {"x": 1}, {"x": 2}]
+
+
+def test_scene_diffs_are_merged_and_carry_the_scene_version():
+    sent = Recorder()
+    scene = Scene()
+
+    def push(scheduler, data):
+        version, created = scene.apply(data)
+        scheduler.push(data, None, version, created)
+
+    async def scenario():
+        scheduler = PublishScheduler(4, 20, sent, scene)
+        push(scheduler, {"newStrokes": [{"id": "a"}]})
+        push(scheduler, {"newStrokes": [{"id": "b"}]})
+        push(scheduler, {"newStrokes": [{"id": "c"}]})
+        push(scheduler, {"removeStrokes": ["b"]})
+        await asyncio.sleep(0.1)
+        scheduler.close()
+
+    run(scenario)
+    first, merged = sent.sent
+    assert first[0] == {"newStrokes": [{"id": "a"}]}
+    payload, _, version = merged
+    # b ajouté puis retiré dans l'intervalle : il ne part pas
+    assert [s["id"] for s in payload["newStrokes"]] == ["c"]
+    assert not payload.get("removeStrokes")
+    assert version == scene.version == 4
+
+
+def test_set_fps_reschedules_a_pending_publish():
+    sent = Recorder()
+
+    async def scenario():
+        scheduler = PublishScheduler(1, 1, sent)
+        scheduler.push({"x": 0}, None)
+        scheduler.push({"x": 1}, None)
+        scheduler.set_fps(50)                 # 1 s → 20 ms
+        await asyncio.sleep(0.1)
+        scheduler.close()
+
+    run(scenario)
+    assert [p for p, _, _ in sent.sent] == [{"x": 0}, {"x": 1}]
+
+
+@pytest.fixture
+def main_sent(monkeypatch):
+    """`main` sans scheduler, avec un deliver() enregistreur."""
+    import main
+    sent = Recorder()
+    monkeypatch.setattr(main, "schedulers", {})
+    monkeypatch.setattr(main, "deliver", sent)
+    return main, sent
+
+
+def test_configure_scheduler_follows_the_config_fps(main_sent):
+    main, _ = main_sent
+
+    async def scenario():
+        main.configure_scheduler(1, {"fps": 5})
+        assert main.schedulers[1].fps == 5
+        main.configure_scheduler(1, {"fps": 10})
+        assert main.schedulers[1].fps == 10
+        for fps in (0, -1, True, "10"):
+            main.configure_scheduler(2, {"fps": fps})
+        assert 2 not in main.schedulers
+        main.configure_scheduler(99, {"fps": 10})       # module inconnu
+        assert 99 not in main.schedulers
+        main.schedulers.pop(1).close()
+
+    run(scenario)
+
+
+def test_removing_fps_flushes_and_closes_the_scheduler(main_sent):
+    main, sent = main_sent
+
+    async def scenario():
+        main.configure_scheduler(1, {"fps": 1})
+        scheduler = main.schedulers[1]
+        main.publish_set(1, {"x": 0}, None)
+        main.publish_set(1, {"x": 1}, None)
+        assert len(sent.sent) == 1
+        main.configure_scheduler(1, {})
+        # le set en attente part tout de suite, le timer est annulé
+        assert [p for p, _, _ in sent.sent] == [{"x": 0}, {"x": 1}]
+        assert 1 not in main.schedulers and scheduler._handle is None
+        main.publish_set(1, {"x": 2}, None)
+        assert sent.sent[-1][0] == {"x": 2}
+
+    run(scenario)
@@ -0,0 +1,50 @@
+# serveur/back/tests/test_scene.py
+
+from scene import Scene
+
+
+def test_apply_bumps_version_and_reports_created_ids():
+    scene = Scene()
+    version, created = scene.apply({"newStrokes": [{"id": "a"}, {"id": "b"}]})
+    assert version == 1 and created == {"newStrokes": {"a", "b"}}
+    version, created = scene.apply({"newStrokes": [{"id": "a", "x": 1}]})
+    assert version == 2 and created == {}
+
+
+def test_snapshot_keeps_state_but_not_transient_commands():
+    scene = Scene()
+    scene.apply({"newStrokes": [{"id": "a"}], "button": 1, "timerControl": "start"})
+    scene.apply({"removeStrokes": ["a"], "newObjects": [{"id": "o"}]})
+    snap = scene.snapshot()
+    assert snap["snapshot"] is True
+    assert snap["button"] == 1 and "timerControl" not in snap
+    assert snap["newStrokes"] == [] and snap["newObjects"] == [{"id": "o"}]
+
+
+def test_deltas_since_returns_the_missing_diffs_in_order():
+    scene = Scene()
+    for i in range(5):
+        scene.apply({"newStrokes": [{"id": i}]})
+    assert scene.deltas_since(5) == []
+    assert [v for v, _ in scene.deltas_since(2)] == [3, 4, 5]
+    assert scene.deltas_since(0)[0] == (1, {"newStrokes": [{"id": 0}]})
+
+
+def test_deltas_since_needs_a_snapshot_past_the_history():
+    scene = Scene(history=3)
+    for i in range(5):
+        scene.apply({"newStrokes": [{"id": i}]})
+    assert [v for v, _ in scene.deltas_since(2)] == [3, 4, 5]
+    assert scene.deltas_since(1) is None
+    # version d'une autre vie du serveur
+    assert scene.deltas_since(9) is None
+
+
+def test_load_restores_items_without_history():
+    scene = Scene()
+    scene.apply({"newStrokes": [{"id": "a"}], "button": 2})
+    restored = Scene()
+    restored.load(scene.dump())
+    assert restored.version == 1 and restored.snapshot() == scene.snapshot()
+    assert restored.deltas_since(1) == []
+    assert restored.deltas_since(0) is None
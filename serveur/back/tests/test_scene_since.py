@@ -0,0 +1,71 @@
+# serveur/back/tests/test_scene_since.py
+
+import pytest
+
+from scene import Scene
+
+
+@pytest.fixture
+def main(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "buffer_epoch", "11111111")
+    return main
+
+
+def scene_with(n):
+    scene = Scene()
+    for i in range(n):
+        scene.apply({"newStrokes": [{"id": i}]})
+    return scene
+
+
+def test_messages_carry_an_epoch_token(main):
+    message = main.get_buffer_message(4, {}, 3)
+    assert message["version"] == 3 and message["since"] == "11111111-3"
+    assert "since" not in main.get_buffer_message(1, {})
+
+
+def test_token_of_this_epoch_gets_the_missing_deltas(main):
+    scene = scene_with(5)
+    catchup = main.scene_catchup(4, scene, main.scene_since(3))
+    assert [m["since"] for m in catchup] == ["11111111-4", "11111111-5"]
+    assert main.scene_catchup(4, scene, main.scene_since(5)) == []
+
+
+@pytest.mark.parametrize("since", [
+    None,
+    3,                    # ancien client : version seule
+    "22222222-3",         # autre époque (serveur redémarré)
+    "11111111-x",
+    "n'importe quoi",
+])
+def test_other_tokens_get_a_snapshot(main, since):
+    scene = scene_with(5)
+    (message,) = main.scene_catchup(4, scene, since)
+    assert message["buffer"]["snapshot"] is True
+    assert message["since"] == "11111111-5"
+
+
+def test_restarted_server_answers_an_old_token_with_a_snapshot(main, monkeypatch):
+    # versions reprises du journal, mais époque nouvelle
+    scene = scene_with(5)
+    old = main.scene_since(2)
+    monkeypatch.setattr(main, "buffer_epoch", "22222222")
+    (message,) = main.scene_catchup(4, scene, old)
+    assert message["buffer"]["snapshot"] is True
+
+
+def test_ws_subscribe_resumes_from_a_token(server):
+    main, client = server
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"module": 41, "action": "subscribe"})
+        first = ws.receive_json()
+        assert first["buffer"]["snapshot"] is True
+        assert ws.receive_json()["action"] == "subscribe"
+        ws.send_json({"module": 41, "action": "unsubscribe"})
+        ws.receive_json()
+        main.commit_set(41, {"button": 2}, 0.0)
+        ws.send_json({"module": 41, "action": "subscribe", "since": first["since"]})
+        delta = ws.receive_json()
+        assert delta["buffer"] == {"button": 2}
+        assert delta["version"] == first["version"] + 1
@@ -0,0 +1,113 @@
+# serveur/back/tests/test_schemas.py
+
+import pytest
+
+import schemas
+from schemas import SchemaError, check_frame, validate_message
+
+
+def set_msg(module, data):
+    return {"module": module, "action": "set", "data": data}
+
+
+@pytest.mark.parametrize("module, data", [
+    (1, {"x": 0.5, "y": 3, "diameter": 12.0}),
+    (2, {"rotX": 10, "rotY": -2.5, "rotZ": 0}),
+    (3, {"uid1": "04:A3", "uid2": None, "current_set": 2,
+         "button_pressed": False, "timer": "1:30"}),
+    (4, {"newStrokes": [{"id": "s1", "tool_id": "pen", "x": 1, "y": 2, "size": 3}],
+         "removeObjects": ["o1", 2], "button": None}),
+    (41, {"button": 2, "button1": True}),
+    # aucun champ obligatoire, clés inconnues acceptées
+    (4, {"timerControl": "reset"}),
+    (1, {"x": 1, "marker": "bench"}),
+])
+def test_valid_set_is_accepted(module, data):
+    validate_message(set_msg(module, data))
+
+
+@pytest.mark.parametrize("module, data, path", [
+    (1, {"x": "0.5"}, "data.x"),
+    (1, {"diameter": True}, "data.diameter"),       # bool n'est pas un nombre
+    (2, {"rotZ": None}, "data.rotZ"),
+    (3, {"current_set": 1.5}, "data.current_set"),
+    (3, {"button_pressed": 1}, "data.button_pressed"),
+    (4, {"newStrokes": [{"id": "a"}, {"x": 1}]}, "data.newStrokes[1]"),
+    (4, {"newObjects": [{"id": "o", "cx": "1"}]}, "data.newObjects[0].cx"),
+    (4, {"removeStrokes": [{"id": 1}]}, "data.removeStrokes[0]"),
+    (41, {"button1": "on"}, "data.button1"),
+    (41, {"timerControl": "stop"}, "data.timerControl"),
+    (1, [1, 2], "data"),
+])
+def test_invalid_set_names_the_field(module, data, path):
+    with pytest.raises(SchemaError) as info:
+        validate_message(set_msg(module, data))
+    assert str(info.value).startswith(f"{path}: ")
+    assert info.value.reason == "schema"
+
+
+@pytest.mark.parametrize("msg", [
+    set_msg(99, {}),
+    {"module": None, "action": "get"},
+    {"module": 99, "action": "telemetry", "data": {}},
+])
+def test_unknown_module(msg):
+    with pytest.raises(SchemaError) as info:
+        validate_message(msg)
+    assert info.value.reason == "unknown_module"
+
+
+@pytest.mark.parametrize("msg", [
+    [1, 2],
+    {"module": "1", "action": "get"},
+    {"module": 1, "action": 3},
+    {"module": 1, "action": "set"},
+    {"module": 1, "action": "telemetry", "data": [1]},
+    {"module": 4, "action": "subscribe", "since": 1.5},
+    {"module": 4, "action": "subscribe", "policy": 1},
+])
+def test_malformed_messages(msg):
+    with pytest.raises(SchemaError):
+        validate_message(msg)
+
+
+def test_actions_without_module_state_pass():
+    validate_message({"action": "ping"})
+    validate_message({"module": 4, "action": "subscribe", "since": "abcd-3"})
+    validate_message({"module": 4, "action": "subscribe", "since": 3})
+
+
+def test_oversized_lists_and_strings(monkeypatch):
+    monkeypatch.setattr(schemas, "MAX_ITEMS", 3)
+    with pytest.raises(SchemaError) as info:
+        validate_message(set_msg(4, {"removeStrokes": [1, 2, 3, 4]}))
+    assert info.value.reason == "too_large"
+    with pytest.raises(SchemaError) as info:
+        validate_message(set_msg(3, {"timer": "x" * (schemas.MAX_STRING + 1)}))
+    assert info.value.reason == "too_large"
+
+
+def test_check_frame():
+    check_frame(b"x" * 10, 10)
+    check_frame(b"x" * 1000, 0)           # 0 = pas de limite
+    with pytest.raises(SchemaError) as info:
+        check_frame("x" * 11, 10)
+    assert info.value.reason == "too_large"
+
+
+def test_ws_replies_with_the_error_and_keeps_the_state(server, monkeypatch):
+    main, client = server
+    monkeypatch.setattr(main, "MAX_FRAME_BYTES", 64)
+    before = dict(main.buffer[1])
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text('{"module": 1, "action": "set", "data": {"x": "%s"}}' % ("1" * 64))
+        reply = ws.receive_json()
+        assert reply["status"] == "error" and reply["reason"] == "too_large"
+        assert reply["module"] is None            # refusée avant décodage
+        ws.send_json(set_msg(1, {"x": "loin"}))
+        reply = ws.receive_json()
+        assert reply == {"status": "error", "action": "set", "module": 1,
+                         "reason": "schema", "error": "data.x: nombre attendu, reçu str"}
+        ws.send_json(set_msg(99, {}))
+        assert ws.receive_json()["reason"] == "unknown_module"
+    assert main.buffer[1] == before
@@ -0,0 +1,129 @@
+# serveur/back/tests/test_stream.py
+"""
+Le TestClient lit les réponses en entier : le flux SSE, infini, est lu
+en appelant l'application ASGI directement, jusqu'au n-ième événement.
+"""
+
+import asyncio
+import json
+from urllib.parse import urlencode
+
+import pytest
+
+
+@pytest.fixture
+def main(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "buffer_epoch", "11111111")
+    # publication immédiate, Event d'attente propres à cette boucle
+    monkeypatch.setattr(main, "schedulers", {})
+    monkeypatch.setattr(main, "_buffer_waiters", {})
+    return main
+
+
+def parse(body: bytes):
+    """[(id, message)] des événements `data:` reçus."""
+    events = []
+    for block in body.decode("utf-8").split("\n\n")[:-1]:
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        if "data" in fields:
+            events.append((fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+def read_stream(main, query, headers=(), n=1, during=None, timeout=2.0):
+    """
+    Ouvre /stream, appelle `during()` une fois la requête en cours, puis
+    se déconnecte après `n` événements (ou `timeout` s).
+    """
+    async def scenario():
+        disconnected = asyncio.Event()
+        body = bytearray()
+
+        async def receive():
+            if not getattr(receive, "done", False):
+                receive.done = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+                if len(parse(bytes(body))) >= n:
+                    disconnected.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/stream", "raw_path": b"/stream",
+            "root_path": "", "query_string": urlencode(query).encode(),
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        task = asyncio.create_task(main.app(scope, receive, send))
+        await asyncio.sleep(0.01)
+        if during is not None:
+            during()
+        try:
+            await asyncio.wait_for(disconnected.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        return parse(bytes(body))
+    return asyncio.run(scenario())
+
+
+def test_first_event_is_the_current_state_with_an_epoch_id(main):
+    main.commit_set(1, {"a": 1}, None)
+    ((event_id, message),) = read_stream(main, {"module": 1})
+    assert event_id == main.buffer_etag(1, main.buffer_versions[1]).strip('"')
+    assert event_id.startswith("b1-11111111-")
+    assert message["buffer"] == main.buffer[1]
+
+
+def test_resume_from_the_current_id_waits_for_the_next_push(main):
+    main.commit_set(1, {"a": 2}, None)
+    (current, _), = read_stream(main, {"module": 1})
+    events = read_stream(main, {"module": 1}, headers=[("Last-Event-ID", current)],
+                         during=lambda: main.commit_set(1, {"a": 3}, None))
+    ((event_id, message),) = events
+    assert message["buffer"] == {"a": 3}
+    assert event_id == main.buffer_etag(1, main.buffer_versions[1]).strip('"')
+    assert event_id != current
+
+
+@pytest.mark.parametrize("last_id", ["b1-22222222-{v}", "{v}", "b2-11111111-{v}"])
+def test_id_of_another_epoch_gets_the_current_state(main, last_id):
+    main.commit_set(1, {"a": 4}, None)
+    last_id = last_id.format(v=main.buffer_versions[1])
+    ((_, message),) = read_stream(main, {"module": 1}, headers=[("Last-Event-ID", last_id)])
+    assert message["buffer"] == main.buffer[1]
+
+
+def test_since_query_is_a_fallback_for_last_event_id(main):
+    main.commit_set(1, {"a": 5}, None)
+    (current, _), = read_stream(main, {"module": 1})
+    assert read_stream(main, {"module": 1, "since": current}, timeout=0.2) == []
+
+
+def test_scene_resumes_with_the_missing_deltas_only(main):
+    main.commit_set(41, {"button": 1}, None)
+    (first, snapshot), = read_stream(main, {"module": 41})
+    assert snapshot["buffer"]["snapshot"] is True and first == snapshot["since"]
+    main.commit_set(41, {"button": 2}, None)
+    main.commit_set(41, {"button": 3}, None)
+    events = read_stream(main, {"module": 41}, headers=[("Last-Event-ID", first)], n=2)
+    assert [m["buffer"] for _, m in events] == [{"button": 2}, {"button": 3}]
+    assert [i for i, _ in events] == [m["since"] for _, m in events]
+
+
+def test_scene_id_of_another_epoch_gets_a_snapshot(main, monkeypatch):
+    main.commit_set(41, {"button": 4}, None)
+    (first, _), = read_stream(main, {"module": 41})
+    monkeypatch.setattr(main, "buffer_epoch", "22222222")     # redémarrage
+    main.commit_set(41, {"button": 5}, None)
+    ((event_id, message),) = read_stream(main, {"module": 41},
+                                         headers=[("Last-Event-ID", first)])
+    assert message["buffer"]["snapshot"] is True
+    assert event_id.startswith("22222222-")
@@ -0,0 +1,77 @@
+# serveur/back/tests/test_topics.py
+
+import asyncio
+
+from topics import DROP_OLDEST, LATEST_ONLY, Subscriber
+from wire_codec import JSON_CODEC
+
+
+class SlowSocket:
+    """Envoi bloqué jusqu'à `release()` : un consommateur qui ne suit pas."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+
+    async def send(self, ws, frame, ts):
+        await self.gate.wait()
+        self.sent.append(JSON_CODEC.decode(frame))
+
+    def release(self):
+        self.gate.set()
+
+
+def run_subscriber(policy, messages, maxsize=3, resync=None):
+    """Offre `messages` pendant que le premier envoi est bloqué, puis vide la file."""
+    async def scenario():
+        sock = SlowSocket()
+        drops = []
+        sub = Subscriber(sock, 4, JSON_CODEC, sock.send, policy=policy,
+                         maxsize=maxsize, resync=resync, on_drop=drops.append)
+        sub.offer_message({"n": 0})
+        await asyncio.sleep(0)          # la tâche prend {"n": 0} et bloque
+        for msg in messages:
+            sub.offer_message(msg)
+        sock.release()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        sub.close()
+        return sock.sent, sub.dropped, drops
+    return asyncio.run(scenario())
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    sent, dropped, drops = run_subscriber(DROP_OLDEST, [{"n": i} for i in range(1, 6)])
+    assert sent == [{"n": 0}, {"n": 3}, {"n": 4}, {"n": 5}]
+    assert dropped == 2 and drops == [1, 1]
+
+
+def test_latest_only_keeps_a_single_message():
+    sent, dropped, _ = run_subscriber(LATEST_ONLY, [{"n": i} for i in range(1, 6)])
+    assert sent == [{"n": 0}, {"n": 5}]
+    assert dropped == 4
+
+
+def test_overflow_with_resync_sends_a_snapshot_instead():
+    snapshot = {"snapshot": True}
+    sent, dropped, _ = run_subscriber(
+        DROP_OLDEST, [{"n": i} for i in range(1, 5)], resync=lambda: snapshot)
+    # {"n": 4} déborde : les 3 en file et lui sont remplacés par le snapshot
+    assert sent == [{"n": 0}, snapshot]
+    assert dropped == 4
+
+
+def test_send_error_reports_the_subscriber():
+    async def scenario():
+        failed = []
+
+        async def send(ws, frame, ts):
+            raise ConnectionError
+
+        sub = Subscriber(object(), 4, JSON_CODEC, send, on_error=failed.append)
+        sub.offer_message({"n": 1})
+        sub.offer_message({"n": 2})
+        await asyncio.sleep(0)
+        assert failed == [sub] and len(sub) == 0
+        sub.close()
+    asyncio.run(scenario())
@@ -0,0 +1,124 @@
+# serveur/back/topics.py
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from wire_codec import Frame
+
+# politiques de file par abonné quand le consommateur ne suit pas
+LATEST_ONLY = "latest"      # seul le dernier message compte (état complet)
+DROP_OLDEST = "drop_oldest" # file bornée, les plus anciens sont jetés
+POLICIES = (LATEST_ONLY, DROP_OLDEST)
+
+SendFn = Callable[[WebSocket, Frame, Optional[float]], Awaitable[None]]
+
+
+class Subscriber:
+    """
+    Abonnement d'une socket à un module, avec sa propre file de sortie.
+
+    `offer` ne bloque jamais : le message est mis en file selon la
+    politique et une tâche dédiée l'envoie. Un navigateur lent ne ralentit
+    donc ni le producteur ni les autres abonnés ; il perd des messages.
+
+    Pour les modules à diffs cumulatifs, `resync` fournit un message de
+    rattrapage (snapshot) : en cas de débordement, la file est remplacée
+    par ce seul message au lieu de perdre des diffs silencieusement.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        module_id: int,
+        codec,
+        send: SendFn,
+        policy: str = DROP_OLDEST,
+        maxsize: int = 64,
+        resync: Optional[Callable[[], dict]] = None,
+        on_drop: Optional[Callable[[int], None]] = None,
+        on_error: Optional[Callable[["Subscriber"], None]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue: {policy}")
+        self.ws = ws
+        self.module_id = module_id
+        self.codec = codec
+        self.policy = policy
+        self.maxsize = 1 if policy == LATEST_ONLY else max(1, maxsize)
+        self.dropped = 0
+        self._send = send
+        self._resync = resync
+        self._on_drop = on_drop
+        self._on_error = on_error
+        # (trame, perf_counter du set d'origine)
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self):
+        return len(self._queue)
+
+    def offer(self, frame: Frame, ts: Optional[float] = None):
+        if len(self._queue) >= self.maxsize:
+            if self.policy == LATEST_ONLY:
+                self._drop(len(self._queue))
+                self._queue.clear()
+            elif self._resync is not None:
+                # la scène contient déjà ce message : le snapshot le remplace
+                self._drop(len(self._queue) + 1)
+                self._queue.clear()
+                frame = self.codec.encode(self._resync())
+            else:
+                self._drop(1)
+                self._queue.popleft()
+        self._queue.append((frame, ts))
+        self._wakeup.set()
+
+    def offer_message(self, message: dict, ts: Optional[float] = None):
+        self.offer(self.codec.encode(message), ts)
+
+    def _drop(self, n: int):
+        self.dropped += n
+        if self._on_drop is not None:
+            self._on_drop(n)
+
+    async def _run(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                frame, ts = self._queue.popleft()
+                await self._send(self.ws, frame, ts)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._queue.clear()
+            if self._on_error is not None:
+                self._on_error(self)
+
+    def close(self):
+        self._queue.clear()
+        self._task.cancel()
+
+
+class Topic:
+    """Sockets rattachées à un module : émetteurs/pollers et abonnés."""
+
+    __slots__ = ("module_id", "peers", "subscribers")
+
+    def __init__(self, module_id: int):
+        self.module_id = module_id
+        # toutes les sockets qui ont parlé de ce module
+        self.peers: Set[WebSocket] = set()
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+
+    def __bool__(self):
+        return bool(self.peers or self.subscribers)
+
+    def __repr__(self):
+        return (f"Topic({self.module_id}, peers={len(self.peers)}, "
+                f"subscribers={len(self.subscribers)})")
@@ -0,0 +1,97 @@
+# serveur/back/tracing.py
+"""
+Traces de debug paresseuses et historique récent par module.
+
+`tracer.trace(catégorie, "format %r", arg)` ne formate rien tant que la
+catégorie n'est pas active : en production, un appel coûte un lookup de
+dict. Chaque catégorie a un taux d'échantillonnage (0 = coupée, 1 = tout),
+modifiable à chaud via `/trace`.
+
+Indépendamment des traces, les derniers messages de chaque module sont
+gardés (par référence, sans sérialisation) dans un anneau de taille fixe,
+consultable sur `GET /trace`.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from metrics import module_label
+
+CATEGORIES = ("startup", "http", "ws.in", "ws.set", "ws.get")
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """`"ws.in=0.01,ws.set=1"` → {"ws.in": 0.01, "ws.set": 1.0} ; `"*"` = tout."""
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition("=")
+        rate = float(value) if value else 1.0
+        for cat in (CATEGORIES if name == "*" else (name,)):
+            rates[cat] = rate
+    return rates
+
+
+class Tracer:
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        ring_size: int = 100,
+        label: Callable[[Any], str] = module_label
+    ):
+        # catégorie -> taux ; absente = coupée
+        self.rates: Dict[str, float] = {}
+        self.ring_size = ring_size
+        # id → anneau ; les ids inconnus partagent celui de "other"
+        self.label = label
+        # module (label) -> [(time.time(), sens, message)]
+        self._rings: Dict[str, Deque[Tuple[float, str, Any]]] = {}
+        self.set_rates(rates or {})
+
+    # ─── traces ──────────────────────────────────────────────────────────────
+    def set_rates(self, rates: Dict[str, float]):
+        for cat, rate in rates.items():
+            rate = min(max(float(rate), 0.0), 1.0)
+            if rate > 0:
+                self.rates[cat] = rate
+            else:
+                self.rates.pop(cat, None)
+
+    def enabled(self, category: str) -> bool:
+        rate = self.rates.get(category)
+        if rate is None:
+            return False
+        return rate >= 1.0 or random.random() < rate
+
+    def trace(self, category: str, fmt: str, *args):
+        """Comme `print(fmt % args)`, mais seulement si la catégorie émet."""
+        if not self.enabled(category):
+            return
+        print(f"[{category}] " + (fmt % args if args else fmt))
+
+    # ─── historique par module ───────────────────────────────────────────────
+    def record(self, module_id, direction: str, message: Any):
+        if self.ring_size <= 0:
+            return
+        label = self.label(module_id)
+        ring = self._rings.get(label)
+        if ring is None:
+            ring = self._rings[label] = deque(maxlen=self.ring_size)
+        ring.append((time.time(), direction, message))
+
+    def recent(self, module_id=None, limit: Optional[int] = None) -> Dict[str, List[dict]]:
+        labels = [self.label(module_id)] if module_id is not None else sorted(self._rings)
+        out: Dict[str, List[dict]] = {}
+        for label in labels:
+            entries = list(self._rings.get(label, ()))
+            if limit is not None:
+                entries = entries[-limit:] if limit > 0 else []
+            out[label] = [
+                {"ts": ts, "dir": direction, "msg": message}
+                for ts, direction, message in entries
+            ]
+        return out
@@ -0,0 +1,103 @@
+# serveur/back/wire_codec.py
+"""
+Encodage des messages du protocole /ws.
+
+JSON (trames texte) reste le format par défaut. Un client peut demander
+MessagePack (trames binaires) en proposant le sous-protocole WebSocket
+`artineo.msgpack` à la connexion ; le serveur ne l'accepte que si le
+paquet `msgpack` est installé.
+
+Si `msgspec` est installé, il sert au décodage (JSON et msgpack), plus
+rapide que `json.loads` / `msgpack.unpackb` pour le même résultat.
+"""
+
+import json
+from typing import Any, Iterable, Optional, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec is not None:
+    _json_decode = msgspec.json.Decoder().decode
+    _msgpack_decode = msgspec.msgpack.Decoder().decode
+    _DecodeError = msgspec.DecodeError
+else:
+    _json_decode = json.loads
+    _msgpack_decode = None
+    _DecodeError = ValueError
+
+MSGPACK_SUBPROTOCOL = "artineo.msgpack"
+
+Frame = Union[str, bytes]
+
+
+class JsonCodec:
+    name = "json"
+    subprotocol = None
+    binary = False
+
+    def encode(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def decode(self, frame: Frame) -> Any:
+        try:
+            return _json_decode(frame)
+        except _DecodeError as e:
+            # msgspec.DecodeError n'est pas un ValueError
+            raise ValueError(f"trame JSON invalide: {e}") from e
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    subprotocol = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, frame: Frame) -> Any:
+        if isinstance(frame, str):
+            # un client msgpack peut toujours envoyer du JSON texte
+            return JSON_CODEC.decode(frame)
+        try:
+            if _msgpack_decode is not None:
+                return _msgpack_decode(frame)
+            return msgpack.unpackb(frame, raw=False)
+        except Exception as e:
+            raise ValueError(f"trame msgpack invalide: {e}") from e
+
+
+JSON_CODEC = JsonCodec()
+MSGPACK_CODEC = MsgpackCodec() if msgpack is not None else None
+
+
+def codec_by_name(name: Optional[str]):
+    """Codec demandé par un client ("json" ou "msgpack")."""
+    if name in (None, "json"):
+        return JSON_CODEC
+    if name == "msgpack":
+        if MSGPACK_CODEC is None:
+            raise RuntimeError("Encodage msgpack demandé mais le paquet msgpack n'est pas installé")
+        return MSGPACK_CODEC
+    raise ValueError(f"Encodage inconnu: {name}")
+
+
+def negotiate(offered: Iterable[str]):
+    """Choisit le codec à partir des sous-protocoles proposés par le client."""
+    if MSGPACK_CODEC is not None and MSGPACK_SUBPROTOCOL in offered:
+        return MSGPACK_CODEC
+    return JSON_CODEC
+
+
+def codec_for_subprotocol(subprotocol: Optional[str]):
+    """Codec correspondant au sous-protocole accepté par le serveur."""
+    if subprotocol == MSGPACK_SUBPROTOCOL and MSGPACK_CODEC is not None:
+        return MSGPACK_CODEC
+    return JSON_CODEC
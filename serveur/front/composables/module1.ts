@@ -153,7 +153,6 @@ export default function useModule1() {
   // Lifecycle
   // ────────────────────────────────────────────────────────────────────────────
   const fps = ref(10)
-  let pollTimer: number | undefined
 
   onMounted(async () => {
     console.log('[Module1] Mounted, starting timer & WS')
@@ -183,26 +182,8 @@ export default function useModule1() {
       }
     })
 
-    // HTTP polling fallback
-    try {
-      const buf0 = await client.getBuffer()
-      console.log('[Module1] initial HTTP buffer →', buf0)
-      x.value      = buf0.x      ?? x.value
-      y.value      = buf0.y      ?? y.value
-      diamPx.value = buf0.diameter ?? diamPx.value
-    } catch (e) {
-      console.warn('[Module1] initial HTTP error', e)
-    }
-
-    pollTimer = window.setInterval(async () => {
-      try {
-        const buf = await client.getBuffer()
-        // console.log('[Module1] HTTP poll buffer →', buf)
-        x.value      = buf.x      ?? x.value
-        y.value      = buf.y      ?? y.value
-        diamPx.value = buf.diameter ?? diamPx.value
-      } catch {}
-    }, Math.round(1000/fps.value))
+    // Push serveur : chaque diff arrive via onMessage ci-dessus
+    client.subscribe().catch((e: any) => console.warn('[Module1] subscribe error', e))
 
     // === validation “bonne réponse” ===
     watch([x,y], ([newX,newY]) => {
@@ -241,7 +222,6 @@ export default function useModule1() {
 
   onBeforeUnmount(() => {
     console.log('[Module1] Unmount, clearing timers')
-    if (pollTimer)    clearInterval(pollTimer)
     if (timerInterval) clearInterval(timerInterval)
   })
 
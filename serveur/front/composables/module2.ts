@@ -61,7 +61,6 @@ export default function useModule2(canvasRef: Ref<HTMLCanvasElement | null>) {
   }
 
   // polling fallback
-  let pollingInterval: ReturnType<typeof setInterval> | null = null
 
   // ────────────────────────────────────────────────────────────────────────────
   // TIMER logic
@@ -179,20 +178,8 @@ export default function useModule2(canvasRef: Ref<HTMLCanvasElement | null>) {
       }
     })
 
-    // 4) initial + polling HTTP fallback
-    try {
-      applyBuffer(await artClient.getBuffer())
-    } catch {}
-    pollingInterval = setInterval(async () => {
-      try {
-        const buf = await artClient.getBuffer()
-        applyBuffer(buf)
-        const ctl = (buf as any).timerControl
-        if (ctl === 'pause')   pauseTimer()
-        if (ctl === 'resume')  resumeTimer()
-        if (ctl === 'reset')   resetTimer()
-      } catch {}
-    }, 50)
+    // 4) push serveur : les diffs arrivent via onMessage ci-dessus
+    artClient.subscribe().catch(() => {})
 
     // 5) Three.js setup (unchanged)
     const canvas = canvasRef.value
@@ -228,7 +215,6 @@ export default function useModule2(canvasRef: Ref<HTMLCanvasElement | null>) {
   })
 
   onBeforeUnmount(() => {
-    if (pollingInterval) clearInterval(pollingInterval)
     clearInterval(timerInterval)
   })
 
@@ -2,6 +2,7 @@
 import { useRuntimeConfig } from '#app'
 import { computed, onBeforeUnmount, onMounted, ref, type Ref } from 'vue'
 import { useArtineo } from './useArtineo'
+import { watchBuffer } from '~/utils/watchBuffer'
 
 function hexToRgb(hex: string) {
   const h = hex.replace('#','')
@@ -190,13 +191,7 @@ export default function useModule3(
     prevPressed = !!buf.button_pressed
   }
 
-  async function fetchBufferHttp(): Promise<any> {
-    const res = await fetch(`${apiUrl}/buffer?module=${moduleId}`)
-    if (!res.ok) throw new Error(`HTTP ${res.status}`)
-    return (await res.json() as { buffer: any }).buffer
-  }
-
-  let poll: ReturnType<typeof setInterval>
+  let stopWatch: (() => void) | undefined
 
   onMounted(async () => {
     // fetch config
@@ -219,26 +214,18 @@ export default function useModule3(
       }
     })
 
-    // initial HTTP + polling
-    try {
-      updateFromBuffer(await fetchBufferHttp())
-    } catch (e) {
-      console.warn('[useModule3] initial HTTP error', e)
-    }
-    poll = setInterval(async () => {
-      try {
-        const buf = await fetchBufferHttp()
-        updateFromBuffer(buf)
-        const ctl = (buf as any).timerControl
-        if (ctl === 'pause')   pauseTimer()
-        if (ctl === 'resume')  resumeTimer()
-        if (ctl === 'reset')   resetTimer()
-      } catch {}
-    }, 500)
+    // HTTP initial puis long-poll : chaque version du buffer une seule fois
+    stopWatch = watchBuffer(apiUrl, moduleId, (buf: any) => {
+      updateFromBuffer(buf)
+      const ctl = buf?.timerControl
+      if (ctl === 'pause')   pauseTimer()
+      if (ctl === 'resume')  resumeTimer()
+      if (ctl === 'reset')   resetTimer()
+    })
   })
 
   onBeforeUnmount(() => {
-    clearInterval(poll)
+    stopWatch?.()
     if (timerInterval) clearInterval(timerInterval)
   })
 
@@ -204,7 +204,16 @@ export default function useModule4(
     removeObjects?: string[]
     button?: number
     timerControl?: 'reset' | 'pause' | 'resume'
+    snapshot?: boolean
   }) {
+    // snapshot : le serveur renvoie la scène complète ; on ne repart de zéro
+    // que pour les collections qu'il contient (le module 41 n'en a aucune)
+    if (buf.snapshot) {
+      if (buf.newStrokes) { strokes.value = []; normalStrokes = 0 }
+      if (buf.newObjects) objects.value = []
+      if (buf.newBackgrounds) backgrounds.value = []
+    }
+
     // handle timerControl
     if (buf.timerControl === 'pause') pauseTimer()
     if (buf.timerControl === 'resume') resumeTimer()
@@ -329,39 +338,27 @@ export default function useModule4(
     ctx.fillRect(0, 0, canvas.width, canvas.height)
   }
 
-  // polling fallbacks
-  let pollKinect: ReturnType<typeof setInterval> | null = null
-  let pollButton: ReturnType<typeof setInterval> | null = null
-
   onMounted(() => {
     // start timer on mount
     // startTimer()
 
-    // subscribe Kinect WS
+    // subscribe Kinect WS (server push)
     artClientKinect.onMessage((msg: any) => {
       if (msg.action === 'get_buffer' && msg.buffer) drawBuffer(msg.buffer)
     })
-    artClientKinect.getBuffer().then(drawBuffer).catch(() => { })
-    pollKinect = setInterval(() => {
-      artClientKinect.getBuffer().then(drawBuffer).catch(() => { })
-    }, 100)
+    artClientKinect.subscribe().catch(() => { })
 
-    // subscribe Button WS
+    // subscribe Button WS (server push)
     artClientButton.onMessage((msg: any) => {
       if (msg.action === 'get_buffer' && msg.buffer) drawBuffer(msg.buffer)
     })
-    artClientButton.getBuffer().then(drawBuffer).catch(() => { })
-    pollButton = setInterval(() => {
-      artClientButton.getBuffer().then(drawBuffer).catch(() => { })
-    }, 100)
+    artClientButton.subscribe().catch(() => { })
 
     // keyboard for sandbox
     window.addEventListener('keydown', onKeydown)
   })
 
   onBeforeUnmount(() => {
-    if (pollKinect) clearInterval(pollKinect)
-    if (pollButton) clearInterval(pollButton)
     pauseTimer()
     window.removeEventListener('keydown', onKeydown)
     artClientKinect.close()
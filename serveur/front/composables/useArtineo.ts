@@ -8,6 +8,7 @@ interface ArtineoStub {
   getBuffer: () => Promise<any>
   setBuffer: (buf: any) => void
   onMessage: (fn: (msg: any) => void) => void
+  subscribe: () => Promise<void>
   close: () => void
 }
 
@@ -26,6 +27,7 @@ export function useArtineo(moduleId: number) {
       getBuffer: async () => ({}),
       setBuffer: () => {},
       onMessage: noop,
+      subscribe: async () => {},
       close: noop,
     }
     return stub
@@ -48,6 +50,7 @@ export function useArtineo(moduleId: number) {
       getBuffer: async () => ({}),
       setBuffer: () => {},
       onMessage: noop,
+      subscribe: async () => {},
       close: noop,
     }
     clientCache.set(moduleId, stub)
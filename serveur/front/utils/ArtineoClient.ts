@@ -9,8 +9,10 @@ import { EventEmitter } from 'eventemitter3'
 export type BufferPayload = { [key: string]: any }
 
 export enum ArtineoAction {
-  SET = 'set',
-  GET = 'get',
+  SET         = 'set',
+  GET         = 'get',
+  SUBSCRIBE   = 'subscribe',
+  UNSUBSCRIBE = 'unsubscribe',
 }
 
 export interface ArtineoConfigResponse {
@@ -40,6 +42,12 @@ export class ArtineoClient extends EventEmitter {
   // ---- Nouvelle : promesse de connexion en cours ----------------------------
   private pendingConnectPromise?: Promise<WebSocket>
 
+  // ---- Abonnement push (rejoué à chaque reconnexion) ------------------------
+  private subscribed = false
+  // jeton de la dernière version de scène reçue, "<époque>-<version>"
+  // (modules versionnés : 4, 41)
+  private lastSince?: string
+
   constructor(
     public   moduleId: number,
     private  apiUrl:   string,
@@ -131,6 +139,7 @@ export class ArtineoClient extends EventEmitter {
       this.backoff = wsBackoff!
       this.emit('open')
       console.log(`[ArtineoClient] WebSocket opened for module ${this.moduleId}`)
+      if (this.subscribed) this.sendSubscribe(this.ws!)
       // Ping périodique
       this.pingTimer = window.setInterval(() => {
         try { this.ws!.send('ping') } catch {}
@@ -141,6 +150,11 @@ export class ArtineoClient extends EventEmitter {
       if (e.data === 'ping') { this.ws!.send('pong'); return }
       let msg: any = e.data
       try { msg = JSON.parse(e.data) } catch {}
+      if (msg?.action === 'get_buffer' && typeof msg.since === 'string') {
+        // un push peut doubler le rattrapage envoyé à l'abonnement
+        if (!msg.buffer?.snapshot && this.alreadySeen(msg.since)) return
+        this.lastSince = msg.since
+      }
       this.emit('message', msg)
     }
 
@@ -224,6 +238,45 @@ export class ArtineoClient extends EventEmitter {
     return this.sendRaw({ action: ArtineoAction.SET, data: buf })
   }
 
+  /**
+   * Demande au serveur de pousser chaque diff (`get_buffer`) dès sa réception,
+   * au lieu de le récupérer par polling avec getBuffer().
+   * Les messages arrivent via onMessage().
+   */
+  async subscribe(): Promise<void> {
+    if (this.subscribed) return
+    const alreadyOpen = this.ws?.readyState === WebSocket.OPEN
+    this.subscribed = true
+    const ws = await this.ensureWs()
+    // sinon onopen envoie l'abonnement lui-même
+    if (alreadyOpen) this.sendSubscribe(ws)
+  }
+
+  // Après une reconnexion, `since` demande seulement les deltas manqués
+  // (le serveur renvoie un snapshot s'il ne les a plus ou a redémarré)
+  private sendSubscribe(ws: WebSocket): void {
+    const msg: Record<string, any> = { module: this.moduleId, action: ArtineoAction.SUBSCRIBE }
+    if (this.lastSince !== undefined) msg.since = this.lastSince
+    ws.send(JSON.stringify(msg))
+  }
+
+  // Version déjà reçue ? Les versions d'une autre époque (serveur
+  // redémarré) ne se comparent pas : elles repartent de plus bas.
+  private alreadySeen(since: string): boolean {
+    if (this.lastSince === undefined) return false
+    const [epoch, version] = since.split('-')
+    const [lastEpoch, lastVersion] = this.lastSince.split('-')
+    return epoch === lastEpoch && Number(version) <= Number(lastVersion)
+  }
+
+  async unsubscribe(): Promise<void> {
+    if (!this.subscribed) return
+    this.subscribed = false
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify({ module: this.moduleId, action: ArtineoAction.UNSUBSCRIBE }))
+    }
+  }
+
   onMessage(fn: (msg: any) => void): void {
     this.on('message', fn)
     // Assure la connexion
@@ -235,6 +288,8 @@ export class ArtineoClient extends EventEmitter {
   // -------------------------------------------------------------------------
   close(): void {
     this.stopping = true
+    this.subscribed = false
+    this.lastSince = undefined
     clearInterval(this.pingTimer)
     this.pendingConnectPromise = undefined
     this.ws?.close()
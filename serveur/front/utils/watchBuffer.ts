@@ -0,0 +1,50 @@
+// serveur/front/utils/watchBuffer.ts
+
+/**
+ * Suit buffer[module] par long-poll : `GET /buffer?since=<etag>` reste
+ * ouvert côté serveur jusqu'à une nouvelle version (sinon 304 au bout de
+ * `timeout` s, et on relance). L'etag porte l'époque du serveur : après
+ * un redémarrage, la réponse arrive tout de suite avec l'état courant. Un module inactif ne coûte donc qu'une
+ * requête en attente, et une mise à jour arrive tout de suite.
+ * Renvoie la fonction d'arrêt.
+ */
+export function watchBuffer(
+  apiUrl: string,
+  moduleId: number | string,
+  onBuffer: (buf: any) => void,
+  { timeout = 25, retryDelay = 2000 }: { timeout?: number, retryDelay?: number } = {}
+): () => void {
+  const ctrl = new AbortController()
+  const pause = (ms: number) => new Promise(resolve => setTimeout(resolve, ms))
+  let etag: string | undefined
+
+  async function loop() {
+    while (!ctrl.signal.aborted) {
+      const params = new URLSearchParams({ module: String(moduleId) })
+      if (etag !== undefined) {
+        params.set('since', etag)
+        params.set('timeout', String(timeout))
+      }
+      try {
+        const res = await fetch(`${apiUrl}/buffer?${params}`, {
+          signal: ctrl.signal,
+          cache: 'no-store',
+        })
+        if (res.status === 304) continue
+        if (!res.ok) throw new Error(`HTTP ${res.status}`)
+        const json = await res.json() as { buffer: any, version?: number, etag?: string }
+        onBuffer(json.buffer)
+        etag = json.etag
+        // serveur sans versions : simple polling
+        if (etag === undefined) await pause(retryDelay)
+      } catch (e) {
+        if (ctrl.signal.aborted) return
+        console.warn(`[watchBuffer] module ${moduleId}`, e)
+        await pause(retryDelay)
+      }
+    }
+  }
+
+  loop()
+  return () => ctrl.abort()
+}
@@ -0,0 +1,111 @@
+// serveur/front/utils/watchModules.ts
+
+/**
+ * Suit les buffers de plusieurs modules sur une seule WebSocket
+ * (`/ws?observer=1`, un `subscribe` par module) au lieu d'un long-poll
+ * par module : le navigateur limite à six les connexions HTTP/1.1 vers
+ * un même serveur. En observateur, la socket ne fait pas passer les
+ * modules pour vivants dans /hc.
+ *
+ * L'état courant des modules 1–3 est lu une fois par `GET /buffer` (un
+ * abonnement ne renvoie que les mises à jour suivantes) ; les scènes
+ * (4, 41) reçoivent un snapshot, puis seulement les deltas manqués
+ * après une reconnexion (`since`).
+ */
+export interface ModuleWatch {
+  add(moduleId: number | string): void
+  remove(moduleId: number | string): void
+  stop(): void
+}
+
+export function watchModules(
+  apiUrl: string,
+  wsUrl: string,
+  onBuffer: (moduleId: string, buf: any) => void,
+  { retryDelay = 2000 }: { retryDelay?: number } = {}
+): ModuleWatch {
+  const watched = new Set<string>()
+  // jeton `since` de la dernière version reçue, par scène
+  const sinces = new Map<string, string>()
+  // modules ayant déjà reçu un push : la lecture initiale arrive trop tard
+  const pushed = new Set<string>()
+  let ws: WebSocket | undefined
+  let retryTimer: ReturnType<typeof setTimeout> | undefined
+  let stopped = false
+
+  function send(msg: Record<string, any>) {
+    if (ws?.readyState === WebSocket.OPEN) ws.send(JSON.stringify(msg))
+  }
+
+  // à l'ajout et à chaque (re)connexion
+  function start(id: string) {
+    const msg: Record<string, any> = { module: Number(id), action: 'subscribe' }
+    const since = sinces.get(id)
+    if (since !== undefined) {
+      // scène déjà suivie : le serveur renvoie ce qui manque
+      msg.since = since
+      send(msg)
+      return
+    }
+    send(msg)
+    pushed.delete(id)
+    readInitial(id)
+  }
+
+  async function readInitial(id: string) {
+    try {
+      const res = await fetch(`${apiUrl}/buffer?module=${id}`, { cache: 'no-store' })
+      if (!res.ok) throw new Error(`HTTP ${res.status}`)
+      const json = await res.json() as { buffer: any }
+      if (watched.has(id) && !pushed.has(id)) onBuffer(id, json.buffer)
+    } catch (e) {
+      console.warn(`[watchModules] module ${id}`, e)
+    }
+  }
+
+  function connect() {
+    ws = new WebSocket(`${wsUrl}/ws?observer=1`)
+    ws.onopen = () => watched.forEach(start)
+    ws.onmessage = e => {
+      // heartbeat serveur : sans réponse, la socket est fermée
+      if (e.data === 'ping') { ws!.send('pong'); return }
+      let msg: any
+      try { msg = JSON.parse(e.data) } catch { return }
+      if (msg?.action !== 'get_buffer') return
+      const id = String(msg.module)
+      if (!watched.has(id)) return
+      if (typeof msg.since === 'string') sinces.set(id, msg.since)
+      pushed.add(id)
+      onBuffer(id, msg.buffer)
+    }
+    ws.onclose = () => {
+      ws = undefined
+      if (!stopped) retryTimer = setTimeout(connect, retryDelay)
+    }
+    ws.onerror = () => ws?.close()
+  }
+
+  connect()
+
+  return {
+    add(moduleId) {
+      const id = String(moduleId)
+      if (watched.has(id)) return
+      watched.add(id)
+      // sinon onopen le fera
+      if (ws?.readyState === WebSocket.OPEN) start(id)
+    },
+    remove(moduleId) {
+      const id = String(moduleId)
+      if (!watched.delete(id)) return
+      sinces.delete(id)
+      pushed.delete(id)
+      send({ module: Number(id), action: 'unsubscribe' })
+    },
+    stop() {
+      stopped = true
+      clearTimeout(retryTimer)
+      ws?.close()
+    },
+  }
+}